@@ -0,0 +1,196 @@
+import heapq
+
+import numpy as np
+import networkx as nx
+
+from forwarding import UNREACHABLE, ForwardingTable
+from graph_manager import GraphManager
+from routing import dijkstra, shortest_route
+
+Path = tuple[float, list[str]]
+
+
+class KShortestPaths:
+    """Yen's k shortest loopless paths from source to target, found a path at a time.
+
+    The first path comes from the Dijkstra tree of the target, and the
+    distances in that tree are the A* potentials of every spur search. Taking
+    nodes and edges out of the graph can only make distances longer, so they
+    never overestimate. Each spur result is kept per root path and reused while
+    it avoids every edge blocked since, and asking for more paths later carries
+    on from the paths already found.
+    """
+
+    def __init__(self, graph: nx.Graph, source: str, target: str):
+        self.graph = graph
+        self.source = source
+        self.target = target
+        tree = dijkstra(target, graph)
+        self.to_target: dict[str, float] = {node: distance for distance, node, _ in tree}
+        via = {node: v for _, node, v in tree}
+
+        self.paths: list[Path] = []
+        self.candidates: list[Path] = []
+        self.seen: set[tuple[str, ...]] = set()
+        # root path -> (its spur result, or None if the spur node had no path)
+        self.spurs: dict[tuple[str, ...], Path | None] = {}
+        self.spur_searches = 0
+
+        if source in self.to_target:
+            path = [source]
+            while path[-1] != target:
+                path.append(via[path[-1]])
+            self.paths.append((self.to_target[source], path))
+            self.seen.add(tuple(path))
+
+    def _spur(self, root: tuple[str, ...], blocked: set[str]) -> Path | None:
+        # Shortest path from the last node of root to target, avoiding the rest of
+        # root and the edges from the spur node to the nodes in blocked
+        spur = root[-1]
+        if root in self.spurs:
+            cached = self.spurs[root]
+            # Blocked edges only ever grow, so a result that still avoids them is still the shortest
+            if cached is None or cached[1][1] not in blocked:
+                return cached
+
+        self.spur_searches += 1
+        view = nx.restricted_view(self.graph, root[:-1], [(spur, node) for node in blocked])
+        cost, path, _ = shortest_route(spur, self.target, view, self.to_target)
+        result = (cost, path) if path else None
+        self.spurs[root] = result
+        return result
+
+    def get(self, k: int) -> list[Path]:
+        """Gets up to k shortest paths as [(cost, path)], cheapest first. Fewer if there are no more."""
+        while len(self.paths) < k and self.paths:
+            _, last = self.paths[-1]
+            root_cost = 0
+            for i in range(len(last) - 1):
+                root = tuple(last[: i + 1])
+                blocked = {path[i + 1] for _, path in self.paths if tuple(path[: i + 1]) == root}
+                spur = self._spur(root, blocked)
+                if spur is not None:
+                    path = list(root[:-1]) + spur[1]
+                    if tuple(path) not in self.seen:
+                        self.seen.add(tuple(path))
+                        heapq.heappush(self.candidates, (root_cost + spur[0], path))
+                root_cost += self.graph[last[i]][last[i + 1]]["weight"]
+
+            if not self.candidates:
+                break
+            self.paths.append(heapq.heappop(self.candidates))
+        return self.paths[:k]
+
+
+def k_shortest_paths(graph_manager: GraphManager, source: str, target: str, k: int) -> tuple[list[Path], KShortestPaths]:
+    """Gets up to k shortest paths from source to target, reusing earlier searches until the graph changes.
+
+    Returns:
+        tuple: (the paths as [(cost, path)], the search they came from)
+    """
+    cache = graph_manager.k_paths
+    if cache.get("version") != graph_manager.version:
+        cache.clear()
+        cache["version"] = graph_manager.version
+    if (source, target) not in cache:
+        cache[(source, target)] = KShortestPaths(graph_manager.graph, source, target)
+    search = cache[(source, target)]
+    return search.get(k), search
+
+
+def _float_distances(table: ForwardingTable) -> np.ndarray:
+    return np.where(table.dist == UNREACHABLE, np.inf, table.dist.astype(np.float64))
+
+
+def _router_alternates(
+    table: ForwardingTable, graph: nx.Graph, dist: np.ndarray, u: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Loop-free alternates of router u towards every destination, from the all-pairs distances of table.
+    # Returns (backup neighbor index or -1, cost through it, whether it protects against the failure of
+    # every primary next hop node, whether the destination is reachable at all), each indexed by destination.
+    V = len(table.nodes)
+    router = table.nodes[u]
+    neighbors = np.array([table.index[v] for v in graph.adj[router]], dtype=np.int64)
+    costs = np.array([attrs["weight"] for attrs in graph.adj[router].values()], dtype=np.float64)
+    backup = np.full(V, -1, dtype=np.int64)
+    backup_cost = np.full(V, np.inf)
+    protecting = np.zeros(V, dtype=bool)
+    reachable = np.isfinite(dist[u])
+    reachable[u] = False
+    if len(neighbors) == 0:
+        return backup, backup_cost, protecting, reachable
+
+    # Primary next hops, as a (neighbor, destination) mask
+    first, last = table.offsets[u * V], table.offsets[(u + 1) * V]
+    hop_counts = np.diff(table.offsets[u * V : (u + 1) * V + 1])
+    hop_dests = np.repeat(np.arange(V), hop_counts)
+    hop_nodes = table.hops[first:last].astype(np.int64)
+    position = np.full(V, -1, dtype=np.int64)
+    position[neighbors] = np.arange(len(neighbors))
+    primary = np.zeros((len(neighbors), V), dtype=bool)
+    primary[position[hop_nodes], hop_dests] = True
+
+    # RFC 5286 inequality 1: the neighbor's own shortest path to the destination does not come back through u
+    from_neighbor = dist[neighbors]
+    loop_free = from_neighbor < dist[neighbors, u][:, None] + dist[u][None, :]
+    through = np.where(loop_free & ~primary, costs[:, None] + from_neighbor, np.inf)
+    best = through.argmin(axis=0)
+    backup_cost = through[best, np.arange(V)]
+    has_backup = np.isfinite(backup_cost)
+    backup = np.where(has_backup, neighbors[best], -1)
+
+    # Inequality 3: node protecting if the backup's path also avoids every primary next hop node
+    chosen = neighbors[best][hop_dests]
+    avoids = (hop_nodes != hop_dests) & (
+        dist[chosen, hop_dests] < dist[chosen, hop_nodes] + dist[hop_nodes, hop_dests]
+    )
+    failures = np.bincount(hop_dests[~avoids], minlength=V)
+    protecting = has_backup & (failures == 0)
+    return backup, backup_cost, protecting, reachable
+
+
+def loop_free_alternates(
+    table: ForwardingTable, graph: nx.Graph, router: str
+) -> list[tuple[int, str, list[str], str | None, float, bool]]:
+    """Gets the backup next hop of router towards every destination it can reach, sorted by cost.
+
+    A neighbor is a loop-free alternate for a destination when its own shortest
+    path there does not lead back through router (RFC 5286), so router can
+    forward to it as soon as a primary next hop fails, before routing converges.
+
+    Returns:
+        list: [(cost, destination, primary next hops, backup next hop or None, cost through the backup, whether the backup is node protecting)]
+    """
+    u = table.index[router]
+    backup, backup_cost, protecting, reachable = _router_alternates(table, graph, _float_distances(table), u)
+    rows = []
+    for d in np.flatnonzero(reachable):
+        destination = table.nodes[d]
+        rows.append(
+            (
+                int(table.dist[u, d]),
+                destination,
+                table.next_hops(router, destination),
+                table.nodes[backup[d]] if backup[d] >= 0 else None,
+                float(backup_cost[d]),
+                bool(protecting[d]),
+            )
+        )
+    rows.sort(key=lambda x: x[0])
+    return rows
+
+
+def lfa_coverage(table: ForwardingTable, graph: nx.Graph) -> tuple[int, int, int]:
+    """Counts the (router, destination) pairs of every router that have a loop-free alternate.
+
+    Returns:
+        tuple: (reachable pairs, pairs with an alternate, pairs with a node protecting alternate)
+    """
+    dist = _float_distances(table)
+    pairs = covered = node_protected = 0
+    for u in range(len(table.nodes)):
+        backup, _, protecting, reachable = _router_alternates(table, graph, dist, u)
+        pairs += int(reachable.sum())
+        covered += int((reachable & (backup >= 0)).sum())
+        node_protected += int((reachable & protecting).sum())
+    return pairs, covered, node_protected
@@ -0,0 +1,230 @@
+import time
+from collections.abc import Hashable
+
+import numpy as np
+import networkx as nx
+
+from routing import dijkstra
+
+
+def partition_areas(graph: nx.Graph, seed: int = 0) -> dict[str, int]:
+    """Splits graph into areas of closely linked routers with the Louvain method."""
+    # Costs are distances rather than affinities, so links are left unweighted
+    communities = nx.community.louvain_communities(graph, weight=None, seed=seed)
+    return {node: area for area, members in enumerate(communities) for node in members}
+
+
+def read_areas(file_path: str) -> dict[str, str]:
+    """Reads the area of each router from lines of the form `X {area}`."""
+    areas = {}
+    with open(file_path, "r") as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 2:
+                areas[parts[0]] = parts[1]
+    return areas
+
+
+def _distance_matrix(graph: nx.Graph, sources: list[str], index: dict[str, int], V: int) -> np.ndarray:
+    # Rows are the distances from each source, columns are indexed like index. inf if unreachable.
+    dist = np.full((len(sources), V), np.inf)
+    for k, source in enumerate(sources):
+        for distance, node, _ in dijkstra(source, graph):
+            dist[k, index[node]] = distance
+    return dist
+
+
+class AreaRouting:
+    """OSPF-style hierarchical link-state routing.
+
+    Every router holds the full topology of its own area, and runs SPF over
+    that. Border routers (those with a link to another area) also form the
+    backbone: the links between areas, plus a summary link between every two
+    border routers of an area costing their distance within it. Each border
+    router advertises summaries of the destinations outside its area into its
+    area, either one per destination, or one per area costing the largest
+    distance to any of its routers (RFC 2328 section 12.4.3).
+
+    Like OSPF, routes within an area are always preferred, and destinations in
+    the same area are never reached through another area.
+    """
+
+    def __init__(self, graph: nx.Graph, areas: dict[str, Hashable], aggregate: bool = False):
+        missing = [node for node in graph.nodes if node not in areas]
+        if missing:
+            raise ValueError(f"No area given for {', '.join(map(str, missing))}")
+
+        self.graph = graph
+        self.aggregate = aggregate
+        self.nodes: list[str] = list(graph.nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        V = len(self.nodes)
+
+        self.members: dict[Hashable, list[str]] = {}
+        for node in self.nodes:
+            self.members.setdefault(areas[node], []).append(node)
+        self.area_of = {node: areas[node] for node in self.nodes}
+        self.border: dict[Hashable, list[str]] = {area: [] for area in self.members}
+        for node in self.nodes:
+            if any(self.area_of[neighbor] != self.area_of[node] for neighbor in graph.adj[node]):
+                self.border[self.area_of[node]].append(node)
+        self.border_routers = [node for area in self.members for node in self.border[area]]
+
+        # Intra-area SPF: every router only sees its own area
+        self.area_graphs = {
+            area: graph.subgraph(members).copy() for area, members in self.members.items()
+        }
+        self.intra = np.full((V, V), np.inf)
+        for area, members in self.members.items():
+            rows = [self.index[node] for node in members]
+            self.intra[rows] = _distance_matrix(self.area_graphs[area], members, self.index, V)
+
+        # Backbone SPF between the border routers
+        self.backbone = nx.Graph()
+        self.backbone.add_nodes_from(self.border_routers)
+        for u, v, cost in graph.edges(data="weight"):
+            if self.area_of[u] != self.area_of[v]:
+                self.backbone.add_edge(u, v, weight=cost)
+        for area, borders in self.border.items():
+            for i, u in enumerate(borders):
+                for v in borders[i + 1 :]:
+                    cost = self.intra[self.index[u], self.index[v]]
+                    if cost != np.inf and (
+                        not self.backbone.has_edge(u, v) or cost < self.backbone[u][v]["weight"]
+                    ):
+                        self.backbone.add_edge(u, v, weight=int(cost))
+        border_index = {node: k for k, node in enumerate(self.border_routers)}
+        backbone_dist = _distance_matrix(
+            self.backbone, self.border_routers, border_index, len(self.border_routers)
+        )
+
+        # summary[k, d]: what border router k advertises as its cost to destination d
+        self.summary = np.full((len(self.border_routers), V), np.inf)
+        for k, node in enumerate(self.border_routers):
+            self.summary = np.minimum(
+                self.summary, backbone_dist[:, k, None] + self.intra[self.index[node]][None, :]
+            )
+
+    def distances(self) -> np.ndarray:
+        """Gets the cost of the route each router uses to every destination. inf if it has none."""
+        V = len(self.nodes)
+        routed = self.intra.copy()
+        border_rows = {node: k for k, node in enumerate(self.border_routers)}
+        for area, members in self.members.items():
+            rows = np.array([self.index[node] for node in members])
+            outside = np.array(
+                [self.index[node] for node in self.nodes if self.area_of[node] != area], dtype=np.intp
+            )
+            if not len(outside) or not self.border[area]:
+                continue
+            borders = [border_rows[node] for node in self.border[area]]
+            # Cost from each router of the area to each of its border routers
+            to_border = self.intra[np.ix_(rows, [self.index[node] for node in self.border[area]])]
+            summaries = self.summary[np.ix_(borders, outside)]
+
+            if not self.aggregate:
+                best = np.full((len(rows), len(outside)), np.inf)
+                for k in range(len(borders)):
+                    best = np.minimum(best, to_border[:, k, None] + summaries[k][None, :])
+            else:
+                # One summary per area, so every destination in an area goes through
+                # the border router with the cheapest summary of that area
+                best = np.full((len(rows), len(outside)), np.inf)
+                outside_areas = [self.area_of[self.nodes[d]] for d in outside]
+                for other in set(outside_areas):
+                    cols = np.array([c for c, a in enumerate(outside_areas) if a == other])
+                    reachable = summaries[:, cols]
+                    # Destinations a border router cannot reach are left out of its summary
+                    advertised = np.where(np.isfinite(reachable), reachable, -np.inf).max(axis=1)
+                    advertised[advertised == -np.inf] = np.inf
+                    choice = np.argmin(to_border + advertised[None, :], axis=1)
+                    best[:, cols] = to_border[np.arange(len(rows)), choice][:, None] + summaries[
+                        np.ix_(choice, cols)
+                    ]
+            routed[np.ix_(rows, outside)] = best
+        return routed
+
+    def state_sizes(self) -> np.ndarray:
+        """Gets the number of link-state entries each router holds: its area's links, the
+        summaries advertised into its area, and the backbone links for border routers."""
+        area_links = {area: g.number_of_edges() for area, g in self.area_graphs.items()}
+        V = len(self.nodes)
+        sizes = np.zeros(V, dtype=np.int64)
+        for area, members in self.members.items():
+            if self.aggregate:
+                summaries = len(self.border[area]) * (len(self.members) - 1)
+            else:
+                summaries = len(self.border[area]) * (V - len(members))
+            for node in members:
+                sizes[self.index[node]] = area_links[area] + summaries
+        for node in self.border_routers:
+            sizes[self.index[node]] += self.backbone.number_of_edges()
+        return sizes
+
+    def spf_seconds(self, routers: list[str]) -> float:
+        """Gets the mean time for each of routers to run SPF over what it holds."""
+        start = time.perf_counter()
+        for node in routers:
+            dijkstra(node, self.area_graphs[self.area_of[node]])
+            if self.backbone.has_node(node):
+                dijkstra(node, self.backbone)
+        return (time.perf_counter() - start) / max(len(routers), 1)
+
+
+def compare_with_flat(
+    graph: nx.Graph, areas: dict[str, Hashable], aggregate: bool = False, samples: int = 100
+) -> dict[str, float]:
+    """Measures area routing against flat link-state routing on graph.
+
+    Args:
+        aggregate (bool, optional): Flag for whether border routers advertise one summary per area rather than per destination. Defaults to False.
+        samples (int, optional): Number of routers whose SPF is timed. Defaults to 100.
+
+    Returns:
+        dict: The number of areas and border routers, per-router state and SPF time of both, path stretch, and pairs only reachable with flat routing.
+    """
+    routing = AreaRouting(graph, areas, aggregate)
+    nodes = routing.nodes
+    flat = _distance_matrix(graph, nodes, routing.index, len(nodes))
+    routed = routing.distances()
+
+    sample = nodes[:: max(1, len(nodes) // samples)][:samples]
+    start = time.perf_counter()
+    for node in sample:
+        dijkstra(node, graph)
+    flat_spf = (time.perf_counter() - start) / max(len(sample), 1)
+
+    # Stretch of every pair with a positive shortest distance that areas can still route
+    compared = np.isfinite(flat) & np.isfinite(routed) & (flat > 0)
+    stretch = routed[compared] / flat[compared]
+    state = routing.state_sizes()
+    return {
+        "areas": len(routing.members),
+        "border_routers": len(routing.border_routers),
+        "flat_state": graph.number_of_edges(),
+        "area_state_mean": float(state.mean()) if len(state) else 0.0,
+        "area_state_max": int(state.max(initial=0)),
+        "flat_spf_ms": flat_spf * 1000,
+        "area_spf_ms": routing.spf_seconds(sample) * 1000,
+        "stretch_mean": float(stretch.mean()) if stretch.size else 1.0,
+        "stretch_max": float(stretch.max(initial=1.0)),
+        "stretched_pairs": float((stretch > 1).mean()) if stretch.size else 0.0,
+        "lost_pairs": int(np.count_nonzero(np.isfinite(flat) & ~np.isfinite(routed))),
+    }
+
+
+def print_report(report: dict[str, float]) -> None:
+    print(f"{report['areas']} areas, {report['border_routers']} border routers")
+    print(
+        f"Link-state entries per router: flat {report['flat_state']}, "
+        f"areas {report['area_state_mean']:.1f} on average ({report['area_state_max']} max)"
+    )
+    print(
+        f"SPF time per router: flat {report['flat_spf_ms']:.3f} ms, areas {report['area_spf_ms']:.3f} ms"
+    )
+    print(
+        f"Path stretch: {report['stretch_mean']:.3f} on average, {report['stretch_max']:.3f} max, "
+        f"{report['stretched_pairs']:.1%} of routes longer than the shortest path"
+    )
+    if report["lost_pairs"]:
+        print(f"{report['lost_pairs']} routes are lost, since their area is split")
@@ -0,0 +1,637 @@
+"""Performance benchmarks for the routing code.
+
+Run every benchmark with `python benchmarks.py`, or a single one with
+`python benchmarks.py (name)`.
+"""
+import os
+import random
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+
+import networkx as nx
+
+from routing import dijkstra
+
+
+def random_weighted_graph(
+    num_nodes: int, num_edges: int, max_cost: int, seed: int = 0
+) -> nx.Graph:
+    """Builds a random graph with integer costs. Nodes are named by number since
+    the console's single letter names only allow 26 nodes."""
+    rng = random.Random(seed)
+    graph = nx.gnm_random_graph(num_nodes, num_edges, seed=seed)
+    graph = nx.relabel_nodes(graph, str)
+    for u, v in graph.edges:
+        graph[u][v]["weight"] = rng.randint(1, max_cost)
+    return graph
+
+
+def clustered_graph(
+    num_clusters: int, cluster_size: int, max_cost: int, seed: int = 0
+) -> nx.Graph:
+    """Builds a random graph of densely linked clusters with few links between them,
+    closer to how real networks are laid out than random_weighted_graph."""
+    rng = random.Random(seed)
+    graph = nx.random_partition_graph(
+        [cluster_size] * num_clusters, 6 / cluster_size, 0.4 / (num_clusters * cluster_size), seed=seed
+    )
+    graph = nx.relabel_nodes(graph, str)
+    for u, v in graph.edges:
+        graph[u][v]["weight"] = rng.randint(1, max_cost)
+    return graph
+
+
+def time_it(func: Callable[[], object], repeat: int = 3) -> float:
+    """Returns the best wall time in seconds of repeat calls to func."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def priority_queues(sizes: tuple[int, ...] = (1000, 10000, 50000)) -> None:
+    """Compares Dijkstra with the heapq queue against Dial's bucket queue."""
+    print("Dijkstra throughput by priority queue (edges relaxed per second):")
+    for num_nodes in sizes:
+        for max_cost in (10, 100):
+            graph = random_weighted_graph(num_nodes, num_nodes * 4, max_cost)
+            sources = random.Random(1).sample(list(graph.nodes), 5)
+            relaxations = 2 * graph.number_of_edges() * len(sources)
+            line = f"V={num_nodes:<6} E={graph.number_of_edges():<7} max cost={max_cost:<4}"
+            for queue in ("heap", "bucket"):
+                seconds = time_it(
+                    lambda: [dijkstra(source, graph, queue=queue) for source in sources]
+                )
+                line += f" {queue}: {relaxations / seconds / 1e6:6.2f}M/s"
+            print(line)
+
+
+def forwarding(num_nodes: int = 1000, num_packets: int = 2_000_000) -> None:
+    """Measures bulk FIB lookups by forwarding random packets hop by hop."""
+    import numpy as np
+
+    from forwarding import ForwardingTable
+
+    graph = random_weighted_graph(num_nodes, num_nodes * 3, 5)
+    start = time.perf_counter()
+    table = ForwardingTable(graph)
+    print(
+        f"Compiled FIBs for V={num_nodes} in {time.perf_counter() - start:.2f}s "
+        f"({table.hops.size} next hops, {table.offsets.nbytes + table.hops.nbytes} bytes)"
+    )
+
+    packets = np.random.default_rng(0).integers(0, num_nodes, size=(num_packets, 2))
+    start = time.perf_counter()
+    hops, lookups = table.forward(packets)
+    seconds = time.perf_counter() - start
+    print(
+        f"Forwarded {num_packets} packets ({hops[hops > 0].mean():.2f} hops on average) in {seconds:.2f}s: "
+        f"{lookups / seconds / 1e6:.1f}M lookups/s, {num_packets / seconds / 1e6:.2f}M packets/s"
+    )
+
+
+def lsdb_memory(sizes: tuple[int, ...] = (100, 300, 1000)) -> None:
+    """Compares the peak memory of converged dls state: a full graph per router
+    (how dls used to store it) against the shared link-state database."""
+    import tracemalloc
+
+    from lsdb import LinkStateDatabase
+
+    print("Peak memory of converged dls state:")
+    for num_nodes in sizes:
+        graph = random_weighted_graph(num_nodes, num_nodes * 3, 10)
+
+        tracemalloc.start()
+        per_router = {node: nx.Graph(graph) for node in graph.nodes}
+        before = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del per_router
+
+        tracemalloc.start()
+        lsdb = LinkStateDatabase()
+        lsdb.sync(graph)
+        known = None
+        while known != lsdb.known:
+            known = dict(lsdb.known)
+            lsdb.flood(graph.nodes)
+        lsdb.view(next(iter(graph.nodes)))
+        after = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(
+            f"V={num_nodes:<5} E={graph.number_of_edges():<5} graph per router: {before / 2**20:8.2f} MiB"
+            f"  shared database: {after / 2**20:6.2f} MiB"
+        )
+
+
+def dv_memory(sizes: tuple[int, ...] = (100, 300, 1000)) -> None:
+    """Compares the memory of converged distance vectors stored as nested dicts
+    (how dv used to store them) against the dense DistanceVectorTable."""
+    import tracemalloc
+
+    from dv_table import DistanceVectorTable
+
+    print("Memory of converged distance vectors:")
+    for num_nodes in sizes:
+        graph = random_weighted_graph(num_nodes, num_nodes * 3, 10)
+        distances = {
+            source: {node: distance for distance, node, _ in dijkstra(source, graph)}
+            for source in graph.nodes
+        }
+
+        tracemalloc.start()
+        nested = {source: dict(row) for source, row in distances.items()}
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        entries = sum(len(row) for row in nested.values())
+        del nested
+
+        table = DistanceVectorTable()
+        for node in graph.nodes:
+            table.add_node(node)
+        for source, row in distances.items():
+            for node, distance in row.items():
+                table.dist[table.index[source], table.index[node]] = distance
+        after = table.nbytes()
+
+        print(
+            f"V={num_nodes:<5} nested dicts: {before / entries:6.1f} bytes/entry"
+            f"  table: {after / num_nodes**2:4.1f} bytes/entry ({table.dist.itemsize} distance + {table.next_hop.itemsize} next hop)"
+        )
+
+
+# Modules that must only be imported by the commands that need them
+LAZY_MODULES = ("matplotlib", "pandas", "seaborn", "tqdm")
+
+
+def startup(repeat: int = 10) -> None:
+    """Times starting the console and importing experiment_runner in a fresh
+    interpreter. Exits with an error if a lazily loaded module gets imported."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    for module in ("main", "experiment_runner"):
+        code = (
+            "import sys, time; start = time.perf_counter(); "
+            f"import {module}; elapsed = time.perf_counter() - start; "
+            f"print(elapsed, *[m for m in {LAZY_MODULES!r} if m in sys.modules])"
+        )
+        times = []
+        for _ in range(repeat):
+            output = subprocess.run(
+                [sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True
+            ).stdout.split()
+            times.append(float(output[0]))
+            loaded = output[1:]
+            if loaded:
+                print(f"import {module} loaded {', '.join(loaded)}, which should only load when needed.")
+                sys.exit(1)
+        times.sort()
+        print(
+            f"import {module}: {times[0] * 1000:.0f} ms best, {times[len(times) // 2] * 1000:.0f} ms median"
+        )
+
+
+def dynamic_betweenness(num_nodes: int = 300, num_changes: int = 20) -> None:
+    """Compares updating betweenness after single edge changes against recomputing it."""
+    from centrality import DynamicBetweenness, brandes_centrality
+    from graph_manager import GraphManager
+
+    rng = random.Random(2)
+    for workload in ("new links", "cost changes"):
+        manager = GraphManager()
+        manager.temp_mute()
+        manager.graph = random_weighted_graph(num_nodes, num_nodes * 2, 20)
+        dynamic = DynamicBetweenness(manager)
+        dynamic.scores()
+
+        incremental = full = 0.0
+        recomputed = 0
+        for _ in range(num_changes):
+            if workload == "new links":
+                node1, node2 = rng.sample(list(manager.graph.nodes), 2)
+            else:
+                node1, node2 = rng.choice(list(manager.graph.edges))
+            manager.add_edge(node1, node2, rng.randint(1, 20))
+            start = time.perf_counter()
+            dynamic.scores()
+            incremental += time.perf_counter() - start
+            recomputed += dynamic.last_recomputed
+            start = time.perf_counter()
+            brandes_centrality(manager)
+            full += time.perf_counter() - start
+
+        print(
+            f"V={num_nodes} E={manager.graph.number_of_edges()}, {num_changes} {workload}: "
+            f"incremental {incremental / num_changes * 1000:.0f} ms, full {full / num_changes * 1000:.0f} ms per update "
+            f"({recomputed / num_changes:.0f} of {num_nodes} sources recomputed on average)"
+        )
+
+
+def server(num_nodes: int = 26, num_requests: int = 20000) -> None:
+    """Load tests the routing query server over a Unix socket, with and without edits."""
+    import asyncio
+    import string
+    import tempfile
+
+    from graph_manager import GraphManager
+    from server import load_test, print_load_test, start_server
+
+    for write_ratio in (0.0, 0.01):
+        manager = GraphManager()
+        # Edits follow the console's rules, so nodes are named by letter
+        manager.graph = nx.relabel_nodes(
+            random_weighted_graph(num_nodes, num_nodes * 3, 20), lambda node: string.ascii_uppercase[int(node)]
+        )
+
+        async def run() -> dict[str, float]:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "routing.sock")
+                async with await start_server(manager, unix_path=path):
+                    return await load_test(
+                        num_requests, connections=16, write_ratio=write_ratio, unix_path=path
+                    )
+
+        print(f"V={num_nodes} E={manager.graph.number_of_edges()}, {write_ratio:.0%} edits: ", end="")
+        print_load_test(asyncio.run(run()))
+
+
+def shared_pool(num_nodes: int = 600) -> None:
+    """Compares all-sources metrics and betweenness in this process against the shared-memory worker pool."""
+    from centrality import brandes_centrality
+    from graph_manager import GraphManager
+    from metrics import graph_metrics
+    from shared_pool import SharedPool
+
+    manager = GraphManager()
+    manager.graph = random_weighted_graph(num_nodes, num_nodes * 3, 20)
+    pool = SharedPool()
+    try:
+        pool.metrics(manager)  # Starts the workers and shares the graph
+        for name, serial, parallel in (
+            ("metrics", lambda: graph_metrics(manager.graph), lambda: pool.metrics(manager)),
+            ("betweenness", lambda: brandes_centrality(manager), lambda: pool.betweenness(manager)),
+        ):
+            print(
+                f"V={num_nodes} {name}: {time_it(serial, repeat=1) * 1000:.0f} ms in process, "
+                f"{time_it(parallel, repeat=1) * 1000:.0f} ms on {pool.processes} workers"
+            )
+    finally:
+        pool.close()
+
+
+def areas(num_clusters: int = 10, cluster_size: int = 100) -> None:
+    """Compares OSPF-style area routing against flat link-state routing on a clustered topology."""
+    from areas import compare_with_flat, partition_areas, print_report
+
+    graph = clustered_graph(num_clusters, cluster_size, 20)
+    assignment = partition_areas(graph)
+    for aggregate in (False, True):
+        print(
+            f"V={graph.number_of_nodes()} E={graph.number_of_edges()}, "
+            f"{'one summary per area' if aggregate else 'one summary per destination'}:"
+        )
+        print_report(compare_with_flat(graph, assignment, aggregate))
+
+
+def contraction(side: int = 100, num_queries: int = 200) -> None:
+    """Measures contraction hierarchies preprocessing, index size and query time on a road-like grid."""
+    from contraction import ContractionHierarchy
+    from routing import shortest_route
+
+    rng = random.Random(3)
+    graph = nx.relabel_nodes(nx.grid_2d_graph(side, side), lambda xy: f"{xy[0]},{xy[1]}")
+    for u, v in graph.edges:
+        graph[u][v]["weight"] = rng.randint(1, 20)
+    nodes = list(graph.nodes)
+    queries = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(num_queries)]
+
+    index = ContractionHierarchy(graph)
+    print(
+        f"V={graph.number_of_nodes()} E={graph.number_of_edges()}: built in {index.build_seconds:.1f} s, "
+        f"{index.shortcuts} shortcuts, {index.index_edges()} upward edges"
+    )
+    for name, query in (
+        ("Dijkstra", lambda s, t: dijkstra(s, graph)),
+        ("bidirectional", lambda s, t: shortest_route(s, t, graph)),
+        ("contraction hierarchy", index.route),
+    ):
+        seconds = time_it(lambda: [query(s, t) for s, t in queries], repeat=1)
+        print(f"{name}: {seconds / num_queries * 1000:.3f} ms per query")
+
+
+def landmarks(side: int = 100, num_queries: int = 200) -> None:
+    """Measures landmark bound quality and lookup time, and A* with landmark potentials against bidirectional Dijkstra."""
+    from landmarks import LandmarkOracle
+    from routing import shortest_route
+
+    rng = random.Random(3)
+    graph = nx.relabel_nodes(nx.grid_2d_graph(side, side), lambda xy: f"{xy[0]},{xy[1]}")
+    for u, v in graph.edges:
+        graph[u][v]["weight"] = rng.randint(1, 20)
+    nodes = list(graph.nodes)
+    queries = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(num_queries)]
+
+    start = time.perf_counter()
+    oracle = LandmarkOracle(graph)
+    build = time.perf_counter() - start
+    seconds = time_it(lambda: [oracle.bounds(s, t) for s, t in queries])
+    print(
+        f"V={graph.number_of_nodes()} E={graph.number_of_edges()}: {len(oracle.landmarks)} landmarks "
+        f"built in {build:.2f} s, {seconds / num_queries * 1e6:.1f} us per bound lookup"
+    )
+
+    lower_ratio = []
+    upper_ratio = []
+    settled = {"bidirectional": 0, "A* with landmarks": 0}
+    for s, t in queries:
+        cost, _, count = shortest_route(s, t, graph)
+        settled["bidirectional"] += count
+        settled["A* with landmarks"] += shortest_route(s, t, graph, oracle.potentials(t))[2]
+        if cost > 0:
+            lower, upper = oracle.bounds(s, t)
+            lower_ratio.append(lower / cost)
+            upper_ratio.append(upper / cost)
+    print(
+        f"Bounds: lower {sum(lower_ratio) / len(lower_ratio):.3f}, "
+        f"upper {sum(upper_ratio) / len(upper_ratio):.3f} of the shortest path cost on average"
+    )
+    for name, total in settled.items():
+        print(f"{name}: {total / num_queries:.0f} nodes settled per query")
+
+
+def follow(num_nodes: int = 26, num_bursts: int = 20, burst_size: int = 50) -> None:
+    """Streams bursts of link flaps through a pipe, applied one at a time and coalesced in windows."""
+    import string
+    import threading
+
+    from follow import StreamFollower, print_report
+    from graph_manager import GraphManager
+
+    # Streams follow the console's rules, so nodes are named by letter
+    graph = nx.relabel_nodes(
+        random_weighted_graph(num_nodes, num_nodes * 3, 20), lambda node: string.ascii_uppercase[int(node)]
+    )
+    rng = random.Random(4)
+    edges = list(graph.edges)
+    bursts = []
+    for _ in range(num_bursts):
+        # A few flapping links make up each burst
+        links = rng.sample(edges, 10)
+        bursts.append(
+            "".join(f"{u} {v} {rng.randint(1, 20)}\n" for u, v in rng.choices(links, k=burst_size))
+        )
+
+    def write(file) -> None:
+        with file:
+            for burst in bursts:
+                file.write(burst)
+                file.flush()
+                time.sleep(0.02)
+
+    for window_ms in (0, 20):
+        manager = GraphManager()
+        manager.graph = graph.copy()
+        manager.temp_mute()
+        follower = StreamFollower(manager, window_ms, subscribed=("A", "B", "C", "D"))
+        read_end, write_end = os.pipe()
+        writer = threading.Thread(target=write, args=(os.fdopen(write_end, "w"),))
+        writer.start()
+        with os.fdopen(read_end, "r") as file:
+            follower.follow(file, tail=False)
+        writer.join()
+        print(f"V={num_nodes}, {window_ms} ms window, 4 subscribed tables:")
+        print_report(follower.report())
+
+
+def workload(num_nodes: int = 100, num_ops: int = 2000) -> None:
+    """Replays a trace of link flaps mixed with routing queries and reports the latency of each operation type."""
+    from graph_manager import GraphManager
+    from workload import generate_trace, print_report, replay, summarize
+
+    graph = random_weighted_graph(num_nodes, num_nodes * 3, 20)
+    trace = generate_trace(graph, num_ops)
+    manager = GraphManager()
+    manager.graph = graph
+    print(f"V={num_nodes} E={graph.number_of_edges()}, {num_ops} operations:")
+    print_report(summarize(*replay(manager, trace)))
+
+
+def distance_store(num_nodes: int = 1000, block_size: int = 64) -> None:
+    """Measures building all-pairs distances on disk a block at a time, and streaming the stats metrics from them."""
+    import tempfile
+    import tracemalloc
+
+    from distance_store import DistanceStore, store_metrics
+    from metrics import graph_metrics
+
+    graph = random_weighted_graph(num_nodes, num_nodes * 3, 20)
+    with tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        start = time.perf_counter()
+        store = DistanceStore(directory, graph, next_hops=True, block_size=block_size)
+        store.build()
+        build = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(
+            f"V={num_nodes} E={graph.number_of_edges()}: built in {build:.1f} s, {size / 2**20:.1f} MiB on disk, "
+            f"{peak / 2**20:.1f} MiB peak in memory ({num_nodes**2 * 8 / 2**20:.1f} MiB for a dense float64 matrix)"
+        )
+        print(f"stats streamed from disk: {time_it(lambda: store_metrics(store)):.3f} s")
+        print(f"stats recomputed with Dijkstra: {time_it(lambda: graph_metrics(graph), repeat=1):.3f} s")
+
+
+def result_cache(num_graphs: int = 100) -> None:
+    """Compares evaluating the experiment runner's random graphs with an empty result cache and a warm one."""
+    import tempfile
+
+    from experiment_runner import evaluate_random_graph
+    from result_cache import ResultCache
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(os.path.join(directory, "cache.sqlite"))
+        for name in ("empty cache", "warm cache"):
+            seconds = time_it(lambda: [evaluate_random_graph(i, 0, cache=cache) for i in range(num_graphs)], repeat=1)
+            print(f"{name}: {seconds / num_graphs * 1000:.2f} ms per graph")
+        cache.print_report()
+        cache.close()
+
+
+def alternates(num_nodes: int = 300, num_queries: int = 20, k: int = 10) -> None:
+    """Times k shortest paths against networkx, and loop-free alternates of every router from the
+    compiled all-pairs distances against running Dijkstra from every neighbor."""
+    from alternates import KShortestPaths, lfa_coverage
+    from forwarding import ForwardingTable
+
+    graph = random_weighted_graph(num_nodes, num_nodes * 3, 20)
+    rng = random.Random(5)
+    queries = [tuple(rng.sample(list(graph.nodes), 2)) for _ in range(num_queries)]
+
+    def yen() -> None:
+        for s, t in queries:
+            KShortestPaths(graph, s, t).get(k)
+
+    def simple_paths() -> None:
+        for s, t in queries:
+            for _, _ in zip(range(k), nx.shortest_simple_paths(graph, s, t, weight="weight")):
+                pass
+
+    found = sum(len(KShortestPaths(graph, s, t).get(k)) for s, t in queries)
+    print(f"V={num_nodes} E={graph.number_of_edges()}, {k} shortest paths for {num_queries} pairs ({found} paths):")
+    print(f"Yen with tree potentials and spur reuse: {time_it(yen, repeat=1) / num_queries * 1000:.1f} ms per pair")
+    print(f"networkx shortest_simple_paths: {time_it(simple_paths, repeat=1) / num_queries * 1000:.1f} ms per pair")
+
+    def per_neighbor() -> int:
+        covered = 0
+        for router in graph.nodes:
+            own = {node: distance for distance, node, _ in dijkstra(router, graph)}
+            neighbors = {n: {node: d for d, node, _ in dijkstra(n, graph)} for n in graph.adj[router]}
+            for destination, distance in own.items():
+                # Loop-free, and not a primary next hop
+                covered += any(
+                    destination in dist
+                    and dist[destination] < dist[router] + distance
+                    and dist[destination] + graph[router][n]["weight"] > distance
+                    for n, dist in neighbors.items()
+                )
+        return covered
+
+    start = time.perf_counter()
+    table = ForwardingTable(graph)
+    pairs, covered, _ = lfa_coverage(table, graph)
+    seconds = time.perf_counter() - start
+    print(f"Loop-free alternates of every router: {seconds:.2f} s from one all-pairs pass ({covered} of {pairs} routes covered)")
+    print(f"Dijkstra from every neighbor of every router: {time_it(per_neighbor, repeat=1):.2f} s")
+
+
+def batch_edits(num_nodes: int = 200, num_edits: int = 20) -> None:
+    """Compares applying a burst of edge edits one at a time against one batch, with the
+    forwarding table and dynamic betweenness brought up to date after every topology change."""
+    from centrality import DynamicBetweenness
+    from forwarding import compiled_table
+    from graph_manager import GraphManager
+
+    rng = random.Random(6)
+    graph = random_weighted_graph(num_nodes, num_nodes * 2, 20)
+    # Each link is edited twice on average, like a link that flaps
+    links = rng.sample(list(graph.edges), num_edits // 2)
+    edits = [(*rng.choice(links), rng.randint(1, 20)) for _ in range(num_edits)]
+
+    for name in ("one at a time", "batch"):
+        manager = GraphManager()
+        manager.temp_mute()
+        manager.graph = graph.copy()
+        dynamic = DynamicBetweenness(manager)
+        dynamic.scores()
+        compiled_table(manager)
+
+        start = time.perf_counter()
+        if name == "batch":
+            with manager.batch():
+                for node1, node2, cost in edits:
+                    manager.add_edge(node1, node2, cost)
+            compiled_table(manager)
+            dynamic.scores()
+        else:
+            for node1, node2, cost in edits:
+                manager.add_edge(node1, node2, cost)
+                compiled_table(manager)
+                dynamic.scores()
+        seconds = time.perf_counter() - start
+        print(
+            f"V={num_nodes}, {num_edits} edits {name}: {seconds:.2f} s, "
+            f"{manager.version} topology change{'s' if manager.version != 1 else ''}, "
+            f"{manager.head.depth} edit{'s' if manager.head.depth != 1 else ''} to undo"  # type: ignore
+        )
+
+
+def dv_schedules(num_nodes: int = 200) -> None:
+    """Compares the rounds, relaxations and time distance vector routing takes to converge under each schedule."""
+    from routing import DV_SCHEDULES, compare_dv_schedules
+
+    rng = random.Random(7)
+    side = int(num_nodes**0.5)
+    grid = nx.relabel_nodes(nx.grid_2d_graph(side, side), lambda xy: f"{xy[0]},{xy[1]}")
+    for u, v in grid.edges:
+        grid[u][v]["weight"] = rng.randint(1, 20)
+    topologies = {
+        "random": random_weighted_graph(num_nodes, num_nodes * 3, 20),
+        "sparse random": random_weighted_graph(num_nodes, num_nodes * 13 // 10, 20),
+        "clustered": clustered_graph(8, num_nodes // 8, 20),
+        "grid": grid,
+    }
+    for name, graph in topologies.items():
+        source = next(iter(graph.nodes))
+        print(f"{name} V={graph.number_of_nodes()} E={graph.number_of_edges()}:")
+        for schedule in DV_SCHEDULES:
+            start = time.perf_counter()
+            row = compare_dv_schedules(graph, source, (schedule,))[schedule]
+            seconds = time.perf_counter() - start
+            print(
+                f"  {schedule:<11}{row['rounds']:>3} rounds, {row['relaxations']} relaxations, "
+                f"{row['updates']} entry updates, {seconds:.2f} s"
+            )
+
+
+def reliability(num_nodes: int = 200, num_samples: int = 20000, loop_samples: int = 200) -> None:
+    """Compares estimating pairwise reachability under random link failures with batched union-find
+    against removing the failed links from a copy of the graph and finding its components, one sample at a time."""
+    import numpy as np
+
+    from resilience import sample_reachability
+
+    graph = random_weighted_graph(num_nodes, num_nodes * 3, 20)
+    failure = 0.1
+    start = time.perf_counter()
+    sample_reachability(graph, failure, num_samples)
+    batched = (time.perf_counter() - start) / num_samples
+
+    rng = random.Random(8)
+    index = {node: i for i, node in enumerate(graph.nodes)}
+
+    def one_at_a_time() -> None:
+        connected = np.zeros((num_nodes, num_nodes), dtype=np.int64)
+        for _ in range(loop_samples):
+            sample = graph.copy()
+            sample.remove_edges_from([edge for edge in graph.edges if rng.random() < failure])
+            for component in nx.connected_components(sample):
+                members = [index[node] for node in component]
+                connected[np.ix_(members, members)] += 1
+
+    looped = time_it(one_at_a_time, repeat=1) / loop_samples
+    print(f"V={num_nodes} E={graph.number_of_edges()}, links failing with probability {failure}:")
+    print(f"Batched union-find: {batched * 1e6:.0f} us per sample ({num_samples} samples)")
+    print(f"One graph copy per sample: {looped * 1e6:.0f} us per sample ({loop_samples} samples)")
+
+
+benchmarks: dict[str, Callable[[], None]] = {
+    "priority_queues": priority_queues,
+    "forwarding": forwarding,
+    "lsdb_memory": lsdb_memory,
+    "dv_memory": dv_memory,
+    "startup": startup,
+    "dynamic_betweenness": dynamic_betweenness,
+    "server": server,
+    "shared_pool": shared_pool,
+    "areas": areas,
+    "contraction": contraction,
+    "landmarks": landmarks,
+    "follow": follow,
+    "workload": workload,
+    "distance_store": distance_store,
+    "result_cache": result_cache,
+    "alternates": alternates,
+    "batch_edits": batch_edits,
+    "dv_schedules": dv_schedules,
+    "reliability": reliability,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(benchmarks)
+    for name in names:
+        print(f"\n-----{name}-----")
+        benchmarks[name]()
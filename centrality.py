@@ -1,3 +1,6 @@
+import numpy as np
+import networkx as nx
+
 from routing import dijkstra
 from graph_manager import GraphManager
 
@@ -13,48 +16,133 @@ def brandes_centrality(graph_manager: GraphManager) -> dict[str, float]:
     CB: dict[str, float] = dict.fromkeys(V, 0.0)  # The betweenness
 
     for s in V:
-        S = []  # Empty stack
-        P = {w: [] for w in V}  # Predecessors
-        sigma: dict[str, float] = dict.fromkeys(V, 0.0)  # Number of shortest paths
-        sigma[s] = 1
-
-        dist: dict[str, int] = dict.fromkeys(V, -1)  # d[t]
-        dist[s] = 0
-
-        # Since Dijkstra is already implemented in this project, I'm not going to reimplement it
-        dijkstra_results = dijkstra(s, graph)
-
-        # Build dist and predecessors
-        # Not as efficient as if Dijkstra was built for this task (like in algorithm in paper)
-        # But will give the same result
-        for distance, node, via in dijkstra_results:
-            dist[node] = distance  # type: ignore
-            if via and via != "-":
-                P[node].append(via)
-
-        # Sort vertices in order of non-increasing distance from s
-        sorted_nodes = sorted([v for v in V if dist[v] >= 0], key=lambda v: dist[v])
-
-        for v in sorted_nodes:
-            S.append(v)
-            for w in graph.neighbors(v):
-                weight = graph[v][w]["weight"]
-                # // shortest path to w via v?
-                if dist[w] == dist[v] + weight:
-                    # Note that weight here is a 1 on the algorithm since they are using an unweighted version
-                    sigma[w] = sigma[w] + sigma[v]
-                    P[w].append(v)
-
-        delta: dict[str, float] = dict.fromkeys(V, 0)
-        while S:
-            w = S.pop()
-            for v in P[w]:
-                delta[v] = delta[v] + (sigma[v] / sigma[w]) * (1 + delta[w])
-                if w != s:
-                    CB[w] = CB[w] + delta[w]
+        for w, dependency in source_dependencies(graph, V, s)[1].items():
+            CB[w] = CB[w] + dependency
 
     # the centrality scores need to be divided by two if the graph is undirected, since all shortest paths are considered twice.
     if not graph.is_directed():
         for v in CB:
             CB[v] = CB[v] / 2
     return CB
+
+
+def source_dependencies(
+    graph: nx.Graph, V: list[str], s: str
+) -> tuple[dict[str, int], dict[str, float]]:
+    """Runs the part of Brandes' algorithm for a single source s.
+
+    Returns:
+        tuple: (distances from s, the amount s adds to the betweenness of each node)
+    """
+    S = []  # Empty stack
+    P = {w: [] for w in V}  # Predecessors
+    sigma: dict[str, float] = dict.fromkeys(V, 0.0)  # Number of shortest paths
+    sigma[s] = 1
+
+    dist: dict[str, int] = dict.fromkeys(V, -1)  # d[t]
+    dist[s] = 0
+
+    # Since Dijkstra is already implemented in this project, I'm not going to reimplement it
+    dijkstra_results = dijkstra(s, graph)
+
+    # Build dist and predecessors
+    # Not as efficient as if Dijkstra was built for this task (like in algorithm in paper)
+    # But will give the same result
+    for distance, node, via in dijkstra_results:
+        dist[node] = distance  # type: ignore
+        if via and via != "-":
+            P[node].append(via)
+
+    # Sort vertices in order of non-increasing distance from s
+    sorted_nodes = sorted([v for v in V if dist[v] >= 0], key=lambda v: dist[v])
+
+    for v in sorted_nodes:
+        S.append(v)
+        for w in graph.neighbors(v):
+            weight = graph[v][w]["weight"]
+            # // shortest path to w via v?
+            if dist[w] == dist[v] + weight:
+                # Note that weight here is a 1 on the algorithm since they are using an unweighted version
+                sigma[w] = sigma[w] + sigma[v]
+                P[w].append(v)
+
+    CB: dict[str, float] = {}
+    delta: dict[str, float] = dict.fromkeys(V, 0)
+    while S:
+        w = S.pop()
+        for v in P[w]:
+            delta[v] = delta[v] + (sigma[v] / sigma[w]) * (1 + delta[w])
+            if w != s:
+                CB[w] = CB.get(w, 0.0) + delta[w]
+    return dist, CB
+
+
+class DynamicBetweenness:
+    """Betweenness centrality that is kept up to date as edges change.
+
+    Keeps the distances and dependencies of every source. When an edge changes,
+    only the sources whose shortest path DAG it can touch are recomputed, in the
+    style of Lee et al. (QUBE) and Green, McColl and Bader. A source is affected
+    if the edge was on one of its shortest paths, or now is or creates a shorter one.
+    """
+
+    def __init__(self, graph_manager: GraphManager):
+        self.graph_manager = graph_manager
+        self.V: list[str] = []
+        self.index: dict[str, int] = {}
+        self.dist: list[dict[str, int]] = []
+        self.dependencies = np.zeros((0, 0))
+        self.dirty: set[int] = set()
+        self.last_recomputed = 0
+        self.rebuild()
+        graph_manager.listeners.append(self.on_edges_change)
+
+    def rebuild(self) -> None:
+        graph = self.graph_manager.graph
+        self.V = list(graph.nodes)
+        self.index = {node: i for i, node in enumerate(self.V)}
+        self.dist = [{} for _ in self.V]
+        self.dependencies = np.zeros((len(self.V), len(self.V)))
+        self.dirty = set(range(len(self.V)))
+
+    def on_edges_change(self, changes: list[tuple[str, str, int | None, int | None]]) -> None:
+        # The distances are from before all of the changes. A batch that makes a path shorter
+        # makes its first changed edge shorter than the old distance across it, so checking
+        # each edge on its own still finds every affected source.
+        for i, dist in enumerate(self.dist):
+            if i in self.dirty:
+                continue
+            for node1, node2, old, new in changes:
+                d1 = dist.get(node1, -1)
+                d2 = dist.get(node2, -1)
+                if d1 < 0 and d2 < 0:
+                    continue  # Neither end is reachable from this source
+                if old is not None and (d1 >= 0 and d2 == d1 + old or d2 >= 0 and d1 == d2 + old):
+                    self.dirty.add(i)  # The edge was on a shortest path
+                    break
+                if new is not None and (
+                    d2 < 0 or d1 < 0 or d1 + new <= d2 or d2 + new <= d1
+                ):
+                    self.dirty.add(i)  # The edge is now on a shortest path
+                    break
+
+    def scores(self) -> dict[str, float]:
+        """Gets the betweenness of every node, recomputing the affected sources."""
+        graph = self.graph_manager.graph
+        if list(graph.nodes) != self.V:
+            self.rebuild()  # Nodes were added or removed, so every index changes
+
+        self.last_recomputed = len(self.dirty)
+        for i in self.dirty:
+            dist, dependencies = source_dependencies(graph, self.V, self.V[i])
+            self.dist[i] = {node: d for node, d in dist.items() if d >= 0}
+            row = self.dependencies[i]
+            row[:] = 0
+            for node, dependency in dependencies.items():
+                row[self.index[node]] = dependency
+        self.dirty.clear()
+
+        totals = self.dependencies.sum(axis=0)
+        if not graph.is_directed():
+            totals /= 2
+        return {node: float(totals[i]) for i, node in enumerate(self.V)}
@@ -1,18 +1,29 @@
 import os
 import re
+import time
 from collections.abc import Callable
 from functools import update_wrapper
 from typing import Any
 
+from dv_table import DistanceVectorTable
 from graph_manager import GraphManager
+from lsdb import LinkStateDatabase
+from metrics import graph_metrics
 from routing import (
+    DV_SCHEDULES,
+    PROTOCOL_COSTS,
     DistanceVectorRouting,
     DistributredLinkStateRouting,
     LinkStateRouting,
     RoutingAlgorithm,
-    average_shortest_path,
+    compare_dv_schedules,
+    dijkstra,
+    shortest_route,
+    target_potentials,
 )
 
+GRAPH_INPUT_REGEX = r"([A-Z]{1})\s([A-Z]{1})\s([\d]+|-)"
+
 
 class Command:
     def __init__(
@@ -36,9 +47,9 @@ class Command:
         )
 
     def __call__(self, graph_manager=None, *args: Any, **kwargs: Any) -> Any:
-        func_param_names = self.func.__code__.co_varnames[
-            : self.func.__code__.co_argcount
-        ]
+        # Flags can also be keyword-only, for commands that take any number of arguments
+        code = self.func.__code__
+        func_param_names = code.co_varnames[: code.co_argcount + code.co_kwonlyargcount]
 
         expected_kwargs = {k: v for k, v in kwargs.items() if k in func_param_names}
         if self.needs_graph_manager:
@@ -211,7 +222,7 @@ def tree_cmd(graph_manager: GraphManager, root: str = "") -> bool:
 )
 def ls_cmd(graph_manager: GraphManager, node: str = "", i=False, r=False) -> bool:
     if r:
-        graph_manager.ls_state.clear()
+        graph_manager.ls_state = {}
         graph_manager.runs["ls"] = 0
         print("Reset Dijkstra states.")
 
@@ -229,13 +240,31 @@ def ls_cmd(graph_manager: GraphManager, node: str = "", i=False, r=False) -> boo
 
 @add_command(
     "dv",
-    usage="dv (node) [-i] [-r]",
+    usage="dv (node) [schedule] [-i] [-r] [-c]",
     description="Calculates and prints routing table using distance-vector routing algorithm. Output is read destination <- from (cost).",
-    flags={"i": "Runs iteratively.", "r": "Resets the distance vectors"},
+    flags={
+        "i": "Runs iteratively.",
+        "r": "Resets the distance vectors",
+        "c": "Compares the rounds and relaxations of every schedule from scratch, without changing the distance vectors.",
+    },
 )
-def dv_cmd(graph_manager: GraphManager, node: str = "", i=False, r=False) -> bool:
+def dv_cmd(graph_manager: GraphManager, node: str = "", schedule: str = "sequential", i=False, r=False, c=False) -> bool:
+    if schedule not in DV_SCHEDULES:
+        print(f"Unknown schedule '{schedule}'. Choose from {', '.join(DV_SCHEDULES)}.")
+        return False
+
+    if c:
+        if node not in graph_manager.graph:
+            print("Usage: ", commands["dv"].usage)
+            return False
+        print(f"{'schedule':<12}{'rounds':>8}{'relaxations':>14}{'updates':>10}")
+        for name, row in compare_dv_schedules(graph_manager.graph, node).items():
+            rounds = f"{row['rounds']}" if row["converged"] else f">{row['rounds']}"
+            print(f"{name:<12}{rounds:>8}{row['relaxations']:>14}{row['updates']:>10}")
+        return False
+
     if r:
-        graph_manager.dvs = {}
+        graph_manager.dvs = DistanceVectorTable()
         graph_manager.runs["dv"] = 0
         print("Reset distance vectors.")
 
@@ -248,7 +277,7 @@ def dv_cmd(graph_manager: GraphManager, node: str = "", i=False, r=False) -> boo
         print("Usage: ", commands["dv"].usage)
         return False
 
-    distance_vector_routing_alg = DistanceVectorRouting(graph_manager)
+    distance_vector_routing_alg = DistanceVectorRouting(graph_manager, schedule)
     graph_manager.runs["dv"] += distance_vector_routing_alg.run(node, iterative=i)
     return False
 
@@ -261,9 +290,9 @@ def dv_cmd(graph_manager: GraphManager, node: str = "", i=False, r=False) -> boo
 )
 def dls_cmd(graph_manager: GraphManager, node: str = "", i=False, r=False) -> bool:
     if r:
-        graph_manager.graphs = {}
+        graph_manager.lsdb = LinkStateDatabase()
         graph_manager.runs["dls"] = 0
-        print("Reset dls graphs.")
+        print("Reset dls link-state database.")
 
         # Allow use of dls -r without a node
         if node == "":
@@ -281,6 +310,183 @@ def dls_cmd(graph_manager: GraphManager, node: str = "", i=False, r=False) -> bo
     return False
 
 
+@add_command(
+    "route",
+    usage="route (source) (destination) [-a] [-c] [-l]",
+    description="Finds the shortest path between two nodes using bidirectional Dijkstra, stopping as soon as the path is known.",
+    flags={
+        "a": "Uses A* with precomputed potentials towards the destination.",
+        "c": "Uses a contraction hierarchies index, built once until the graph changes.",
+        "l": "Uses A* with landmark lower bounds as potentials, which work towards any destination.",
+    },
+)
+def route_cmd(
+    graph_manager: GraphManager,
+    source: str = "",
+    destination: str = "",
+    a=False,
+    c=False,
+    l=False,
+) -> bool:
+    if source == "" or destination == "":
+        print("Usage: ", commands["route"].usage)
+        return False
+
+    graph = graph_manager.graph
+    for node in (source, destination):
+        if node not in graph.nodes:
+            print(f"Node {node} not found in graph.")
+            return False
+
+    if c:
+        from contraction import contraction_index
+
+        built = graph_manager.contraction
+        index = contraction_index(graph_manager)
+        if index is not built:
+            print(
+                f"Built contraction hierarchy in {index.build_seconds * 1000:.1f} ms with {index.shortcuts} shortcut{'s' if index.shortcuts != 1 else ''}."
+            )
+        cost, path, settled = index.route(source, destination)
+        method = "contraction hierarchy"
+    elif l:
+        from landmarks import landmark_oracle
+
+        potentials = landmark_oracle(graph_manager).potentials(destination)
+        cost, path, settled = shortest_route(source, destination, graph, potentials)
+        method = "A* with landmarks"
+    else:
+        potentials = target_potentials(graph_manager, destination) if a else None
+        cost, path, settled = shortest_route(source, destination, graph, potentials)
+        method = "A*" if a else "bidirectional"
+    if not path:
+        print(f"No path from {source} to {destination}.")
+    else:
+        print(f"{' -> '.join(path)} ({cost})")
+
+    full_settled = len(dijkstra(source, graph))
+    print(
+        f"Settled {settled} node{'s' if settled != 1 else ''} ({method}) vs {full_settled} for full Dijkstra."
+    )
+    return False
+
+
+@add_command(
+    "kpaths",
+    usage="kpaths (source) (destination) [k]",
+    description="Lists the k shortest loopless paths between two nodes, cheapest first (3 by default).",
+)
+def kpaths_cmd(graph_manager: GraphManager, source: str = "", destination: str = "", k: str = "3") -> bool:
+    if source == "" or destination == "" or not k.isdigit():
+        print("Usage: ", commands["kpaths"].usage)
+        return False
+
+    for node in (source, destination):
+        if node not in graph_manager.graph.nodes:
+            print(f"Node {node} not found in graph.")
+            return False
+
+    from alternates import k_shortest_paths
+
+    paths, search = k_shortest_paths(graph_manager, source, destination, int(k))
+    if not paths:
+        print(f"No path from {source} to {destination}.")
+        return False
+    for rank, (cost, path) in enumerate(paths, start=1):
+        print(f"{rank}. {' -> '.join(path)} ({cost})")
+    if len(paths) < int(k):
+        print(f"Only {len(paths)} loopless path{'s' if len(paths) != 1 else ''} exist{'s' if len(paths) == 1 else ''}.")
+    print(f"Ran {search.spur_searches} spur search{'es' if search.spur_searches != 1 else ''} so far.")
+    return False
+
+
+@add_command(
+    "lfa",
+    usage="lfa [node]",
+    description="Prints the loop-free alternate (backup next hop) of a node towards every destination. Without a node, reports how many routes of every router have one. Output is read destination -> next hops (cost) | backup (cost).",
+)
+def lfa_cmd(graph_manager: GraphManager, node: str = "") -> bool:
+    if node != "" and node not in graph_manager.graph.nodes:
+        print(f"Node {node} not found in graph.")
+        return False
+    if graph_manager.graph.number_of_nodes() == 0:
+        print("The graph is empty.")
+        return False
+
+    from alternates import lfa_coverage, loop_free_alternates
+    from forwarding import compiled_table
+
+    table = compiled_table(graph_manager)
+    if node == "":
+        pairs, covered, node_protected = lfa_coverage(table, graph_manager.graph)
+        if pairs == 0:
+            print("No router can reach another.")
+            return False
+        print(f"Routes with a loop-free alternate: {covered} of {pairs} ({covered / pairs:.1%})")
+        print(f"Routes with a node protecting alternate: {node_protected} of {pairs} ({node_protected / pairs:.1%})")
+        return False
+
+    print(f"\nLoop-Free Alternates for node {node} (Sorted by Cost):")
+    for cost, destination, next_hops, backup, backup_cost, protecting in loop_free_alternates(
+        table, graph_manager.graph, node
+    ):
+        if backup is None:
+            alternate = "no alternate"
+        else:
+            alternate = f"{backup} ({backup_cost:g}{', node protecting' if protecting else ''})"
+        print(f"{destination} -> {', '.join(next_hops)} ({cost}) | {alternate}")
+    return False
+
+
+@add_command(
+    "estimate",
+    usage="estimate (source) (destination)",
+    description="Bounds the shortest path cost between two nodes from their distances to a few landmarks, without searching the graph.",
+)
+def estimate_cmd(graph_manager: GraphManager, source: str = "", destination: str = "") -> bool:
+    if source == "" or destination == "":
+        print("Usage: ", commands["estimate"].usage)
+        return False
+
+    for node in (source, destination):
+        if node not in graph_manager.graph.nodes:
+            print(f"Node {node} not found in graph.")
+            return False
+
+    from landmarks import landmark_oracle
+
+    oracle = landmark_oracle(graph_manager)
+    lower, upper = oracle.bounds(source, destination)
+    if lower == float("inf"):
+        print(f"No path from {source} to {destination}.")
+    else:
+        print(f"{source} -> {destination} costs between {lower:g} and {upper:g}.")
+    print(f"Landmarks: {' '.join(oracle.landmarks)}")
+    return False
+
+
+@add_command(
+    "fib",
+    usage="fib (node)",
+    description="Prints the compiled forwarding table of a node, listing every equal-cost next hop. Output is read destination -> next hops (cost).",
+)
+def fib_cmd(graph_manager: GraphManager, node: str = "") -> bool:
+    if node == "":
+        print("Usage: ", commands["fib"].usage)
+        return False
+    if node not in graph_manager.graph.nodes:
+        print(f"Node {node} not found in graph.")
+        return False
+
+    from forwarding import compiled_table
+
+    table = compiled_table(graph_manager)
+    print(f"\nForwarding Table for node {node} (Sorted by Cost):")
+    for cost, destination, next_hops in table.table(node):
+        print(f"{destination} -> {', '.join(next_hops) or '-'} ({cost})")
+    return False
+
+
 @add_command(
     "file",
     usage="file (file name)",
@@ -343,51 +549,372 @@ def file_cmd(graph_manager: GraphManager, *args, **kwargs) -> bool:
     return False
 
 
+@add_command(
+    "follow",
+    usage="follow (file) [window ms] [nodes...] [-e]",
+    description="Applies the `X Y cost` and `X Y -` lines of a file or FIFO as they are written, until Ctrl+C. Updates arriving within the window (50 ms by default) are applied together, and the routing tables of the given nodes are refreshed and printed after each batch that changes them.",
+    flags={"e": "Stops at the end of the file instead of waiting for more lines."},
+)
+def follow_cmd(graph_manager: GraphManager, file_path: str = "", *args: str, e=False) -> bool:
+    if graph_manager.in_batch:
+        print("A batch is open. Use commit or rollback to close it first.")
+        return False
+    if file_path == "":
+        print("Usage: ", commands["follow"].usage)
+        return False
+    if not os.path.exists(file_path):
+        print(f"Could not find {file_path}. Please ensure you spelled it correctly.")
+        return False
+
+    import follow
+
+    window_ms = follow.DEFAULT_WINDOW_MS
+    subscribed = list(args)
+    if subscribed and subscribed[0].isdigit():
+        window_ms = int(subscribed.pop(0))
+
+    follower = follow.follow_stream(graph_manager, file_path, window_ms, subscribed, tail=not e)
+    follow.print_report(follower.report())
+    return False
+
+
+@add_command(
+    "areas",
+    usage="areas [file] [-a]",
+    description="Splits the graph into OSPF-style areas and compares routing within them against flat link-state routing. The areas are found automatically, or read from a file with lines of the form `X {area}`.",
+    flags={"a": "Border routers advertise one summary per area, rather than one per destination."},
+)
+def areas_cmd(graph_manager: GraphManager, file_path: str = "", a=False) -> bool:
+    if graph_manager.graph.number_of_nodes() == 0:
+        print("Graph is empty.")
+        return False
+
+    import areas
+
+    if file_path:
+        if not os.path.exists(file_path):
+            print(f"Could not find {file_path}. Please ensure you spelled it correctly.")
+            return False
+        assignment = areas.read_areas(file_path)
+    else:
+        assignment = areas.partition_areas(graph_manager.graph)
+
+    try:
+        report = areas.compare_with_flat(graph_manager.graph, assignment, aggregate=a)
+    except ValueError as e:
+        print(e)
+        return False
+    members_of: dict = {}
+    for node in graph_manager.graph.nodes:
+        members_of.setdefault(assignment[node], []).append(node)
+    for area, members in members_of.items():
+        print(f"Area {area}: {' '.join(members)}")
+    areas.print_report(report)
+    return False
+
+
+@add_command(
+    "resilience",
+    usage="resilience [processes]",
+    description="Fails every link one at a time and ranks the links by how much losing them degrades the network.",
+)
+def resilience_cmd(graph_manager: GraphManager, processes: str = "") -> bool:
+    if processes != "" and not processes.isdigit():
+        print("Usage: ", commands["resilience"].usage)
+        return False
+    if graph_manager.graph.number_of_edges() == 0:
+        print("Graph is empty.")
+        return False
+
+    from resilience import link_failure_sensitivity
+
+    results = link_failure_sensitivity(
+        graph_manager.graph, int(processes) if processes else None
+    )
+    recomputed = sum(result[3] for result in results)
+    print(f"{'Link':<8}{'Lost pairs':>12}{'Added cost':>12}")
+    for (node1, node2), lost_pairs, added_cost, _ in results:
+        print(f"{node1}-{node2:<6}{lost_pairs:>12}{added_cost:>12g}")
+    print(
+        f"\nRepaired {recomputed} of {len(results) * graph_manager.graph.number_of_nodes()} shortest path trees."
+    )
+    return False
+
+
+@add_command(
+    "reliability",
+    usage="reliability (failure probability) [samples] [source] [destination]",
+    description="Estimates how likely routers are to stay connected when every link fails independently with the given probability.",
+)
+def reliability_cmd(
+    graph_manager: GraphManager, probability: str = "", samples: str = "10000", source: str = "", destination: str = ""
+) -> bool:
+    try:
+        failure = float(probability)
+    except ValueError:
+        failure = -1.0
+    if not 0 <= failure <= 1 or not samples.isdigit() or int(samples) == 0:
+        print("Usage: ", commands["reliability"].usage)
+        return False
+    for node in (source, destination):
+        if node and node not in graph_manager.graph:
+            print(f"Node {node} not found in graph.")
+            return False
+    if graph_manager.graph.number_of_nodes() < 2:
+        print("The graph needs at least two nodes.")
+        return False
+
+    import networkx as nx
+    import numpy as np
+
+    from resilience import sample_reachability, wilson_interval
+
+    start = time.perf_counter()
+    nodes, connected_pairs, all_connected = sample_reachability(graph_manager.graph, failure, int(samples))
+    print(
+        f"Sampled {samples} failure patterns in {time.perf_counter() - start:.2f} s, "
+        f"with each link failing with probability {failure:g}."
+    )
+    low, high = wilson_interval(all_connected, int(samples))
+    print(f"Every router connected: {all_connected / int(samples):.4f} (95% CI {float(low):.4f}-{float(high):.4f})")
+
+    index = {node: i for i, node in enumerate(nodes)}
+    if source:
+        targets = [destination] if destination else [node for node in nodes if node != source]
+        pairs = [(index[source], index[node]) for node in targets]
+        print(f"\nReachability from {source}:")
+    else:
+        # Only pairs that are connected while every link is up, least reliable first
+        component = np.zeros(len(nodes), dtype=np.int64)
+        for label, members in enumerate(nx.connected_components(graph_manager.graph)):
+            component[[index[node] for node in members]] = label
+        i, j = np.triu_indices(len(nodes), k=1)
+        keep = component[i] == component[j]
+        i, j = i[keep], j[keep]
+        order = np.argsort(connected_pairs[i, j], kind="stable")[:10]
+        pairs = list(zip(i[order].tolist(), j[order].tolist()))
+        print("\nLeast reliable pairs:")
+    counts = np.array([connected_pairs[a, b] for a, b in pairs], dtype=np.int64)
+    low, high = wilson_interval(counts, int(samples))
+    print(f"{'Pair':<10}{'Reachable':>10}{'95% CI':>18}")
+    for (a, b), count, lo, hi in zip(pairs, counts, low, high):
+        print(f"{nodes[a] + '-' + nodes[b]:<10}{count / int(samples):>10.4f}{f'{lo:.4f}-{hi:.4f}':>18}")
+    return False
+
+
+@add_command(
+    "snapshot",
+    usage="snapshot [name]",
+    description="Saves the graph and routing state under a name. Lists the saved snapshots if no name is given.",
+)
+def snapshot_cmd(graph_manager: GraphManager, name: str = "") -> bool:
+    if name == "":
+        if not graph_manager.snapshots:
+            print("No snapshots saved.")
+        for saved in graph_manager.snapshots:
+            print(saved)
+        return False
+    graph_manager.snapshot(name)
+    print(f"Saved snapshot '{name}'.")
+    return False
+
+
+@add_command(
+    "checkout",
+    usage="checkout (name)",
+    description="Restores the graph and routing state saved by snapshot. Edits made afterwards start a new branch.",
+)
+def checkout_cmd(graph_manager: GraphManager, name: str = "") -> bool:
+    if graph_manager.in_batch:
+        print("A batch is open. Use commit or rollback to close it first.")
+        return False
+    if name == "":
+        print("Usage: ", commands["checkout"].usage)
+        return False
+    if name not in graph_manager.snapshots:
+        print(f"Unknown snapshot '{name}'.")
+        return False
+    graph_manager.checkout(name)
+    print(f"Checked out snapshot '{name}'.")
+    return False
+
+
+@add_command("undo", usage="undo", description="Undoes the last edge edit.")
+def undo_cmd(graph_manager: GraphManager) -> bool:
+    if graph_manager.in_batch:
+        print("A batch is open. Use commit or rollback to close it first.")
+        return False
+    if not graph_manager.undo():
+        print("Nothing to undo.")
+        return False
+    print("Undid last edit.")
+    return False
+
+
+@add_command("redo", usage="redo", description="Redoes the last undone edge edit.")
+def redo_cmd(graph_manager: GraphManager) -> bool:
+    if graph_manager.in_batch:
+        print("A batch is open. Use commit or rollback to close it first.")
+        return False
+    if not graph_manager.redo():
+        print("Nothing to redo.")
+        return False
+    print("Redid last edit.")
+    return False
+
+
+@add_command(
+    "begin",
+    usage="begin",
+    description="Starts a batch of edge edits that are applied together on commit.",
+)
+def begin_cmd(graph_manager: GraphManager) -> bool:
+    if graph_manager.in_batch:
+        print("A batch is already open. Use commit or rollback to close it.")
+        return False
+    graph_manager.begin()
+    print("Started a batch. Edge edits are queued until commit.")
+    return False
+
+
+@add_command("commit", usage="commit", description="Applies the edge edits queued since begin.")
+def commit_cmd(graph_manager: GraphManager) -> bool:
+    if not graph_manager.in_batch:
+        print("No batch is open. Use begin to start one.")
+        return False
+    queued = graph_manager.queued
+    graph_manager.temp_mute()
+    changed = graph_manager.commit()
+    graph_manager.temp_unmute()
+    print(
+        f"Committed {queued} queued edit{'s' if queued != 1 else ''} as "
+        f"{changed} edge change{'s' if changed != 1 else ''}."
+    )
+    return False
+
+
+@add_command("rollback", usage="rollback", description="Discards the edge edits queued since begin.")
+def rollback_cmd(graph_manager: GraphManager) -> bool:
+    if not graph_manager.in_batch:
+        print("No batch is open. Use begin to start one.")
+        return False
+    discarded = graph_manager.rollback()
+    print(f"Discarded {discarded} queued edit{'s' if discarded != 1 else ''}.")
+    return False
+
+
 @add_command(
     "centrality",
-    usage="centrality",
+    usage="centrality [-d] [-p]",
     description="Used to find the betweenness centrality of the graph.",
+    flags={
+        "d": "Keeps the centrality up to date as edges change, only recomputing the sources an edge change affects.",
+        "p": "Splits the sources between a pool of worker processes.",
+    },
 )
-def centrality_cmd(graph_manager: GraphManager) -> bool:
+def centrality_cmd(graph_manager: GraphManager, d=False, p=False) -> bool:
     import centrality
 
-    betweenness_centrality = centrality.brandes_centrality(graph_manager)
+    if d:
+        if graph_manager.betweenness is None:
+            graph_manager.betweenness = centrality.DynamicBetweenness(graph_manager)
+        dynamic = graph_manager.betweenness
+        start = time.perf_counter()
+        betweenness_centrality = dynamic.scores()
+        elapsed = time.perf_counter() - start
+    elif p:
+        from shared_pool import shared_pool
+
+        betweenness_centrality = shared_pool(graph_manager).betweenness(graph_manager)
+    else:
+        betweenness_centrality = centrality.brandes_centrality(graph_manager)
     for k, v in betweenness_centrality.items():
         print(f"{k}: {v:.2f}")
+    if d:
+        print(
+            f"Recomputed {dynamic.last_recomputed} of {len(dynamic.V)} sources in {elapsed * 1000:.1f} ms."
+        )
     return False
 
 
 @add_command(
     "stats",
-    usage="stats [-r]",
-    description="Used to find the max, min, and average shortest path length.",
-    flags={"r": "Resets the statistics saved for the different algorithms."},
+    usage="stats [directory] [-r] [-c] [-p]",
+    description="Used to find the max, min, and average shortest path length, along with the diameter, radius, Wiener index, and most central nodes.",
+    flags={
+        "r": "Resets the statistics saved for the different algorithms.",
+        "c": "Turns counting the protocol costs of the algorithms on or off.",
+        "p": "Splits the sources between a pool of worker processes.",
+    },
 )
-def stats_cmd(graph_manager: GraphManager, r=False) -> bool:
+def stats_cmd(
+    graph_manager: GraphManager, directory: str = "", r=False, c=False, p=False
+) -> bool:
     if r:
         for k in graph_manager.runs.keys():
             graph_manager.runs[k] = 0
+        if graph_manager.protocol_costs is not None:
+            graph_manager.protocol_costs = {}
         print("Reset all algorithm statistics.")
+    if c:
+        if graph_manager.protocol_costs is None:
+            graph_manager.protocol_costs = {}
+            print("Counting protocol costs.")
+        else:
+            graph_manager.protocol_costs = None
+            print("Stopped counting protocol costs.")
 
-    max_node, min_node, avg_len, dijkstra_len = average_shortest_path(
-        graph_manager.graph
-    )
+    if graph_manager.graph.number_of_nodes() == 0:
+        print("The graph is empty.")
+        return False
+
+    # Every metric comes from the same single Dijkstra per node
+    if directory:
+        from distance_store import DistanceStore, store_metrics
+
+        store = DistanceStore(directory, graph_manager.graph)
+        if store.done and not store.complete:
+            print(f"Continuing from {len(store.done)} of {store.num_blocks} stored blocks.")
+        store.build()
+        nodes, metrics = store_metrics(store)
+    elif p:
+        from shared_pool import shared_pool
+
+        nodes, metrics = shared_pool(graph_manager).metrics(graph_manager)
+    else:
+        nodes, metrics = graph_metrics(graph_manager.graph)
+    mean_path = metrics["mean_path"]
+    max_node = nodes[int(mean_path.argmax())]
+    min_node = nodes[int(mean_path.argmin())]
     print(
-        f"Node with max shortest path length: {max_node} ({dijkstra_len[max_node]:.2f})"
+        f"Node with max shortest path length: {max_node} ({mean_path.max():.2f})"
     )
     print(
-        f"Node with min shortest path length: {min_node} ({dijkstra_len[min_node]:.2f})"
+        f"Node with min shortest path length: {min_node} ({mean_path.min():.2f})"
     )
-    print(f"Average shortest path length: {avg_len}")
+    print(f"Average shortest path length: {sum(mean_path.tolist()) / len(nodes)}")
+    print(f"Diameter: {metrics['diameter']:g}")
+    print(f"Radius: {metrics['radius']:g}")
+    print(f"Wiener index: {metrics['wiener']:g}")
+    closest = int(metrics["closeness"].argmax())
+    print(f"Most central node by closeness: {nodes[closest]} ({metrics['closeness'][closest]:.4f})")
+    harmonic = int(metrics["harmonic"].argmax())
+    print(f"Most central node by harmonic centrality: {nodes[harmonic]} ({metrics['harmonic'][harmonic]:.4f})")
 
     print("\nAlgorithm Runs:")
     for algorithm, runs in graph_manager.runs.items():
         print(algorithm.upper(), f": {runs} run{'s' if runs != 1 else ''}")
+
+    if graph_manager.protocol_costs is not None:
+        print("\nProtocol Costs:")
+        for algorithm, names in PROTOCOL_COSTS.items():
+            costs = graph_manager.protocol_costs.get(algorithm, {})
+            print(algorithm.upper(), ": " + ", ".join(f"{name}={costs.get(name, 0)}" for name in names))
     return False
 
 
-def parse_edge(command: str) -> tuple[str, str, int | str] | tuple[None, None, None]:
-    """Gets the components of an edge in the form `X Y {cost}`, or None if it is not in that form.
+def match_edge(command: str) -> tuple[str, str, int | str] | tuple[None, None, None]:
+    """Gets the components of an edge in the form `X Y {cost}` like `parse_edge`, without printing why it failed.
 
     Args:
         command (str): The command to attempt to extract the edge from.
@@ -395,25 +922,34 @@ def parse_edge(command: str) -> tuple[str, str, int | str] | tuple[None, None, N
     Returns:
         Tuple[str, str, int | str] | Tuple[None, None, None]: The edge (X, Y, cost), (X, Y, -), or (None, None, None) if it failed to parse it.
     """
-    graph_input_regex = r"([A-Z]{1})\s([A-Z]{1})\s([\d]+|-)"
-    is_edge_command: re.Match[str] | None = re.search(graph_input_regex, command)
-    if is_edge_command is None:
+    is_edge_command: re.Match[str] | None = re.match(GRAPH_INPUT_REGEX, command)
+    # Fails if there is text after the graph input, like A B 3e
+    if is_edge_command is None or command.replace(is_edge_command.group(), "") != "":
         return (None, None, None)
 
-    # Strips the parsed regex to see if there is text after the graph input
-    hanging_command = command.replace(is_edge_command.group(), "")
+    edge: tuple = is_edge_command.groups()
+    return (edge[0], edge[1], int(edge[2]) if edge[2] != "-" else edge[2])
+
 
-    if hanging_command != "":
+def parse_edge(command: str) -> tuple[str, str, int | str] | tuple[None, None, None]:
+    """Gets the components of an edge in the form `X Y {cost}`, or None if it is not in that form.
+
+    Args:
+        command (str): The command to attempt to extract the edge from.
+
+    Returns:
+        Tuple[str, str, int | str] | Tuple[None, None, None]: The edge (X, Y, cost), (X, Y, -), or (None, None, None) if it failed to parse it.
+    """
+    edge = match_edge(command)
+    is_edge_command: re.Match[str] | None = re.match(GRAPH_INPUT_REGEX, command)
+    if edge[0] is None and is_edge_command is not None:
         # Case where input is not just A B 3, but something like A B 3e
+        hanging_command = command.replace(is_edge_command.group(), "")
         print("Error parsing graph edge.")
         print(f"Input: {command}")
         print(f"Parsed graph node: {is_edge_command.group()}")
         print(f"Command remaining after parsing: {hanging_command}")
-        return (None, None, None)
-
-    # No hanging command and regex succeeded. Return the tuple.
-    edge: tuple = is_edge_command.groups()
-    return (edge[0], edge[1], int(edge[2]) if edge[2] != "-" else edge[2])
+    return edge
 
 
 def on_shutdown(reason: str = "Unknown reason") -> None:
@@ -0,0 +1,201 @@
+import heapq
+import time
+
+import networkx as nx
+
+from graph_manager import GraphManager
+
+# Nodes a witness search may settle before giving up and adding the shortcut anyway.
+# Extra shortcuts never make queries wrong, only slower.
+WITNESS_SETTLE_LIMIT = 64
+
+
+class ContractionHierarchy:
+    """Contraction hierarchies index for fast point-to-point shortest paths.
+
+    Nodes are contracted one at a time, cheapest first by edge difference.
+    Contracting a node adds a shortcut between two of its neighbors whenever
+    the path through it is the only shortest path between them. A query is a
+    bidirectional Dijkstra that only follows edges towards higher ranked nodes,
+    so it settles a small part of the graph. Shortcuts are unpacked back into
+    the original edges afterwards.
+    """
+
+    def __init__(self, graph: nx.Graph, version: int = 0):
+        start = time.perf_counter()
+        self.version = version
+        self.nodes: list[str] = list(graph.nodes)
+        self.index: dict[str, int] = {node: i for i, node in enumerate(self.nodes)}
+        n = len(self.nodes)
+
+        # Edges between nodes that have not been contracted yet, including shortcuts
+        adj: list[dict[int, int]] = [{} for _ in range(n)]
+        for u, v, cost in graph.edges(data="weight"):
+            i, j = self.index[u], self.index[v]
+            if i != j and cost < adj[i].get(j, float("inf")):
+                adj[i][j] = adj[j][i] = cost
+
+        self.rank = [0] * n
+        # Edges from each node to higher ranked nodes. Searches in both directions use it.
+        self.up: list[dict[int, int]] = [{} for _ in range(n)]
+        # (u, w) with u < w -> the node a shortcut between them skips
+        self.middle: dict[tuple[int, int], int] = {}
+        self.shortcuts = 0
+
+        contracted_neighbors = [0] * n
+        queue = []
+        for v in range(n):
+            queue.append((self._priority(adj, v, contracted_neighbors)[0], v))
+        heapq.heapify(queue)
+
+        order = 0
+        while queue:
+            _, v = heapq.heappop(queue)
+            # Priorities go stale as neighbors are contracted, so recompute it lazily
+            priority, shortcuts = self._priority(adj, v, contracted_neighbors)
+            if queue and priority > queue[0][0]:
+                heapq.heappush(queue, (priority, v))
+                continue
+
+            self.rank[v] = order
+            order += 1
+            for u, cost in adj[v].items():
+                self.up[v][u] = cost
+                del adj[u][v]
+                contracted_neighbors[u] += 1
+            adj[v] = {}
+            for u, w, cost in shortcuts:
+                if cost < adj[u].get(w, float("inf")):
+                    adj[u][w] = adj[w][u] = cost
+                    self.middle[(min(u, w), max(u, w))] = v
+                    self.shortcuts += 1
+
+        self.build_seconds = time.perf_counter() - start
+
+    @staticmethod
+    def _witness_search(
+        adj: list[dict[int, int]], source: int, skip: int, limit: float, targets: dict[int, int]
+    ) -> dict[int, float]:
+        # Dijkstra from source avoiding skip, up to cost limit or until every target is settled
+        dist = {source: 0}
+        queue = [(0, source)]
+        remaining = len(targets)
+        settled = 0
+        while queue and remaining and settled < WITNESS_SETTLE_LIMIT:
+            d, u = heapq.heappop(queue)
+            if d > dist[u]:
+                continue
+            if d > limit:
+                break
+            settled += 1
+            if u in targets:
+                remaining -= 1
+            for w, cost in adj[u].items():
+                new_dist = d + cost
+                if w != skip and new_dist < dist.get(w, float("inf")):
+                    dist[w] = new_dist
+                    heapq.heappush(queue, (new_dist, w))
+        return dist
+
+    def _priority(
+        self, adj: list[dict[int, int]], v: int, contracted_neighbors: list[int]
+    ) -> tuple[int, list[tuple[int, int, int]]]:
+        # Edge difference plus contracted neighbors, along with the shortcuts contracting v needs
+        neighbors = list(adj[v].items())
+        shortcuts = []
+        for i, (u, to_u) in enumerate(neighbors):
+            targets = {w: to_u + to_w for w, to_w in neighbors[i + 1 :]}
+            if not targets:
+                continue
+            dist = self._witness_search(adj, u, v, max(targets.values()), targets)
+            for w, cost in targets.items():
+                if dist.get(w, float("inf")) > cost:
+                    shortcuts.append((u, w, cost))
+        return len(shortcuts) - len(neighbors) + contracted_neighbors[v], shortcuts
+
+    def index_edges(self) -> int:
+        """Gets the number of edges stored in the index, including shortcuts."""
+        return sum(len(edges) for edges in self.up)
+
+    def route(self, source: str, target: str) -> tuple[float, list[str], int]:
+        """Finds the shortest path from source to target.
+
+        Returns:
+            tuple: (cost: float, path: list[str], settled: int). The path is empty and the cost inf if target is unreachable.
+        """
+        s, t = self.index[source], self.index[target]
+        if s == t:
+            return 0, [source], 0
+
+        dist: list[dict[int, float]] = [{s: 0}, {t: 0}]
+        parent: list[dict[int, int]] = [{}, {}]
+        queues = [[(0, s)], [(0, t)]]
+        best = float("inf")
+        meet = -1
+        settled = 0
+        while queues[0] or queues[1]:
+            for side in (0, 1):
+                queue = queues[side]
+                if not queue:
+                    continue
+                d, u = heapq.heappop(queue)
+                if d > dist[side][u]:
+                    continue  # stale entry
+                if d >= best:
+                    queue.clear()  # Nothing left on this side can give a shorter path
+                    continue
+                settled += 1
+                other = dist[1 - side]
+                for w, cost in self.up[u].items():
+                    new_dist = d + cost
+                    if new_dist < dist[side].get(w, float("inf")):
+                        dist[side][w] = new_dist
+                        parent[side][w] = u
+                        heapq.heappush(queue, (new_dist, w))
+                    if w in other and dist[side][w] + other[w] < best:
+                        best = dist[side][w] + other[w]
+                        meet = w
+                if u in other and d + other[u] < best:
+                    best = d + other[u]
+                    meet = u
+
+        if meet == -1:
+            return float("inf"), [], settled
+
+        # Walk back up to the meeting node from both ends
+        forward = [meet]
+        while forward[-1] != s:
+            forward.append(parent[0][forward[-1]])
+        forward.reverse()
+        backward = []
+        node = meet
+        while node != t:
+            node = parent[1][node]
+            backward.append(node)
+
+        hops = forward + backward
+        path = [hops[0]]
+        for a, b in zip(hops, hops[1:]):
+            self._unpack(a, b, path)
+        return best, [self.nodes[i] for i in path], settled
+
+    def _unpack(self, a: int, b: int, path: list[int]) -> None:
+        # Appends the original edges of the edge a-b to path, which already ends at a
+        stack = [(a, b)]
+        while stack:
+            u, w = stack.pop()
+            middle = self.middle.get((min(u, w), max(u, w)))
+            if middle is None:
+                path.append(w)
+            else:
+                stack.append((middle, w))
+                stack.append((u, middle))
+
+
+def contraction_index(graph_manager: GraphManager) -> ContractionHierarchy:
+    """Gets the contraction hierarchy of the current topology, rebuilding it after edge changes."""
+    index = graph_manager.contraction
+    if index is None or index.version != graph_manager.version:
+        index = ContractionHierarchy(graph_manager.graph, graph_manager.version)
+        graph_manager.contraction = index
+    return index
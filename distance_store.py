@@ -0,0 +1,205 @@
+"""All-pairs distances stored on disk, for graphs whose distance matrix does not fit in memory.
+
+Run `python distance_store.py (graph file) (directory)` to compute the
+distances of a graph into a directory, and print its `stats` metrics.
+"""
+import argparse
+import json
+import os
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+import networkx as nx
+
+from metrics import METRICS, MetricsAccumulator
+from result_cache import graph_fingerprint
+from routing import dijkstra
+
+# Stored for pairs with no path, and as the next hop of a node towards itself
+UNREACHABLE = -1
+
+# Largest block of rows held in memory at once, as float64 distances
+MAX_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def _next_hops(source: str, results: list[tuple[float, str, str]]) -> dict[str, str]:
+    # The first node after source on the path to each node, from the Dijkstra tree
+    parent = {node: via for _, node, via in results}
+    hops: dict[str, str] = {}
+    for _, node, _ in results:
+        path = []
+        while node != source and node not in hops:
+            path.append(node)
+            node = parent[node]
+        hop = hops.get(node)  # None if the walk reached source
+        for node in reversed(path):
+            if hop is None:
+                hop = node
+            hops[node] = hop
+    return hops
+
+
+def _save_meta(path: str, meta: dict) -> None:
+    # Write then rename, so a crash never leaves half-written progress
+    with open(path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(path + ".tmp", path)
+
+
+class DistanceStore:
+    """All-pairs distances (and optionally next hops) in memory-mapped files in a directory.
+
+    Rows are computed a block of sources at a time and written straight to the
+    files, so only one block is held in memory. Completed blocks are recorded
+    after they are flushed, so an interrupted build continues where it stopped,
+    as long as the graph has not changed. Distances are int64, like the
+    distance vectors, so any path cost fits, and next hops are int32 node
+    indices, with UNREACHABLE where there is no path.
+    """
+
+    def __init__(self, directory: str, graph: nx.Graph, next_hops: bool = False, block_size: int | None = None):
+        self.directory = directory
+        self.nodes: list[str] = list(graph.nodes)
+        self.index: dict[str, int] = {node: i for i, node in enumerate(self.nodes)}
+        V = len(self.nodes)
+        self.block_size = block_size or max(1, min(V, MAX_BLOCK_BYTES // max(V * 8, 1)))
+        # Rows and columns are in node order, so the same edges in another order need another store
+        self.fingerprint = graph_fingerprint(graph, node_order=True)
+        self.graph = graph
+
+        os.makedirs(directory, exist_ok=True)
+        self.meta_path = os.path.join(directory, "meta.json")
+        dist_path = os.path.join(directory, "distances.npy")
+        hops_path = os.path.join(directory, "next_hops.npy")
+
+        meta = None
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+        # Progress only carries over for the same graph, split into the same blocks
+        if (
+            meta is not None
+            and meta["fingerprint"] == self.fingerprint
+            and meta["block_size"] == self.block_size
+            and meta.get("distance_dtype") == "int64"  # Older stores held int32 distances
+            and (meta["next_hops"] or not next_hops)
+        ):
+            self.next_hops_stored = meta["next_hops"]
+            self.done: set[int] = set(meta["done"])
+            self.distances = np.load(dist_path, mmap_mode="r+")
+            self.hops = np.load(hops_path, mmap_mode="r+") if self.next_hops_stored else None
+        else:
+            self.next_hops_stored = next_hops
+            self.done = set()
+            self.distances = np.lib.format.open_memmap(dist_path, mode="w+", dtype=np.int64, shape=(V, V))
+            self.hops = None
+            if next_hops:
+                self.hops = np.lib.format.open_memmap(hops_path, mode="w+", dtype=np.int32, shape=(V, V))
+            self._save()
+
+    def _save(self) -> None:
+        _save_meta(
+            self.meta_path,
+            {
+                "fingerprint": self.fingerprint,
+                "nodes": self.nodes,
+                "block_size": self.block_size,
+                "next_hops": self.next_hops_stored,
+                "distance_dtype": "int64",
+                "done": sorted(self.done),
+            },
+        )
+
+    @property
+    def num_blocks(self) -> int:
+        return -(-len(self.nodes) // self.block_size)
+
+    @property
+    def complete(self) -> bool:
+        return len(self.done) == self.num_blocks
+
+    def build(self, on_block=None) -> None:
+        """Computes every block that is not stored yet.
+
+        Args:
+            on_block (Callable, optional): Called as on_block(blocks done, total blocks) after each block.
+        """
+        index = self.index
+        V = len(self.nodes)
+        for b in range(self.num_blocks):
+            if b in self.done:
+                continue
+            first, stop = b * self.block_size, min((b + 1) * self.block_size, V)
+            block = np.full((stop - first, V), UNREACHABLE, dtype=np.int64)
+            hops = np.full((stop - first, V), UNREACHABLE, dtype=np.int32) if self.hops is not None else None
+            for k, source in enumerate(self.nodes[first:stop]):
+                results = dijkstra(source, self.graph)
+                for distance, node, _ in results:
+                    block[k, index[node]] = distance
+                if hops is not None:
+                    for node, hop in _next_hops(source, results).items():
+                        hops[k, index[node]] = index[hop]
+            self.distances[first:stop] = block
+            self.distances.flush()
+            if self.hops is not None:
+                self.hops[first:stop] = hops
+                self.hops.flush()
+            self.done.add(b)
+            self._save()
+            if on_block is not None:
+                on_block(len(self.done), self.num_blocks)
+
+    def blocks(self) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """Reads the stored rows a block at a time, as (source indices, distance rows) with inf
+        where there is no path, like metrics.distance_blocks."""
+        V = len(self.nodes)
+        for first in range(0, V, self.block_size):
+            sources = np.arange(first, min(first + self.block_size, V))
+            rows = self.distances[first : sources[-1] + 1]
+            yield sources, np.where(rows == UNREACHABLE, np.inf, rows.astype(np.float64))
+
+    def distance(self, source: str, target: str) -> float:
+        """Gets one stored distance. inf if there is no path."""
+        distance = int(self.distances[self.index[source], self.index[target]])
+        return float("inf") if distance == UNREACHABLE else distance
+
+
+def store_metrics(
+    store: DistanceStore, metrics: Iterable[str] = METRICS
+) -> tuple[list[str], dict[str, np.ndarray | float]]:
+    """Same as metrics.graph_metrics, streaming the rows of a complete store instead of running Dijkstra."""
+    accumulator = MetricsAccumulator(len(store.nodes), metrics)
+    for sources, block in store.blocks():
+        accumulator.update(sources, block)
+    return list(store.nodes), accumulator.result()
+
+
+def read_graph(file_path: str) -> nx.Graph:
+    """Reads a graph file of `X Y {cost}` lines. Unlike the console, which is limited to the
+    26 single letter names, node names can be any word, so graphs of any size can be stored."""
+    graph = nx.Graph()
+    with open(file_path, "r") as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2].isdigit():
+                graph.add_edge(parts[0], parts[1], weight=int(parts[2]))
+    return graph
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Computes all-pairs distances into a directory and prints the stats metrics.")
+    parser.add_argument("graph", help="Graph file of `X Y {cost}` lines.")
+    parser.add_argument("directory", help="Directory the distances are stored in. An unfinished build there is continued.")
+    parser.add_argument("--next-hops", action="store_true", help="Also store the next hop of every pair.")
+    parser.add_argument("--block-size", type=int, help="Sources per block. Defaults to as many as fit in 64 MiB.")
+    args = parser.parse_args()
+
+    graph = read_graph(args.graph)
+    store = DistanceStore(args.directory, graph, args.next_hops, args.block_size)
+    store.build(on_block=lambda done, total: print(f"\rBlock {done}/{total}", end="", flush=True))
+    print()
+    nodes, metrics = store_metrics(store)
+    print(f"Diameter: {metrics['diameter']:g}")
+    print(f"Radius: {metrics['radius']:g}")
+    print(f"Wiener index: {metrics['wiener']:g}")
+    print(f"Average shortest path length: {metrics['mean_path'].mean()}")
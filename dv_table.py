@@ -0,0 +1,88 @@
+from collections.abc import Iterator, Mapping
+
+import numpy as np
+
+# Distance stored for unreachable destinations. Far below the int64 limit so
+# that adding a link cost to it cannot overflow before it is clamped.
+UNREACHABLE = np.int64(2**62)
+NO_HOP = -1
+
+
+class DistanceVectorRow(Mapping[str, int]):
+    """Read-only view of one router's distance vector. Unreachable destinations are left out."""
+
+    def __init__(self, table: "DistanceVectorTable", row: int):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, destination: str) -> int:
+        col = self.table.index.get(destination)
+        if col is None or self.table.dist[self.row, col] == UNREACHABLE:
+            raise KeyError(destination)
+        return int(self.table.dist[self.row, col])
+
+    def __iter__(self) -> Iterator[str]:
+        nodes = self.table.nodes
+        reachable = self.table.dist[self.row, : len(nodes)] != UNREACHABLE
+        return (nodes[col] for col in np.flatnonzero(reachable))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.table.dist[self.row, : len(self.table.nodes)] != UNREACHABLE))
+
+    def next_hop(self, destination: str) -> str | None:
+        hop = self.table.next_hop[self.row, self.table.index[destination]]
+        return self.table.nodes[hop] if hop != NO_HOP else None
+
+
+class DistanceVectorTable(Mapping[str, DistanceVectorRow]):
+    """Distance vectors of every router, stored as dense matrices.
+
+    dist[i, j] is router i's distance to destination j (UNREACHABLE if it has
+    none) and next_hop[i, j] is the neighbor it forwards through. Routers are
+    numbered in the order they were added. Reading it works like the old
+    dict[str, dict[str, int]], e.g. `dvs["A"].get("B", float("inf"))`.
+    """
+
+    def __init__(self, capacity: int = 8):
+        self.nodes: list[str] = []
+        self.index: dict[str, int] = {}
+        self.dist = np.full((capacity, capacity), UNREACHABLE, dtype=np.int64)
+        self.next_hop = np.full((capacity, capacity), NO_HOP, dtype=np.int32)
+
+    def __getitem__(self, router: str) -> DistanceVectorRow:
+        return DistanceVectorRow(self, self.index[router])
+
+    def __contains__(self, router: object) -> bool:
+        return router in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.nodes)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def add_node(self, node: str) -> int:
+        """Adds a router that can only reach itself, if it is not in the table yet. Returns its index."""
+        i = self.index.get(node)
+        if i is not None:
+            return i
+
+        i = len(self.nodes)
+        if i == len(self.dist):
+            # Double the capacity, like a list would
+            capacity = max(2 * i, 1)
+            dist = np.full((capacity, capacity), UNREACHABLE, dtype=np.int64)
+            next_hop = np.full((capacity, capacity), NO_HOP, dtype=np.int32)
+            dist[:i, :i] = self.dist[:i, :i]
+            next_hop[:i, :i] = self.next_hop[:i, :i]
+            self.dist, self.next_hop = dist, next_hop
+
+        self.nodes.append(node)
+        self.index[node] = i
+        self.dist[i, i] = 0
+        return i
+
+    def nbytes(self) -> int:
+        """Gets the bytes used by the distance and next hop entries in use."""
+        n = len(self.nodes)
+        return n * n * (self.dist.itemsize + self.next_hop.itemsize)
@@ -1,20 +1,23 @@
+import contextlib
+import csv
+import json
 import random
 import string
-from tqdm import tqdm
-import sys
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
+
+import numpy as np
+
 from centrality import brandes_centrality
 
 from console import file_cmd, parse_command
 from graph_manager import GraphManager
-import seaborn as sns
+from metrics import graph_metrics
+from result_cache import DEFAULT_MAX_BYTES, ResultCache, graph_fingerprint
 from routing import (
+    PROTOCOL_COSTS,
     DistanceVectorRouting,
     DistributredLinkStateRouting,
     LinkStateRouting,
-    average_shortest_path
 )
 
 
@@ -160,136 +163,284 @@ def count_to_infinity():
     parse("dv A -i")
 
 
-def batch_gather_statistics(n=100, save_graphs: bool = False, save_plots: bool = False) -> None:
+class OnlineCorrelation:
+    """Correlation matrix of a stream of rows, updated one row at a time (Welford's algorithm).
+
+    Only the running means and co-moments are kept, so memory does not grow
+    with the number of rows. The state round-trips through to_json/from_json
+    so it can be checkpointed.
+    """
+
+    def __init__(self, columns: list[str]):
+        self.columns = columns
+        self.count = 0
+        self.mean = np.zeros(len(columns))
+        self.comoment = np.zeros((len(columns), len(columns)))
+
+    def update(self, row: dict[str, float]) -> None:
+        x = np.array([row[col] for col in self.columns], dtype=float)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.comoment += np.outer(delta, x - self.mean)
+
+    def correlation(self) -> np.ndarray:
+        """Gets the Pearson correlation matrix. Columns that never changed give NaN, like pandas."""
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.comoment / np.outer(std, std)
+
+    def to_json(self) -> dict:
+        return {
+            "columns": self.columns,
+            "count": self.count,
+            "mean": self.mean.tolist(),
+            "comoment": self.comoment.tolist(),
+        }
+
+    @classmethod
+    def from_json(cls, state: dict) -> "OnlineCorrelation":
+        accumulator = cls(state["columns"])
+        accumulator.count = state["count"]
+        accumulator.mean = np.array(state["mean"])
+        accumulator.comoment = np.array(state["comoment"])
+        return accumulator
+
+
+def _run_silently(manager: GraphManager, command: str) -> None:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        parse_command(command, manager)
+
+
+def _run_algorithm(manager: GraphManager, algorithm: str, source: str) -> dict:
+    # Runs a routing algorithm from a fresh state, returning its run count and protocol costs
+    manager.protocol_costs = {}
+    _run_silently(manager, f"{algorithm} {source}")
+    return {"runs": manager.runs[algorithm], "costs": manager.protocol_costs.get(algorithm, {})}
+
+
+def evaluate_random_graph(
+    i: int,
+    seed: int,
+    save_graphs: bool = False,
+    save_plots: bool = False,
+    cache: ResultCache | None = None,
+) -> dict[str, float]:
+    """Generates the `i`th random graph of a run, runs every algorithm on it, and gets its statistics.
+
+    The graph only depends on `seed` and `i`, so any graph can be regenerated on its own.
+    With a cache, the algorithms are skipped for graphs whose results are already stored.
+    """
+    random.seed(f"{seed}:{i}")
+    graph_manager, edge_prob, max_cost = generate_random_graph(26, 0.1, 50)
+    if save_graphs:
+        graph_manager.save_to_file(f"out/graphs/{i}.in", overwrite=True)
+    if save_plots:
+        graph_manager.save_plot(f"out/plots/{i}.png", overwrite=True)
+
+    nodes = list(graph_manager.graph.nodes)
+    fingerprint = ordered_fingerprint = ""
+    if cache is not None:
+        fingerprint = graph_fingerprint(graph_manager.graph)
+        # Round counts and protocol costs depend on the order routers and links are visited in, so
+        # those results are also keyed by that order
+        ordered_fingerprint = graph_fingerprint(graph_manager.graph, node_order=True)
+
+    def cached(algorithm: str, params: dict, compute, ordered: bool = False):
+        if cache is None:
+            return compute()
+        return cache.cached(ordered_fingerprint if ordered else fingerprint, algorithm, params, compute)
+
+    protocol_costs = {}
+    for algorithm in ("dv", "dls", "ls"):
+        # Draw the source even on a cache hit, so the random sequence stays the same
+        source = random.choice(nodes)
+        result = cached(
+            algorithm, {"source": source}, lambda: _run_algorithm(graph_manager, algorithm, source), ordered=True
+        )
+        graph_manager.runs[algorithm] = result["runs"]
+        protocol_costs[algorithm] = result["costs"]
+    graph_manager.protocol_costs = protocol_costs
+
+    # Dijkstra breaks ties by node name whichever queue it uses, so betweenness and the
+    # metrics only depend on the edges and can share results across orders
+    centrality = cached("betweenness", {}, lambda: brandes_centrality(graph_manager))
+    _, metrics = cached("metrics", {}, lambda: graph_metrics(graph_manager.graph))
+    mean_path = metrics["mean_path"]
+    num_nodes = graph_manager.graph.number_of_nodes()
+    num_edges = graph_manager.graph.number_of_edges()
+    return {
+        "max_sp": float(mean_path.max()),
+        "min_sp": float(mean_path.min()),
+        "avg_sp": float(mean_path.mean()),
+        "diameter": metrics["diameter"],
+        "radius": metrics["radius"],
+        "wiener": metrics["wiener"],
+        "mean_closeness": float(metrics["closeness"].mean()),
+        "mean_harmonic": float(metrics["harmonic"].mean()),
+        "nodes": num_nodes,
+        "edges": num_edges,
+        "edge_ratio": num_edges / num_nodes,
+        "node_ratio": (num_nodes / num_edges) if num_edges != 0 else 0,
+        "edge_prob": edge_prob,
+        "max_cost": max_cost,
+        "max_b_cent": max(centrality.values()),
+        "mean_b_cent": sum(centrality.values()) / len(centrality),
+        **graph_manager.runs,
+        **{
+            f"{algorithm}_{name}": graph_manager.protocol_costs.get(algorithm, {}).get(name, 0)
+            for algorithm, names in PROTOCOL_COSTS.items()
+            for name in names
+        },
+    }
+
+
+def _save_checkpoint(path: str, checkpoint: dict) -> None:
+    # Write then rename, so a crash never leaves a half-written checkpoint
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+def batch_gather_statistics(
+    n=100,
+    save_graphs: bool = False,
+    save_plots: bool = False,
+    seed: int = 0,
+    chunk_size: int = 100,
+    resume: bool = False,
+    out_dir: str = "out",
+    use_cache: bool = True,
+    cache_bytes: int = DEFAULT_MAX_BYTES,
+) -> None:
     """Generates `n` random graphs and gathers the statistics of them.
 
+    Graphs are generated, evaluated and discarded one at a time. Their rows are
+    appended to `out_dir/statistics.csv` every `chunk_size` graphs, while the
+    correlation matrix is accumulated online. A checkpoint is written with each
+    chunk, so an interrupted run can be continued with `resume`.
+
     Args:
         n (int, optional): Number of random graphs to generate. Defaults to 100.
         save_graphs (bool, optional): Flag for whether the graphs should be saved. Defaults to False.
         save_plots (bool, optional): Flag for whether the plots should be saved. Defaults to False.
+        seed (int, optional): Seed the graphs are generated from. Defaults to 0.
+        chunk_size (int, optional): Number of graphs between writes and checkpoints. Defaults to 100.
+        resume (bool, optional): Flag for whether to continue from the last checkpoint in `out_dir`. Defaults to False.
+        out_dir (str, optional): Directory the results are written to. Defaults to "out".
+        use_cache (bool, optional): Flag for whether to reuse the algorithm results stored in `out_dir/cache.sqlite` by earlier runs on the same graphs. Defaults to True.
+        cache_bytes (int, optional): Size the cache is kept under by evicting the least recently used results. Defaults to 256 MiB.
     """
-    graphs: list[GraphManager] = []
-    edge_probs = []
-    max_costs = []
-    print("Generating graphs...")
-    for i in tqdm(range(0, n)):
-        gm, edge_prob, max_cost = generate_random_graph(26, 0.1, 50)
-        graphs.append(gm)
-        edge_probs.append(edge_prob)
-        max_costs.append(max_cost)
-        if save_graphs:
-            graphs[i].save_to_file(f"out/graphs/{i}.in", overwrite=True)
-        if save_plots:
-            graphs[i].save_plot(f"out/plots/{i}.png", overwrite=True)
-
-    print("Running DV on all graphs...")
-    for i in tqdm(range(0, n)):
-        # Silence the output of dv
-        original_stdout = sys.stdout
-        try:
-            sys.stdout = open(os.devnull, 'w')
-            parse = get_parse_wrapper(graphs[i])
-            parse("dv " + random.choice(list(graphs[i].graph.nodes)))
-        finally:
-            sys.stdout = original_stdout
-
-    print("Running DLS on all graphs...")
-    for i in tqdm(range(0, n)):
-        # Silence the output of dv
-        original_stdout = sys.stdout
-        try:
-            sys.stdout = open(os.devnull, 'w')
-            parse = get_parse_wrapper(graphs[i])
-            parse("dls " + random.choice(list(graphs[i].graph.nodes)))
-        finally:
-            sys.stdout = original_stdout
-
-    print("Running ls on all graphs...")
-    for i in tqdm(range(0, n)):
-        # Silence the output of dv
-        original_stdout = sys.stdout
-        try:
-            sys.stdout = open(os.devnull, 'w')
-            parse = get_parse_wrapper(graphs[i])
-            parse("ls " + random.choice(list(graphs[i].graph.nodes)))
-        finally:
-            sys.stdout = original_stdout
-    
-    print("Getting centrality of graphs...")
-    centralities = []
-    for i in tqdm(range(0, n)):
-        centralities.append(brandes_centrality(graphs[i]))
-        
-    # Get all the statistics of all the graphs
-    print("Aggregating results...")
-    rows = []
-
-    for i in tqdm(range(0, n)):
-        graph_manager = graphs[i]
-        max_node, min_node, avg_len, dijkstra_len = average_shortest_path(
-            graph_manager.graph
-        )
-        num_nodes = graphs[i].graph.number_of_nodes()
-        num_edges = graphs[i].graph.number_of_edges()
-        edge_ratio = num_edges / num_nodes
-        node_ratio = (num_nodes / num_edges) if num_edges != 0 else 0
-        centrality = centralities[i]
-        max_centrality = max(centrality.values())
-        mean_centrality = sum(centrality.values())/len(centrality)
-
-        rows.append({
-            "max_sp": dijkstra_len[max_node],
-            "min_sp": dijkstra_len[min_node],
-            "avg_sp": avg_len,
-            "nodes": num_nodes,
-            "edges": num_edges,
-            "edge_ratio": edge_ratio,
-            "node_ratio": node_ratio,
-            "edge_prob": edge_probs[i],
-            "max_cost": max_costs[i],
-            "max_b_cent": max_centrality,
-            "mean_b_cent": mean_centrality,
-            **graph_manager.runs,
-        })
-
-    df = pd.DataFrame(rows)
-    print(df)
-    
+    # Only imported when gathering statistics, they take a long time to load
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+    from tqdm import tqdm
+
+    os.makedirs(out_dir, exist_ok=True)
+    csv_path = os.path.join(out_dir, "statistics.csv")
+    checkpoint_path = os.path.join(out_dir, "checkpoint.json")
+
+    start = 0
+    accumulator: OnlineCorrelation | None = None
+    checkpoint = None
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint["seed"] != seed:
+            print(f"Checkpoint was made with seed {checkpoint['seed']}, not {seed}. Not resuming.")
+            return
+        # The rows the checkpoint accounts for must still be there
+        if not os.path.exists(csv_path):
+            print(f"{csv_path} is missing, so the checkpoint cannot be resumed. Starting from scratch.")
+            checkpoint = None
+        elif os.path.getsize(csv_path) < checkpoint["csv_bytes"]:
+            print(f"{csv_path} is shorter than at the checkpoint, so it cannot be resumed. Starting from scratch.")
+            checkpoint = None
+    if checkpoint is not None:
+        start = checkpoint["done"]
+        accumulator = OnlineCorrelation.from_json(checkpoint["correlation"])
+        # Drop any rows written after the checkpoint
+        with open(csv_path, "r+") as f:
+            f.truncate(checkpoint["csv_bytes"])
+        print(f"Resuming from graph {start}.")
+    elif os.path.exists(csv_path):
+        os.remove(csv_path)
+
+    cache = ResultCache(os.path.join(out_dir, "cache.sqlite"), cache_bytes) if use_cache else None
+
+    print("Gathering statistics...")
+    pending: list[dict[str, float]] = []
+    for i in tqdm(range(start, n), initial=start, total=n):
+        row = evaluate_random_graph(i, seed, save_graphs, save_plots, cache)
+        if accumulator is None:
+            accumulator = OnlineCorrelation(list(row.keys()))
+        accumulator.update(row)
+        pending.append(row)
+
+        if len(pending) == chunk_size or i == n - 1:
+            new_file = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+            with open(csv_path, "a", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=accumulator.columns)
+                if new_file:
+                    writer.writeheader()
+                writer.writerows(pending)
+            pending = []
+            _save_checkpoint(
+                checkpoint_path,
+                {
+                    "seed": seed,
+                    "done": i + 1,
+                    "csv_bytes": os.path.getsize(csv_path),
+                    "correlation": accumulator.to_json(),
+                },
+            )
+
+    if cache is not None:
+        print("Result cache:")
+        cache.print_report()
+        cache.close()
+
+    if accumulator is None or accumulator.count == 0:
+        print("No graphs were evaluated.")
+        return
+
+    print(f"Wrote {accumulator.count} rows to {csv_path}")
+
     # Calculate correlation matrix
-    correlation_matrix = df.corr()
+    correlation_matrix = pd.DataFrame(
+        accumulator.correlation(), index=accumulator.columns, columns=accumulator.columns
+    )
     print("\nCorrelation Matrix:")
     print(correlation_matrix)
-    
-    directory = os.path.dirname("out/_")
-
-    if directory:
-        os.makedirs(directory, exist_ok=True)
 
-    # Corr heatmap     
+    # Corr heatmap
     plt.figure(figsize=(12, 10))
-    sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm", center=0, 
+    sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm", center=0,
                 square=True, linewidths=1)
     plt.title("Correlation Matrix of Graph Statistics")
     plt.tight_layout()
-    plt.savefig("out/correlation_heatmap.png", dpi=300)
+    plt.savefig(os.path.join(out_dir, "correlation_heatmap.png"), dpi=300)
+    plt.close()
     # plt.show()
-    directory = os.path.dirname("out/pairplots/_")
-
-    if directory:
-        os.makedirs(directory, exist_ok=True)
-    # Create scatter plots for top correlations
-    for col1 in df.columns:
-        for col2 in df.columns:
+    pairplot_dir = os.path.join(out_dir, "pairplots")
+    os.makedirs(pairplot_dir, exist_ok=True)
+    # Create scatter plots for top correlations, reading only the two columns needed
+    columns = accumulator.columns
+    for col1 in columns:
+        for col2 in columns:
             if col1 < col2:
+                df = pd.read_csv(csv_path, usecols=[col1, col2])
                 plt.figure(figsize=(12, 10))
                 plt.scatter(df[col1], df[col2], alpha=0.6)
                 plt.xlabel(col1)
                 plt.ylabel(col2)
                 plt.title(f'{col1} vs {col2}')
                 plt.tight_layout()
-                plt.savefig(f'out/pairplots/scatter_{col1}_vs_{col2}.png', dpi=300)
+                plt.savefig(os.path.join(pairplot_dir, f'scatter_{col1}_vs_{col2}.png'), dpi=300)
                 plt.close()
-            
+
+
 if __name__ == "__main__":
     # main()
     # randomgraph = generate_random_graph(26, 0.075, 50)
@@ -0,0 +1,257 @@
+import os
+import queue
+import sys
+import threading
+import time
+from typing import IO
+
+from console import match_edge
+from graph_manager import GraphManager
+from metrics import percentile
+from routing import dijkstra, print_vias
+
+# (node1, node2, cost). A cost of None removes the edge.
+EdgeUpdate = tuple[str, str, int | None]
+
+DEFAULT_WINDOW_MS = 50
+
+# How long to wait before checking a followed file for new lines again
+POLL_SECONDS = 0.05
+
+
+def parse_update(line: str) -> EdgeUpdate | None:
+    """Gets the edge update in a line of the form `X Y {cost}` or `X Y -`, or None if it is not in that form.
+    Lines follow the same rules as edges typed into the console or loaded with `file`."""
+    node1, node2, cost = match_edge(line.strip())
+    if node1 is None or node2 is None:
+        return None
+    return node1, node2, None if cost == "-" else int(cost)  # type: ignore
+
+
+def _read_lines(file: IO[str], lines: queue.Queue, tail: bool, stop: threading.Event) -> None:
+    # Runs in its own thread, so the main loop can wait for lines with a timeout.
+    # Puts (arrival time, line), then None once the stream ends or stop is set.
+    partial = ""
+    while not stop.is_set():
+        try:
+            line = file.readline()
+        except ValueError:
+            break  # The file was closed after following stopped
+        if not line:
+            if not tail:
+                break
+            stop.wait(POLL_SECONDS)  # Wait for the file to grow
+            continue
+        # A tailed file can end halfway through a line that is still being written
+        partial += line
+        if partial.endswith("\n") or not tail:
+            lines.put((time.perf_counter(), partial))
+            partial = ""
+    lines.put(None)
+
+
+class StreamFollower:
+    """Applies a stream of edge updates to a graph in batches.
+
+    A batch starts with the first update that arrives and takes every update
+    that arrives within the window after it. Updates to the same link within a
+    batch are coalesced, so only the last one is applied. Each batch is one edit,
+    and the routing tables of the subscribed nodes are refreshed once per batch.
+    """
+
+    def __init__(
+        self,
+        graph_manager: GraphManager,
+        window_ms: float = DEFAULT_WINDOW_MS,
+        subscribed: tuple[str, ...] = (),
+    ):
+        self.graph_manager = graph_manager
+        self.window = window_ms / 1000
+        self.tables: dict[str, list[tuple[float, str, str]]] = {node: [] for node in subscribed}
+
+        self.received = 0
+        self.applied = 0
+        self.batches = 0
+        self.invalid = 0
+        # Seconds from the arrival of each update until the tables it affects were refreshed
+        self.latencies: list[float] = []
+        self.busy = 0.0
+        self.first_arrival: float | None = None
+        self.last_refresh: float | None = None
+
+        self._held: tuple[float, str] | None = None  # Arrived too late for the last batch
+
+    def _next_line(self, lines: queue.Queue, timeout: float | None) -> tuple[float, str] | None:
+        if self._held is not None:
+            line, self._held = self._held, None
+            return line
+        return lines.get(timeout=timeout)
+
+    def next_batch(self, lines: queue.Queue) -> tuple[list[tuple[float, EdgeUpdate]], bool]:
+        """Waits for the next batch of updates.
+
+        Returns:
+            tuple: (the (arrival time, update) of each update in the batch, whether the stream ended)
+        """
+        batch: list[tuple[float, EdgeUpdate]] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.perf_counter(), 0)
+            try:
+                # Poll with a timeout while nothing has arrived, so Ctrl+C is handled promptly
+                item = self._next_line(lines, timeout if timeout is not None else POLL_SECONDS)
+            except queue.Empty:
+                if deadline is None:
+                    continue
+                return batch, False
+            if item is None:
+                return batch, True
+
+            arrival, line = item
+            if deadline is not None and arrival > deadline:
+                self._held = item  # Starts the next batch
+                return batch, False
+            update = parse_update(line)
+            if update is None:
+                if line.strip():
+                    self.invalid += 1
+                continue
+            if deadline is None:
+                deadline = arrival + self.window
+            batch.append((arrival, update))
+
+    def apply(self, batch: list[tuple[float, EdgeUpdate]]) -> list[str]:
+        """Applies a batch of updates as one edit and refreshes the subscribed tables.
+
+        Returns:
+            list[str]: The subscribed nodes whose routing table changed.
+        """
+        start = time.perf_counter()
+        if self.first_arrival is None:
+            self.first_arrival = batch[0][0]
+
+        # Only the last update to each link counts
+        latest: dict[tuple[str, str], EdgeUpdate] = {}
+        for _, (node1, node2, cost) in batch:
+            link = (node1, node2) if node1 <= node2 else (node2, node1)
+            latest.pop(link, None)  # Keep the order of the last updates
+            latest[link] = (node1, node2, cost)
+        self.applied += self.graph_manager.apply_batch(list(latest.values()))
+
+        changed = []
+        graph = self.graph_manager.graph
+        for node, table in self.tables.items():
+            new_table = dijkstra(node, graph) if node in graph else []
+            if new_table != table:
+                self.tables[node] = new_table
+                changed.append(node)
+
+        end = time.perf_counter()
+        self.received += len(batch)
+        self.batches += 1
+        self.latencies.extend(end - arrival for arrival, _ in batch)
+        self.busy += end - start
+        self.last_refresh = end
+        return changed
+
+    def follow(self, file: IO[str], tail: bool = True, on_batch=None) -> None:
+        """Applies the updates in file until the stream ends.
+
+        Args:
+            tail (bool, optional): Flag for whether to keep waiting for new lines at the end of the file, like `tail -f`. Defaults to True.
+            on_batch (Callable, optional): Called as on_batch(updates in the batch, subscribed nodes whose table changed) after each batch.
+        """
+        lines: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        reader = threading.Thread(target=_read_lines, args=(file, lines, tail, stop), daemon=True)
+        reader.start()
+        try:
+            ended = False
+            while not ended:
+                batch, ended = self.next_batch(lines)
+                if batch:
+                    changed = self.apply(batch)
+                    if on_batch is not None:
+                        on_batch(len(batch), changed)
+        finally:
+            # Lets the reader finish before the caller closes file. Reads from stdin or a FIFO
+            # can block until the writer sends more, so it is not waited on for long.
+            stop.set()
+            reader.join(POLL_SECONDS)
+
+    def report(self) -> dict[str, float]:
+        """Gets the number of updates and batches, the update rates, and the update-to-table latency in milliseconds."""
+        latencies = sorted(self.latencies)
+        elapsed = 0.0
+        if self.first_arrival is not None and self.last_refresh is not None:
+            elapsed = self.last_refresh - self.first_arrival
+        return {
+            "received": self.received,
+            "applied": self.applied,
+            "batches": self.batches,
+            "invalid": self.invalid,
+            "updates_per_second": self.received / elapsed if elapsed > 0 else 0.0,
+            "capacity_per_second": self.received / self.busy if self.busy > 0 else 0.0,
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "max": latencies[-1] * 1000 if latencies else 0.0,
+        }
+
+
+def follow_stream(
+    graph_manager: GraphManager,
+    file_path: str,
+    window_ms: float = DEFAULT_WINDOW_MS,
+    subscribed: tuple[str, ...] = (),
+    tail: bool = True,
+) -> StreamFollower:
+    """Follows updates from a file, a FIFO, or stdin if file_path is `-`, printing each batch
+    and the subscribed tables that changed. Stops when the stream ends or on Ctrl+C.
+
+    Args:
+        tail (bool, optional): Flag for whether to keep waiting for new lines at the end of a regular file. Defaults to True.
+    """
+    follower = StreamFollower(graph_manager, window_ms, subscribed)
+
+    def on_batch(updates: int, changed: list[str]) -> None:
+        print(
+            f"Batch {follower.batches}: applied {updates} update{'s' if updates != 1 else ''}, "
+            f"tables refreshed {follower.latencies[-updates] * 1000:.1f} ms after the first arrived"
+        )
+        for node in changed:
+            print_vias(follower.tables[node], node)
+
+    graph_manager.temp_mute()  # Every edge change would otherwise print
+    journal = graph_manager.journal
+    graph_manager.journal = False  # The whole stream is one undo step, however long it runs
+    try:
+        if file_path == "-":
+            follower.follow(sys.stdin, tail=False, on_batch=on_batch)
+        else:
+            # Only regular files can grow after their end is reached, FIFOs end when the writer closes
+            with open(file_path, "r") as file:
+                follower.follow(file, tail=tail and os.path.isfile(file_path), on_batch=on_batch)
+    except KeyboardInterrupt:
+        print("Stopped following.")
+    finally:
+        graph_manager.journal = journal
+        graph_manager.temp_unmute()
+    return follower
+
+
+def print_report(report: dict[str, float]) -> None:
+    print(
+        f"{report['received']} update{'s' if report['received'] != 1 else ''} in "
+        f"{report['batches']} batch{'es' if report['batches'] != 1 else ''}, "
+        f"{report['applied']} edge changes after coalescing"
+    )
+    if report["invalid"]:
+        print(f"Skipped {report['invalid']} lines that are not edge updates")
+    print(
+        f"{report['updates_per_second']:.0f} updates/s sustained, "
+        f"{report['capacity_per_second']:.0f} updates/s while applying"
+    )
+    print(
+        f"Update-to-table latency: p50 {report['p50']:.2f} ms, "
+        f"p95 {report['p95']:.2f} ms, max {report['max']:.2f} ms"
+    )
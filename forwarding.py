@@ -0,0 +1,151 @@
+import numpy as np
+import networkx as nx
+
+from graph_manager import GraphManager
+from routing import dijkstra
+
+# Distance stored for unreachable pairs
+UNREACHABLE = -1
+
+
+class ForwardingTable:
+    """Compiled forwarding tables (FIBs) for every router in a graph.
+
+    Routers and destinations are numbered by their position in `nodes`. The next
+    hops of router u towards destination d are every neighbor on a shortest
+    path, stored as `hops[offsets[u * V + d] : offsets[u * V + d + 1]]`.
+    """
+
+    def __init__(self, graph: nx.Graph, version: int = 0):
+        self.version = version
+        self.nodes: list[str] = list(graph.nodes)
+        self.index: dict[str, int] = {node: i for i, node in enumerate(self.nodes)}
+        V = len(self.nodes)
+
+        self.dist = np.full((V, V), UNREACHABLE, dtype=np.int64)
+        # depth[d, v] is the number of hops from v to d in the Dijkstra tree of d
+        depth = np.zeros((V, V), dtype=np.int64)
+        for i, source in enumerate(self.nodes):
+            results = dijkstra(source, graph)
+            for distance, node, _ in results:
+                self.dist[i, self.index[node]] = distance
+            for node, hops in _tree_depths(results).items():
+                depth[i, self.index[node]] = hops
+
+        # A neighbor v of u is a next hop towards d iff cost(u, v) + dist(v, d) == dist(u, d).
+        # With zero cost edges that holds in both directions, so v must also be
+        # closer to d in the tree, which rules out forwarding loops.
+        counts = np.zeros((V, V), dtype=np.int64)
+        per_router_hops = []
+        for u, router in enumerate(self.nodes):
+            neighbors = np.array(
+                [self.index[v] for v in graph.adj[router]], dtype=np.int32
+            )
+            costs = np.array(
+                [attrs["weight"] for attrs in graph.adj[router].values()],
+                dtype=np.int64,
+            )
+            if len(neighbors) == 0:
+                per_router_hops.append(np.empty(0, dtype=np.int32))
+                continue
+            via = self.dist[neighbors] + costs[:, None]
+            tight = (
+                (self.dist[neighbors] != UNREACHABLE)
+                & (via == self.dist[u])
+                & ((costs[:, None] > 0) | (depth.T[neighbors] < depth.T[u]))
+            )
+            tight[:, u] = False  # Nothing to forward when already at the destination
+
+            # Transpose so the next hops come out grouped by destination
+            destinations, which = np.nonzero(tight.T)
+            counts[u] = np.bincount(destinations, minlength=V)
+            per_router_hops.append(neighbors[which])
+
+        self.offsets = np.zeros(V * V + 1, dtype=np.int64)
+        np.cumsum(counts.ravel(), out=self.offsets[1:])
+        self.hops = (
+            np.concatenate(per_router_hops) if per_router_hops else np.empty(0, np.int32)
+        )
+
+    def next_hops(self, router: str, destination: str) -> list[str]:
+        """Gets every equal-cost next hop from router towards destination."""
+        pos = self.index[router] * len(self.nodes) + self.index[destination]
+        return [self.nodes[h] for h in self.hops[self.offsets[pos] : self.offsets[pos + 1]]]
+
+    def table(self, router: str) -> list[tuple[int, str, list[str]]]:
+        """Gets the forwarding table of router as [(cost, destination, next hops)], sorted by cost."""
+        u = self.index[router]
+        rows = []
+        for d, destination in enumerate(self.nodes):
+            if self.dist[u, d] == UNREACHABLE:
+                continue
+            rows.append((int(self.dist[u, d]), destination, self.next_hops(router, destination)))
+        rows.sort(key=lambda x: x[0])
+        return rows
+
+    def encode(self, packets: list[tuple[str, str]]) -> np.ndarray:
+        """Converts [(source, destination)] node names into the array used by forward."""
+        return np.array(
+            [(self.index[s], self.index[d]) for s, d in packets], dtype=np.int64
+        ).reshape(-1, 2)
+
+    def forward(self, packets: np.ndarray) -> tuple[np.ndarray, int]:
+        """Forwards every (source, destination) packet hop by hop, one FIB lookup
+        per packet per hop. Equal-cost next hops are picked by hashing the flow,
+        so every packet of a flow takes the same path.
+
+        Args:
+            packets (np.ndarray): Integer array of shape (N, 2) holding node indices. See encode.
+
+        Returns:
+            tuple: (hops: np.ndarray, lookups: int). hops[i] is the number of hops packet i took, or -1 if its destination is unreachable.
+        """
+        V = len(self.nodes)
+        src = packets[:, 0].astype(np.int64)
+        dst = packets[:, 1].astype(np.int64)
+        reachable = self.dist[src, dst] != UNREACHABLE
+        hops = np.where(reachable, 0, -1)
+
+        flow = (src * V + dst) * np.int64(0x9E3779B1)  # Knuth multiplicative hash
+        flow ^= flow >> 16
+
+        active = np.flatnonzero(reachable & (src != dst))
+        current = src[active]
+        lookups = 0
+        while active.size:
+            pos = current * V + dst[active]
+            start = self.offsets[pos]
+            count = self.offsets[pos + 1] - start
+            current = self.hops[start + flow[active] % count].astype(np.int64)
+            hops[active] += 1
+            lookups += active.size
+
+            arrived = current == dst[active]
+            active = active[~arrived]
+            current = current[~arrived]
+        return hops, lookups
+
+
+def _tree_depths(results: list[tuple[float, str, str]]) -> dict[str, int]:
+    # Number of hops from each node to the root along the Dijkstra tree
+    via = {node: v for _, node, v in results}
+    depths = {node: 0 for node, v in via.items() if v == "-"}
+    for node in via:
+        chain = []
+        while node not in depths:
+            chain.append(node)
+            node = via[node]
+        hops = depths[node]
+        for n in reversed(chain):
+            hops += 1
+            depths[n] = hops
+    return depths
+
+
+def compiled_table(graph_manager: GraphManager) -> ForwardingTable:
+    """Gets the forwarding tables for the current topology, recompiling them after edge changes."""
+    table = graph_manager.fib
+    if table is None or table.version != graph_manager.version:
+        table = ForwardingTable(graph_manager.graph, graph_manager.version)
+        graph_manager.fib = table
+    return table
@@ -1,8 +1,46 @@
+import contextlib
 import os
+from collections.abc import Callable, Iterator
+from copy import deepcopy
 
-import matplotlib.pyplot as plt
 import networkx as nx
 
+from dv_table import DistanceVectorTable
+from lsdb import LinkStateDatabase
+
+# (node1, node2, old cost, new cost, nodes created by the change). A cost of None means no edge.
+EdgeChange = tuple[str, str, int | None, int | None, tuple[str, ...]]
+
+# (node1, node2, old cost, new cost), as passed to the listeners
+ListenerChange = tuple[str, str, int | None, int | None]
+
+
+class Edit:
+    """A group of edge changes in the edit journal.
+
+    Every edit points to the edit before it, so branches share their common
+    history and a branch only costs memory for its own edits.
+    """
+
+    __slots__ = ("changes", "parent", "depth")
+
+    def __init__(self, changes: list[EdgeChange], parent: "Edit | None"):
+        self.changes = changes
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 1
+
+
+class Snapshot:
+    """A named point in the edit journal, along with the routing state at that point."""
+
+    def __init__(self, edit: Edit | None, graph_manager: "GraphManager"):
+        self.edit = edit
+        # Routing state is shared with the manager, which copies it before the next routing run
+        self.dvs = graph_manager.dvs
+        self.lsdb = graph_manager.lsdb
+        self.ls_state = graph_manager.ls_state
+        self.runs = dict(graph_manager.runs)
+
 
 class GraphManager:
     def __init__(self):
@@ -14,12 +52,51 @@ class GraphManager:
 
         self.runs = {"ls": 0, "dls": 0, "dv": 0}
 
-        self.dvs: dict[str, dict[str, int]] = {}
+        # Control-plane cost counters per algorithm, or None when they are not being counted
+        self.protocol_costs: dict[str, dict[str, int]] | None = None
+
+        self.dvs = DistanceVectorTable()
 
-        self.graphs: dict[str, nx.Graph] = {}
+        self.lsdb = LinkStateDatabase()
 
         self.ls_state = {}
 
+        # Bumped on every topology change so cached results can be invalidated
+        self.version = 0
+
+        self.route_potentials: dict = {}
+
+        self.k_paths: dict = {}  # (source, target) -> alternates.KShortestPaths, cleared when the graph changes
+
+        self.fib = None  # forwarding.ForwardingTable, compiled on demand
+
+        self.contraction = None  # contraction.ContractionHierarchy, built by route -c
+
+        self.landmarks = None  # landmarks.LandmarkOracle, built by estimate and route -l
+
+        # Edit journal for undo/redo and snapshots
+        self.head: Edit | None = None
+        self.redo_stack: list[Edit] = []
+        self.snapshots: dict[str, Snapshot] = {}
+        self._routing_state_shared = False
+        # When False, edits are merged into a single undo step that keeps one change per link,
+        # so long-running streams of edits use memory per link edited rather than per edit
+        self.journal = True
+        self._merged_edit: Edit | None = None
+        self._merged: dict[tuple[str, str], int] = {}  # link -> index of its change in _merged_edit
+
+        # Called as listener(changes) with the (node1, node2, old cost, new cost) of every edge
+        # after each topology change. A batch or an undo of several edges is one call.
+        self.listeners: list[Callable[[list[ListenerChange]], None]] = []
+
+        # link -> (node1, node2, cost) of the edits queued since begin(), or None outside a batch
+        self.pending: dict[tuple[str, str], tuple[str, str, int | None]] | None = None
+        self.queued = 0  # Edits queued in the open batch, before coalescing
+
+        self.betweenness = None  # centrality.DynamicBetweenness, created by centrality -d
+
+        self.pool = None  # shared_pool.SharedPool, started by stats -p or centrality -p
+
     def temp_mute(self) -> None:
         # Silence the verbosity, while keeping the previous mute state
         # This is so if verbose is already off, it won't enable it after unmuting
@@ -36,17 +113,278 @@ class GraphManager:
 
     def add_edge(self, node1: str, node2: str, cost: int):
         """Add or update an edge in the graph."""
-        self.graph.add_edge(node1, node2, weight=cost)
+        if self.pending is not None:
+            self._queue(node1, node2, cost)
+            self.vprint(f"Queued edge {node1}-{node2} with cost {cost}")
+            return
+        old = self._edge_cost(node1, node2)
+        created = tuple(node for node in (node1, node2) if node not in self.graph)
+        self._set_edge(node1, node2, cost)
+        if old != cost:
+            self._record([(node1, node2, old, cost, created)])
         self.vprint(f"Added/Updated edge {node1}-{node2} with cost {cost}")
 
     def remove_edge(self, node1: str, node2: str):
         # Possible improvement would be to make this return the removed edge
+        if self.pending is not None:
+            if self._pending_cost(node1, node2) is None:
+                self.vprint(f"Edge {node1}-{node2} not found.")
+                return
+            self._queue(node1, node2, None)
+            self.vprint(f"Queued removal of edge {node1}-{node2}")
+            return
         if self.graph.has_edge(node1, node2):
-            self.graph.remove_edge(node1, node2)
+            old = self._edge_cost(node1, node2)
+            self._set_edge(node1, node2, None)
+            self._record([(node1, node2, old, None, ())])
             self.vprint(f"Removed edge {node1}-{node2}")
         else:
             self.vprint(f"Edge {node1}-{node2} not found.")
 
+    @property
+    def in_batch(self) -> bool:
+        return self.pending is not None
+
+    def begin(self) -> None:
+        """Starts a batch. Edge edits are queued instead of applied until commit() or rollback().
+
+        Raises:
+            RuntimeError: If a batch is already open.
+        """
+        if self.pending is not None:
+            raise RuntimeError("A batch is already open.")
+        self.pending = {}
+        self.queued = 0
+
+    def commit(self) -> int:
+        """Applies the queued edits as one edit, with one version bump and one call to each listener.
+        Only the last edit to each link counts, and edits that leave a link as it was are dropped.
+        Returns the number of edges that changed.
+
+        Raises:
+            RuntimeError: If no batch is open.
+        """
+        if self.pending is None:
+            raise RuntimeError("No batch is open.")
+        updates = list(self.pending.values())
+        self.pending = None
+        return self.apply_batch(updates)
+
+    def rollback(self) -> int:
+        """Discards the queued edits. Returns how many there were.
+
+        Raises:
+            RuntimeError: If no batch is open.
+        """
+        if self.pending is None:
+            raise RuntimeError("No batch is open.")
+        self.pending = None
+        return self.queued
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator["GraphManager"]:
+        """Queues the edge edits made in a with block, committing them at the end of the block,
+        or discarding them if it raises."""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def _queue(self, node1: str, node2: str, cost: int | None) -> None:
+        link = (node1, node2) if node1 <= node2 else (node2, node1)
+        self.pending.pop(link, None)  # type: ignore # Keep the order of the last edits
+        self.pending[link] = (node1, node2, cost)  # type: ignore
+        self.queued += 1
+
+    def _check_no_batch(self) -> None:
+        if self.pending is not None:
+            raise RuntimeError("Commit or roll back the open batch first.")
+
+    def _pending_cost(self, node1: str, node2: str) -> int | None:
+        # The cost the edge will have once the open batch is committed
+        link = (node1, node2) if node1 <= node2 else (node2, node1)
+        if link in self.pending:  # type: ignore
+            return self.pending[link][2]  # type: ignore
+        return self._edge_cost(node1, node2)
+
+    def apply_batch(self, updates: list[tuple[str, str, int | None]]) -> int:
+        """Applies several edge updates as a single edit, so one undo reverts all of them.
+        A cost of None removes the edge. Returns the number of edges that changed.
+        While a batch is open, the updates are queued instead, and the number queued is returned."""
+        if self.pending is not None:
+            for node1, node2, cost in updates:
+                self._queue(node1, node2, cost)
+            self.vprint(f"Queued {len(updates)} edge update{'s' if len(updates) != 1 else ''}")
+            return len(updates)
+        changes: list[EdgeChange] = []
+        nodes = set(self.graph.nodes)
+        for node1, node2, cost in updates:
+            old = self._edge_cost(node1, node2)
+            if old == cost:
+                continue
+            created = tuple(node for node in (node1, node2) if node not in nodes)
+            nodes.update(created)
+            changes.append((node1, node2, old, cost, created))
+        if changes:
+            self._set_edges([(node1, node2, new) for node1, node2, _, new, _ in changes])
+            self._record(changes)
+        self.vprint(f"Applied {len(changes)} edge change{'s' if len(changes) != 1 else ''}")
+        return len(changes)
+
+    def _edge_cost(self, node1: str, node2: str) -> int | None:
+        if self.graph.has_edge(node1, node2):
+            return self.graph[node1][node2]["weight"]
+        return None
+
+    def _set_edge(self, node1: str, node2: str, cost: int | None) -> None:
+        self._set_edges([(node1, node2, cost)])
+
+    def _set_edges(self, edges: list[tuple[str, str, int | None]]) -> None:
+        # Every topology change goes through here, including undo/redo and checkout
+        changes: list[ListenerChange] = []
+        for node1, node2, cost in edges:
+            old = self._edge_cost(node1, node2)
+            if cost is None:
+                self.graph.remove_edge(node1, node2)
+            else:
+                self.graph.add_edge(node1, node2, weight=cost)
+            changes.append((node1, node2, old, cost))
+        self.version += 1
+        for listener in self.listeners:
+            listener(changes)
+
+    def _record(self, changes: list[EdgeChange]) -> None:
+        self.redo_stack.clear()
+        if self.journal:
+            self.head = Edit(changes, self.head)
+            return
+        if self._merged_edit is None or self._merged_edit is not self.head:
+            self.head = self._merged_edit = Edit([], self.head)
+            self._merged = {}
+        merged = self._merged_edit.changes
+        for node1, node2, old, new, created in changes:
+            link = (node1, node2) if node1 <= node2 else (node2, node1)
+            if link not in self._merged:
+                self._merged[link] = len(merged)
+                merged.append((node1, node2, old, new, created))
+                continue
+            # Keep the cost from before the first merged change, so undo restores it
+            index = self._merged[link]
+            first = merged[index]
+            merged[index] = (first[0], first[1], first[2], new, first[4] + created)
+
+    def _revert(self, edit: Edit) -> None:
+        changes = list(reversed(edit.changes))
+        # Merged edits can hold links that ended up as they started, which only created nodes
+        self._set_edges([(node1, node2, old) for node1, node2, old, new, _ in changes if old != new])
+        for _, _, _, _, created in changes:
+            for node in created:
+                if self.graph.degree(node) == 0:
+                    self.graph.remove_node(node)
+
+    def _reapply(self, edit: Edit) -> None:
+        self._set_edges([(node1, node2, new) for node1, node2, old, new, _ in edit.changes if old != new])
+        for _, _, _, _, created in edit.changes:
+            self.graph.add_nodes_from(created)
+
+    def undo(self) -> bool:
+        """Reverts the last edit. Returns False if there is nothing to undo.
+
+        Raises:
+            RuntimeError: If a batch is open.
+        """
+        self._check_no_batch()
+        if self.head is None:
+            return False
+        self._revert(self.head)
+        self.redo_stack.append(self.head)
+        self.head = self.head.parent
+        return True
+
+    def redo(self) -> bool:
+        """Reapplies the last undone edit. Returns False if there is nothing to redo.
+
+        Raises:
+            RuntimeError: If a batch is open.
+        """
+        self._check_no_batch()
+        if not self.redo_stack:
+            return False
+        edit = self.redo_stack.pop()
+        self._reapply(edit)
+        self.head = edit
+        return True
+
+    def snapshot(self, name: str) -> None:
+        """Saves the current graph and routing state under name.
+
+        Only a pointer into the edit journal is stored, and the routing state is
+        shared until a routing algorithm next runs, so snapshots are cheap.
+        """
+        self.snapshots[name] = Snapshot(self.head, self)
+        self._routing_state_shared = True
+        self._merged_edit = None  # Later edits must not change the edit the snapshot points to
+
+    def checkout(self, name: str) -> None:
+        """Restores the graph and routing state saved by snapshot(name).
+
+        The graph is moved by undoing edits back to the common ancestor of the
+        current state and the snapshot, then redoing the snapshot's own edits.
+        New edits made after a checkout start a new branch.
+
+        Raises:
+            RuntimeError: If a batch is open.
+        """
+        self._check_no_batch()
+        snapshot = self.snapshots[name]
+        current, target = self.head, snapshot.edit
+        forward: list[Edit] = []
+        while _depth(current) > _depth(target):
+            self._revert(current)  # type: ignore
+            current = current.parent  # type: ignore
+        while _depth(target) > _depth(current):
+            forward.append(target)  # type: ignore
+            target = target.parent  # type: ignore
+        while current is not target:
+            self._revert(current)  # type: ignore
+            current = current.parent  # type: ignore
+            forward.append(target)  # type: ignore
+            target = target.parent  # type: ignore
+        for edit in reversed(forward):
+            self._reapply(edit)
+
+        self.head = snapshot.edit
+        self.redo_stack.clear()
+        self.dvs = snapshot.dvs
+        self.lsdb = snapshot.lsdb
+        self.ls_state = snapshot.ls_state
+        self.runs = dict(snapshot.runs)
+        self._routing_state_shared = True
+
+    def detach_routing_state(self) -> None:
+        """Copies routing state that is shared with a snapshot, so it can be changed.
+        Routing algorithms call this before they run."""
+        if self._routing_state_shared:
+            self.dvs = deepcopy(self.dvs)
+            self.lsdb = deepcopy(self.lsdb)
+            self.ls_state = deepcopy(self.ls_state)
+            self._routing_state_shared = False
+
+    def count_protocol_costs(self, algorithm: str, state_entries: int | None = None, **counts: int) -> None:
+        """Adds counts to the protocol cost counters of algorithm. Only call it when protocol_costs is not None.
+
+        Args:
+            state_entries (int | None, optional): Routing table entries held per router after this round. Replaces the previous value.
+        """
+        costs = self.protocol_costs.setdefault(algorithm, {})  # type: ignore
+        for name, count in counts.items():
+            costs[name] = costs.get(name, 0) + count
+        if state_entries is not None:
+            costs["state_entries"] = state_entries
+
     def list_edges(self):
         """Print edges with costs."""
         if not self.graph.edges:
@@ -61,6 +399,9 @@ class GraphManager:
         Args:
             file_name (str, optional): The name of the file to save to. Will not be saved if no name is provided. Defaults to "".
         """
+        # Imported here since matplotlib is slow to load and only needed for plotting
+        import matplotlib.pyplot as plt
+
         pos = nx.spring_layout(self.graph)
 
         weights = nx.get_edge_attributes(self.graph, "weight")
@@ -99,6 +440,8 @@ class GraphManager:
 
         # Exact same thing as plot, but doesn't show the plot.
         # In fact, it is DUPLICATE CODE.
+        import matplotlib.pyplot as plt
+
         pos = nx.spring_layout(self.graph)
 
         weights = nx.get_edge_attributes(self.graph, "weight")
@@ -110,6 +453,8 @@ class GraphManager:
             plt.close()
 
     def tree(self, root: str) -> None:
+        import matplotlib.pyplot as plt
+
         from routing import dijkstra
 
         dijkstra_results = dijkstra(root, self.graph)
@@ -156,3 +501,7 @@ class GraphManager:
         with open(filename, "w") as file:
             for u, v, data in self.graph.edges(data=True):
                 file.write(f"{u} {v} {data['weight']}\n")
+
+
+def _depth(edit: Edit | None) -> int:
+    return edit.depth if edit is not None else 0
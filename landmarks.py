@@ -0,0 +1,105 @@
+import numpy as np
+import networkx as nx
+
+from graph_manager import GraphManager
+from routing import dijkstra
+
+DEFAULT_LANDMARKS = 8
+
+
+class LandmarkOracle:
+    """Distance estimates between any two nodes from their distances to a few landmarks (ALT).
+
+    For any landmark L, the triangle inequality gives
+    |d(L, u) - d(L, v)| <= d(u, v) <= d(u, L) + d(L, v), so the bounds only need
+    one distance array per landmark. The lower bounds never overestimate, so
+    they also work as A* potentials.
+    """
+
+    def __init__(
+        self,
+        graph: nx.Graph,
+        num_landmarks: int = DEFAULT_LANDMARKS,
+        version: int = 0,
+        landmarks: list[str] | None = None,
+    ):
+        # landmarks can be reused from before an edge change, otherwise they are picked by farthest-point selection
+        self.version = version
+        self.nodes: list[str] = list(graph.nodes)
+        self.index: dict[str, int] = {node: i for i, node in enumerate(self.nodes)}
+        self.graph = graph
+
+        if landmarks is not None and all(node in self.index for node in landmarks):
+            self.landmarks = list(landmarks)
+            self.dist = np.array([self._distances(node) for node in self.landmarks]).reshape(
+                len(self.landmarks), len(self.nodes)
+            )
+        else:
+            self._select(min(num_landmarks, len(self.nodes)))
+
+    def _distances(self, source: str) -> np.ndarray:
+        row = np.full(len(self.nodes), np.inf)
+        for distance, node, _ in dijkstra(source, self.graph):
+            row[self.index[node]] = distance
+        return row
+
+    def _select(self, k: int) -> None:
+        # Farthest-point selection: each landmark is the node farthest from every
+        # landmark picked so far. Unreachable nodes count as farthest, so every
+        # component gets a landmark while there are landmarks left.
+        self.landmarks = []
+        rows = []
+        if k == 0:
+            self.dist = np.empty((0, len(self.nodes)))
+            return
+        # The node farthest from an arbitrary start lies on the edge of the graph
+        closest = self._distances(self.nodes[0])
+        for _ in range(k):
+            farthest = int(np.argmax(closest))
+            if rows and closest[farthest] == 0:
+                break  # Every node is a landmark or no farther than a landmark
+            self.landmarks.append(self.nodes[farthest])
+            rows.append(self._distances(self.nodes[farthest]))
+            closest = rows[-1] if len(rows) == 1 else np.minimum(closest, rows[-1])
+        self.dist = np.array(rows)
+
+    def bounds(self, source: str, target: str) -> tuple[float, float]:
+        """Gets (lower bound, upper bound) on the distance from source to target, in O(landmarks).
+        Both are inf if a landmark shows they are in different components."""
+        a = self.dist[:, self.index[source]]
+        b = self.dist[:, self.index[target]]
+        if source == target:
+            return 0, 0
+        if np.any(np.isfinite(a) != np.isfinite(b)):
+            return float("inf"), float("inf")
+        reaches = np.isfinite(a)
+        if not reaches.any():
+            return 0, float("inf")  # No landmark in their component
+        lower = float(np.abs(a[reaches] - b[reaches]).max())
+        upper = float((a[reaches] + b[reaches]).min())
+        return lower, upper
+
+    def potentials(self, target: str) -> dict[str, float]:
+        """Gets A* potentials towards target: the lower bound from every node. Nodes known not to reach target are inf."""
+        t = self.dist[:, self.index[target]]
+        with np.errstate(invalid="ignore"):
+            gaps = np.abs(self.dist - t[:, None])
+        # inf - inf is nan where neither reaches the landmark, which tells nothing
+        gaps = np.where(np.isnan(gaps), 0, gaps)
+        lower = gaps.max(axis=0, initial=0)
+        return dict(zip(self.nodes, lower.tolist()))
+
+
+def landmark_oracle(graph_manager: GraphManager) -> LandmarkOracle:
+    """Gets the landmark oracle for the current topology, refreshing its distances after edge changes.
+
+    The same landmarks are kept across edge changes while they all still exist.
+    """
+    oracle = graph_manager.landmarks
+    if oracle is None or oracle.version != graph_manager.version:
+        previous = oracle.landmarks if oracle is not None else None
+        oracle = LandmarkOracle(
+            graph_manager.graph, version=graph_manager.version, landmarks=previous
+        )
+        graph_manager.landmarks = oracle
+    return oracle
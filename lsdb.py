@@ -0,0 +1,145 @@
+from collections.abc import Iterable
+
+import networkx as nx
+
+Link = tuple[str, str]
+
+
+def _link(node1: str, node2: str) -> Link:
+    return (node1, node2) if node1 <= node2 else (node2, node1)
+
+
+def _bits(mask: int) -> Iterable[int]:
+    # Yields the index of every set bit
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class LinkStateDatabase:
+    """Link-state advertisements (LSAs) shared by every router.
+
+    Each LSA is stored once, indexed by an LSA ID. A router's knowledge is a
+    bitset over LSA IDs (bit i is set if it has heard LSA i), so the whole
+    database takes O(E) memory plus one bit per router per LSA, instead of a
+    full graph per router.
+    """
+
+    def __init__(self):
+        self.lsas: list[tuple[str, str, int, int] | None] = []  # id -> (node1, node2, cost, sequence)
+        self.current: dict[Link, int] = {}  # link -> id of its newest LSA
+        self.superseded: set[int] = set()  # ids of LSAs replaced by a newer one for the same link
+        self.known: dict[str, int] = {}  # router -> bitset of LSA ids
+        self.free_ids: list[int] = []
+        self.sequence = 0
+        self._view: tuple[str, int, nx.Graph] | None = None  # Last materialized view
+
+    def _originate(self, node1: str, node2: str, cost: int) -> int:
+        # Returns the id of the LSA for this link and cost, creating it if the cost is new
+        link = _link(node1, node2)
+        old = self.current.get(link)
+        if old is not None and self.lsas[old][2] == cost:  # type: ignore
+            return old
+
+        self.sequence += 1
+        lsa = (*link, cost, self.sequence)
+        if self.free_ids:
+            new = self.free_ids.pop()
+            self.lsas[new] = lsa
+        else:
+            new = len(self.lsas)
+            self.lsas.append(lsa)
+        if old is not None:
+            self.superseded.add(old)
+        self.current[link] = new
+        return new
+
+    def _free(self, lsa_id: int) -> None:
+        self.lsas[lsa_id] = None
+        self.free_ids.append(lsa_id)
+        self._view = None  # The id may be reused for another LSA
+
+    def sync(self, graph: nx.Graph) -> None:
+        """Has every router advertise its own links, and purges links that no longer exist."""
+        for node in graph.nodes:
+            knowledge = self.known.get(node, 0)
+            for neighbor, attrs in graph.adj[node].items():
+                knowledge |= 1 << self._originate(node, neighbor, attrs["weight"])
+            self.known[node] = knowledge
+
+        purged = 0
+        for link in [link for link in self.current if not graph.has_edge(*link)]:
+            lsa_id = self.current.pop(link)
+            purged |= 1 << lsa_id
+            self._free(lsa_id)
+        for old in list(self.superseded):
+            node1, node2, _, _ = self.lsas[old]  # type: ignore
+            if (node1, node2) not in self.current:
+                purged |= 1 << old
+                self.superseded.discard(old)
+                self._free(old)
+        if purged:
+            for router in self.known:
+                self.known[router] &= ~purged
+
+    def routers(self, knowledge: int) -> set[str]:
+        """Gets every router at the end of a link in knowledge."""
+        nodes = set()
+        for lsa_id in _bits(knowledge):
+            node1, node2, _, _ = self.lsas[lsa_id]  # type: ignore
+            nodes.add(node1)
+            nodes.add(node2)
+        return nodes
+
+    def flood(self, order: Iterable[str]) -> int:
+        """Runs one round of flooding. Each router, in order, merges in what every
+        router it knows about has heard, including merges made earlier this round.
+
+        Returns:
+            int: The number of LSAs received, summed over every router.
+        """
+        received = 0
+        for node in order:
+            old = knowledge = self.known.get(node, 0)
+            for router in self.routers(knowledge):
+                knowledge |= self.known.get(router, 0)
+            self.known[node] = knowledge
+            received += (knowledge & ~old).bit_count()
+
+        # Forget LSAs that every router holding them has seen replaced
+        for old in list(self.superseded):
+            node1, node2, _, _ = self.lsas[old]  # type: ignore
+            new = self.current[(node1, node2)]
+            mask = 1 << old
+            holders = False
+            for router, knowledge in self.known.items():
+                if knowledge & mask:
+                    if knowledge >> new & 1:
+                        self.known[router] = knowledge & ~mask
+                    else:
+                        holders = True
+            if not holders:
+                self.superseded.discard(old)
+                self._free(old)
+        return received
+
+    def view(self, router: str) -> nx.Graph:
+        """Materializes the topology as router knows it. Only the last view is kept."""
+        knowledge = self.known.get(router, 0)
+        if self._view is not None and self._view[:2] == (router, knowledge):
+            return self._view[2]
+
+        newest: dict[Link, tuple[str, str, int, int]] = {}
+        for lsa_id in _bits(knowledge):
+            lsa = self.lsas[lsa_id]
+            link = (lsa[0], lsa[1])  # type: ignore
+            if link not in newest or newest[link][3] < lsa[3]:  # type: ignore
+                newest[link] = lsa  # type: ignore
+
+        graph = nx.Graph()
+        graph.add_node(router)
+        for node1, node2, cost, _ in newest.values():
+            graph.add_edge(node1, node2, weight=cost)
+        self._view = (router, knowledge, graph)
+        return graph
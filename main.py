@@ -1,9 +1,38 @@
-from console import start_console
+import argparse
+
+from console import file_cmd, start_console
+from follow import DEFAULT_WINDOW_MS
 from graph_manager import GraphManager
 
 manager = GraphManager()
 def main():
-    start_console(graph_manager=manager)
+    parser = argparse.ArgumentParser(description="Network layer routing console.")
+    parser.add_argument("file", nargs="?", help="Graph file to load before starting.")
+    parser.add_argument(
+        "--serve", action="store_true", help="Serve routing queries over a socket instead of starting the console."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to serve on.")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port to serve on.")
+    parser.add_argument("--unix", help="Serve on this Unix socket path instead of TCP.")
+    parser.add_argument(
+        "--follow", metavar="FILE", help="Apply edge updates from a file, FIFO, or - for stdin as they arrive, then exit."
+    )
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW_MS, help="Milliseconds of updates to apply together when following.")
+    parser.add_argument("--subscribe", nargs="*", default=[], help="Nodes whose routing tables are refreshed when following.")
+    args = parser.parse_args()
+
+    if args.file:
+        file_cmd(manager, args.file)
+    if args.follow:
+        from follow import follow_stream, print_report  # Only needed when following
+
+        print_report(follow_stream(manager, args.follow, args.window, args.subscribe).report())
+    elif args.serve:
+        from server import serve  # Only needed by the server
+
+        serve(manager, args.host, args.port, args.unix)
+    else:
+        start_console(graph_manager=manager)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,129 @@
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+import networkx as nx
+
+from routing import dijkstra
+
+# Per-node metrics
+NODE_METRICS = ("mean_path", "eccentricity", "closeness", "harmonic")
+# Whole graph metrics
+GRAPH_METRICS = ("diameter", "radius", "wiener")
+METRICS = NODE_METRICS + GRAPH_METRICS
+
+
+class MetricsAccumulator:
+    """Reduces rows of the all-pairs distance matrix into graph metrics.
+
+    Rows can be fed in any order and in blocks of any size, so the full matrix
+    never has to be held at once. Unreachable entries must be inf. Distances
+    only count nodes reachable from each source, so disconnected graphs are
+    measured per component (the same way average_shortest_path does).
+    """
+
+    # Per-source arrays that update writes into
+    BUFFERS = {
+        "reachable": np.int64,
+        "total": np.float64,
+        "eccentricity": np.float64,
+        "harmonic": np.float64,
+    }
+
+    def __init__(
+        self,
+        num_nodes: int,
+        metrics: Iterable[str] = METRICS,
+        buffers: dict[str, np.ndarray] | None = None,
+    ):
+        # buffers can supply the BUFFERS arrays, e.g. so workers write into shared memory
+        self.num_nodes = num_nodes
+        self.metrics = set(metrics)
+        unknown = self.metrics - set(METRICS)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+        if buffers is None:
+            buffers = {name: np.zeros(num_nodes, dtype=dtype) for name, dtype in self.BUFFERS.items()}
+        self.reachable = buffers["reachable"]
+        self.total = buffers["total"]
+        self.eccentricity = buffers["eccentricity"]
+        self.harmonic = buffers["harmonic"]
+
+    def update(self, sources: np.ndarray, block: np.ndarray) -> None:
+        """Adds the distance rows of sources. block[k] holds the distances from sources[k]."""
+        reach = np.isfinite(block)
+        self.reachable[sources] = reach.sum(axis=1)
+        self.total[sources] = np.where(reach, block, 0).sum(axis=1)
+        if self.metrics & {"eccentricity", "diameter", "radius"}:
+            self.eccentricity[sources] = np.where(reach, block, -np.inf).max(axis=1)
+        if "harmonic" in self.metrics:
+            with np.errstate(divide="ignore"):
+                self.harmonic[sources] = np.where(reach & (block > 0), 1 / block, 0).sum(axis=1)
+
+    def result(self) -> dict[str, np.ndarray | float]:
+        """Gets every requested metric. Per-node metrics are arrays indexed like the rows."""
+        results: dict[str, np.ndarray | float] = {}
+        if "mean_path" in self.metrics:
+            results["mean_path"] = self.total / self.reachable
+        if "eccentricity" in self.metrics:
+            results["eccentricity"] = self.eccentricity
+        if "closeness" in self.metrics:
+            # Wasserman and Faust's closeness, scaled by the reachable fraction like networkx
+            others = self.reachable - 1
+            with np.errstate(divide="ignore", invalid="ignore"):
+                closeness = np.where(self.total > 0, others / self.total, 0.0)
+            if self.num_nodes > 1:
+                closeness *= others / (self.num_nodes - 1)
+            results["closeness"] = closeness
+        if "harmonic" in self.metrics:
+            results["harmonic"] = self.harmonic
+        if "diameter" in self.metrics:
+            results["diameter"] = float(self.eccentricity.max(initial=0))
+        if "radius" in self.metrics:
+            # Isolated nodes would always make the radius 0
+            connected = self.eccentricity[self.reachable > 1]
+            results["radius"] = float(connected.min(initial=np.inf)) if connected.size else 0.0
+        if "wiener" in self.metrics:
+            # Every pair is counted from both ends
+            results["wiener"] = float(self.total.sum() / 2)
+        return results
+
+
+def distance_blocks(
+    graph: nx.Graph,
+    nodes: list[str],
+    block_size: int = 256,
+    start: int = 0,
+    stop: int | None = None,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Runs Dijkstra from nodes[start:stop], yielding (source indices, distance rows) a block at a time."""
+    index = {node: i for i, node in enumerate(nodes)}
+    stop = len(nodes) if stop is None else stop
+    for first in range(start, stop, block_size):
+        sources = np.arange(first, min(first + block_size, stop))
+        block = np.full((len(sources), len(nodes)), np.inf)
+        for k, source in enumerate(sources):
+            for distance, node, _ in dijkstra(nodes[source], graph):
+                block[k, index[node]] = distance
+        yield sources, block
+
+
+def graph_metrics(
+    graph: nx.Graph, metrics: Iterable[str] = METRICS
+) -> tuple[list[str], dict[str, np.ndarray | float]]:
+    """Computes every requested metric with a single Dijkstra from each node.
+
+    Returns:
+        tuple: (nodes, metrics). Per-node metrics are arrays in the same order as nodes.
+    """
+    nodes = list(graph.nodes)
+    accumulator = MetricsAccumulator(len(nodes), metrics)
+    for sources, block in distance_blocks(graph, nodes):
+        accumulator.update(sources, block)
+    return nodes, accumulator.result()
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    """Gets the value below which percent of sorted_values fall, by the nearest rank. 0.0 if there are none."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * percent / 100), len(sorted_values) - 1)]
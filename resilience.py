@@ -0,0 +1,231 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
+
+from routing import dijkstra
+
+Link = tuple[str, str]
+
+# Largest pair comparison matrix built at once when counting reachable pairs, in bytes
+MAX_BATCH_BYTES = 64 * 1024 * 1024
+
+# Set in each worker process by _init_worker, so the graph is only sent once per worker
+_worker_graph: nx.Graph | None = None
+_worker_trees: dict[str, "ShortestPathTree"] = {}
+
+
+class ShortestPathTree:
+    """Distances from a source along with its Dijkstra tree."""
+
+    def __init__(self, source: str, graph: nx.Graph):
+        results = dijkstra(source, graph)
+        self.dist: dict[str, float] = {node: distance for distance, node, _ in results}
+        self.parent: dict[str, str] = {node: via for _, node, via in results}
+        self.children: dict[str, list[str]] = {}
+        for _, node, via in results:
+            if via != "-":
+                self.children.setdefault(via, []).append(node)
+
+    def subtree(self, root: str) -> set[str]:
+        nodes = {root}
+        stack = [root]
+        while stack:
+            for child in self.children.get(stack.pop(), []):
+                nodes.add(child)
+                stack.append(child)
+        return nodes
+
+
+def _link(node1: str, node2: str) -> Link:
+    return (node1, node2) if node1 <= node2 else (node2, node1)
+
+
+def shortest_path_trees(
+    graph: nx.Graph,
+) -> tuple[dict[str, ShortestPathTree], dict[Link, list[str]]]:
+    """Runs Dijkstra from every node.
+
+    Returns:
+        tuple: (the tree of each source, the sources whose tree uses each link)
+    """
+    trees: dict[str, ShortestPathTree] = {}
+    users: dict[Link, list[str]] = {}
+    for source in graph.nodes:
+        trees[source] = tree = ShortestPathTree(source, graph)
+        for node, via in tree.parent.items():
+            if via != "-":
+                users.setdefault(_link(node, via), []).append(source)
+    return trees, users
+
+
+def _init_worker(graph: nx.Graph, trees: dict[str, ShortestPathTree]) -> None:
+    global _worker_graph, _worker_trees
+    _worker_graph = graph
+    _worker_trees = trees
+
+
+def _repair(graph: nx.Graph, tree: ShortestPathTree, cut: set[str]) -> dict[str, float]:
+    # Only the nodes below the failed link can change distance. Seed each of
+    # them from its neighbors outside the cut part, then run Dijkstra within it.
+    dist: dict[str, float] = {}
+    pq = []
+    for node in cut:
+        best = float("inf")
+        for neighbor, attrs in graph.adj[node].items():
+            if neighbor not in cut and neighbor in tree.dist:
+                best = min(best, tree.dist[neighbor] + attrs["weight"])
+        if best != float("inf"):
+            dist[node] = best
+            heapq.heappush(pq, (best, node))
+
+    done = set()
+    while pq:
+        current_dist, current_node = heapq.heappop(pq)
+        if current_node in done:
+            continue  # stale entry
+        done.add(current_node)
+        for neighbor, attrs in graph.adj[current_node].items():
+            new_dist = current_dist + attrs["weight"]
+            if neighbor in cut and new_dist < dist.get(neighbor, float("inf")):
+                dist[neighbor] = new_dist
+                heapq.heappush(pq, (new_dist, neighbor))
+    return dist
+
+
+def _evaluate_links(
+    tasks: list[tuple[Link, list[str]]],
+) -> list[tuple[Link, int, float, int]]:
+    # Fails each link in turn and repairs only the sources whose tree used it.
+    # If a source's tree does not use the link, none of its distances change.
+    graph = _worker_graph
+    assert graph is not None
+    results = []
+    for (node1, node2), sources in tasks:
+        cost = graph[node1][node2]["weight"]
+        graph.remove_edge(node1, node2)
+        lost_pairs = 0
+        added_cost = 0.0
+        for source in sources:
+            tree = _worker_trees[source]
+            child = node2 if tree.parent[node2] == node1 else node1
+            cut = tree.subtree(child)
+            repaired = _repair(graph, tree, cut)
+            lost_pairs += len(cut) - len(repaired)
+            added_cost += sum(repaired.values()) - sum(tree.dist[node] for node in repaired)
+        graph.add_edge(node1, node2, weight=cost)
+        # Every pair was counted from both ends
+        results.append(((node1, node2), lost_pairs // 2, added_cost / 2, len(sources)))
+    return results
+
+
+def link_failure_sensitivity(
+    graph: nx.Graph, processes: int | None = None
+) -> list[tuple[Link, int, float, int]]:
+    """Fails every link one at a time and measures how much the network degrades.
+
+    Args:
+        processes (int | None, optional): Number of worker processes. Runs in this process if 1. Defaults to the number of CPUs.
+
+    Returns:
+        list: [(link, pairs disconnected, total added path cost, sources repaired)], most damaging link first.
+    """
+    trees, users = shortest_path_trees(graph)
+    tasks = [(_link(u, v), users.get(_link(u, v), [])) for u, v in graph.edges]
+
+    processes = processes or os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+    if processes <= 1:
+        _init_worker(graph.copy(), trees)
+        results = _evaluate_links(tasks)
+    else:
+        # Interleave the links so expensive and cheap ones are spread evenly
+        chunks = [tasks[i::processes] for i in range(processes)]
+        with ProcessPoolExecutor(
+            max_workers=processes, initializer=_init_worker, initargs=(graph, trees)
+        ) as executor:
+            results = [r for chunk in executor.map(_evaluate_links, chunks) for r in chunk]
+
+    results.sort(key=lambda x: (x[1], x[2]), reverse=True)
+    return results
+
+
+def wilson_interval(successes: np.ndarray | int, trials: int, z: float = 1.96) -> tuple[np.ndarray, np.ndarray]:
+    """Gets the Wilson score interval of a binomial proportion, 95% by default.
+    Unlike the normal approximation, it stays within [0, 1] and is not zero wide at 0 or 1."""
+    p = np.asarray(successes, dtype=np.float64) / trials
+    denominator = 1 + z**2 / trials
+    center = (p + z**2 / (2 * trials)) / denominator
+    margin = z * np.sqrt(p * (1 - p) / trials + z**2 / (4 * trials**2)) / denominator
+    return np.maximum(center - margin, 0.0), np.minimum(center + margin, 1.0)
+
+
+def _component_labels(num_nodes: int, u: np.ndarray, v: np.ndarray, up: np.ndarray) -> np.ndarray:
+    # Labels every node of every sample with the smallest node index in its component.
+    # up is a (samples, edges) mask of the links that survived. Union-find over all
+    # samples at once: hook the larger root of each link under the smaller one, then
+    # jump pointers until every node points at its root.
+    samples = up.shape[0]
+    labels = np.tile(np.arange(num_nodes), (samples, 1))
+    rows, cols = np.nonzero(up)
+    offsets = rows * num_nodes
+    a, b = offsets + u[cols], offsets + v[cols]
+    while True:
+        flat = labels.reshape(-1)
+        la, lb = flat[a], flat[b]
+        merging = la != lb
+        if not merging.any():
+            return labels
+        # Links already inside one component stay that way
+        a, b, offsets = a[merging], b[merging], offsets[merging]
+        la, lb = la[merging], lb[merging]
+        np.minimum.at(flat, offsets + np.maximum(la, lb), np.minimum(la, lb))
+        while True:
+            jumped = np.take_along_axis(labels, labels, axis=1)
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+
+def sample_reachability(
+    graph: nx.Graph,
+    failure: float | dict[Link, float],
+    samples: int = 10000,
+    seed: int = 0,
+    batch_size: int | None = None,
+) -> tuple[list[str], np.ndarray, int]:
+    """Estimates how likely node pairs are to stay connected when links fail independently.
+
+    Failure patterns are drawn as masks over the edge array a batch at a time,
+    and the components of every sample in a batch are found together.
+
+    Args:
+        failure (float | dict[Link, float]): The probability of every link failing, or of each link by (node1, node2).
+        batch_size (int | None, optional): Samples per batch. Defaults to as many as fit in 64 MiB.
+
+    Returns:
+        tuple: (the nodes, the number of samples each pair of nodes was connected in, the number of samples every node was connected in)
+    """
+    nodes = list(graph.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    V = len(nodes)
+    edges = list(graph.edges)
+    u = np.array([index[a] for a, _ in edges], dtype=np.int64)
+    v = np.array([index[b] for _, b in edges], dtype=np.int64)
+    if isinstance(failure, dict):
+        probabilities = np.array([failure.get(_link(a, b), 0.0) for a, b in edges])
+    else:
+        probabilities = np.full(len(edges), failure)
+
+    batch_size = batch_size or max(1, MAX_BATCH_BYTES // max(V * V, 1))
+    rng = np.random.default_rng(seed)
+    connected_pairs = np.zeros((V, V), dtype=np.int64)
+    all_connected = 0
+    for first in range(0, samples, batch_size):
+        up = rng.random((min(batch_size, samples - first), len(edges))) >= probabilities
+        labels = _component_labels(V, u, v, up)
+        connected_pairs += (labels[:, :, None] == labels[:, None, :]).sum(axis=0)
+        all_connected += int((labels == 0).all(axis=1).sum())
+    return nodes, connected_pairs, all_connected
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+from collections.abc import Callable, Mapping
+from typing import Any
+
+import networkx as nx
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def graph_fingerprint(graph: nx.Graph, node_order: bool = False) -> str:
+    """Hashes the sorted weighted edge list of graph, along with any nodes without edges.
+
+    Graphs with the same edges and costs get the same fingerprint, whatever
+    order their nodes and edges were added in.
+
+    Args:
+        node_order (bool, optional): Flag for whether to also hash the order graph.nodes and each node's
+            neighbors are iterated in, for results that are laid out or computed in that order. Defaults to False.
+    """
+    edges = sorted(
+        (min(u, v), max(u, v), cost) for u, v, cost in graph.edges(data="weight")
+    )
+    isolated = sorted(node for node in graph.nodes if graph.degree(node) == 0)
+    digest = hashlib.sha256()
+    for u, v, cost in edges:
+        digest.update(f"{u}\0{v}\0{cost}\n".encode())
+    for node in isolated:
+        digest.update(f"{node}\n".encode())
+    if node_order:
+        digest.update(b"\1")
+        for node in graph.nodes:
+            digest.update(f"{node}\0{' '.join(map(str, graph.adj[node]))}\n".encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Results of expensive computations on disk, keyed by (graph fingerprint, algorithm, parameters).
+
+    Results are pickled into an SQLite database. When the stored results grow
+    past max_bytes, the least recently used ones are evicted. Hits and misses
+    are counted per algorithm.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results "
+            "(key TEXT PRIMARY KEY, algorithm TEXT, value BLOB, size INTEGER, used REAL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        self.connection.commit()
+        self.bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        # algorithm -> [hits, misses]
+        self.counts: dict[str, list[int]] = {}
+        self.evictions = 0
+
+    @staticmethod
+    def _key(fingerprint: str, algorithm: str, params: Mapping[str, Any]) -> str:
+        return f"{fingerprint}:{algorithm}:{json.dumps(dict(params), sort_keys=True)}"
+
+    def _count(self, algorithm: str, hit: bool) -> None:
+        self.counts.setdefault(algorithm, [0, 0])[0 if hit else 1] += 1
+
+    def get(self, fingerprint: str, algorithm: str, params: Mapping[str, Any] | None = None) -> tuple[bool, Any]:
+        """Looks up a result.
+
+        Returns:
+            tuple: (whether it was found, the result or None)
+        """
+        key = self._key(fingerprint, algorithm, params or {})
+        row = self.connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        self._count(algorithm, row is not None)
+        if row is None:
+            return False, None
+        # Committed with the next put, rather than writing to disk on every hit
+        self.connection.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+        return True, pickle.loads(row[0])
+
+    def put(self, fingerprint: str, algorithm: str, params: Mapping[str, Any], result: Any) -> None:
+        key = self._key(fingerprint, algorithm, params)
+        value = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        replaced = self.connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+            (key, algorithm, value, len(value), time.time()),
+        )
+        self.bytes += len(value) - (replaced[0] if replaced else 0)
+        self._evict()
+        self.connection.commit()
+
+    def cached(self, fingerprint: str, algorithm: str, params: Mapping[str, Any], compute: Callable[[], Any]) -> Any:
+        """Gets the stored result, or calls compute and stores what it returns."""
+        found, result = self.get(fingerprint, algorithm, params)
+        if not found:
+            result = compute()
+            self.put(fingerprint, algorithm, params, result)
+        return result
+
+    def _evict(self) -> None:
+        if self.bytes <= self.max_bytes:
+            return
+        # Least recently used first, until the results fit again
+        evicted = []
+        for key, size in self.connection.execute("SELECT key, size FROM results ORDER BY used"):
+            evicted.append((key,))
+            self.bytes -= size
+            if self.bytes <= self.max_bytes:
+                break
+        self.connection.executemany("DELETE FROM results WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+
+    def clear(self) -> None:
+        self.connection.execute("DELETE FROM results")
+        self.connection.commit()
+        self.bytes = 0
+
+    def report(self) -> dict[str, dict[str, float]]:
+        """Gets the hits, misses and hit rate of each algorithm, and of all of them under `all`."""
+        counts = dict(self.counts)
+        counts["all"] = [sum(hits for hits, _ in self.counts.values()), sum(misses for _, misses in self.counts.values())]
+        return {
+            algorithm: {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            }
+            for algorithm, (hits, misses) in counts.items()
+        }
+
+    def print_report(self) -> None:
+        for algorithm, counts in self.report().items():
+            print(
+                f"{algorithm}: {counts['hits']} hits, {counts['misses']} misses ({counts['hit_rate']:.1%} hit rate)"
+            )
+        print(
+            f"{self.bytes / 2**20:.2f} MiB of {self.max_bytes / 2**20:.0f} MiB cached, "
+            f"{self.evictions} result{'s' if self.evictions != 1 else ''} evicted"
+        )
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
@@ -1,17 +1,43 @@
+import contextlib
 import heapq
-from copy import deepcopy
+import os
+import random
 from typing import Any
 
 import networkx as nx
+import numpy as np
 
+from dv_table import NO_HOP, UNREACHABLE
 from graph_manager import GraphManager
 
 
+# Wire sizes used to estimate control-plane bytes
+DV_ENTRY_BYTES = 20  # One RIPv2 route entry
+LSA_BYTES = 32  # An OSPF LSA header plus one link
+
+# Counters kept by each algorithm while GraphManager.protocol_costs is enabled.
+# state_entries is the number of routing entries held per router after the last round.
+PROTOCOL_COSTS = {
+    "ls": ("relaxations", "queue_pushes", "queue_pops", "state_entries"),
+    "dv": ("messages", "entries_advertised", "bytes", "relaxations", "state_entries"),
+    "dls": (
+        "lsas_originated",
+        "lsas_flooded",
+        "bytes",
+        "relaxations",
+        "queue_pushes",
+        "queue_pops",
+        "state_entries",
+    ),
+}
+
+
 class RoutingAlgorithm:
     """Base class for routing algorithms."""
 
     def __init__(self, graph_manager: GraphManager):
         self.graph_manager = graph_manager
+        graph_manager.detach_routing_state()
 
     def run(self, source: str, iterative: bool = False) -> int:
         raise NotImplementedError("Subclasses must implement this method.")
@@ -48,10 +74,13 @@ class RoutingAlgorithm:
 class LinkStateRouting(RoutingAlgorithm):
     """Implements the Link-State (Dijkstra) algorithm."""
 
-    def __init__(self, graph_manager: GraphManager, graph: nx.Graph | None = None):
+    def __init__(
+        self, graph_manager: GraphManager, graph: nx.Graph | None = None, name: str = "ls"
+    ):
         super().__init__(graph_manager)
 
         self.graph = graph if graph is not None else graph_manager.graph
+        self.name = name  # Algorithm the protocol costs are counted under
 
     def run(self, source: str, iterative: bool = False) -> int:
         # Check if source node exists
@@ -62,11 +91,15 @@ class LinkStateRouting(RoutingAlgorithm):
         state = self.graph_manager.ls_state
         if "initialized" not in state:
             state['source'] = source
-            state['dist'] = {node: float("inf") for node in self.graph.nodes}
-            state['prev'] = {node: None for node in self.graph.nodes}
-            state['dist'][source] = 0
-            state['pq'] = [(0, source)]
+            state['dist'] = {source: 0}
+            state['prev'] = {source: None}
+            state['pq'] = make_queue(self.graph)
+            state['pq'].push(source, 0)
+            # Largest cost the bucket queue was sized for. Edits between `ls -i` steps can exceed it.
+            state['max_weight'] = state['pq'].size - 1 if isinstance(state['pq'], BucketQueue) else None
             state['initialized'] = True
+            if self.graph_manager.protocol_costs is not None:
+                self.graph_manager.count_protocol_costs(self.name, queue_pushes=1)
 
         if iterative:
             # Run iteratively
@@ -93,81 +126,300 @@ class LinkStateRouting(RoutingAlgorithm):
             print(f"Node {source} not found in graph.")
             return True  # consider finished if source disappears
 
-        pq = state.get('pq', [])
+        pq = state['pq']
         dist = state['dist']
         prev = state['prev']
 
-        # If the heap is empty, finalize using the incremental state and return True
+        # If the queue is empty, finalize using the incremental state and return True
         if not pq:
             vias = find_vias(graph, dist, prev, source)
             print_vias(vias, source)
             state.clear()
             return True
 
-        # Pop until we find a non-stale entry or run out
-        while pq:
-            current_dist, current_node = heapq.heappop(pq)
-            if current_dist > dist[current_node]:
-                continue  # stale entry
+        # Process one item per iteration
+        current_dist, current_node = pq.pop()
+        pushes = 0
+        for neighbor, attrs in graph.adj[current_node].items():
+            weight = attrs["weight"]
+            new_dist = current_dist + weight
+            max_weight = state.get('max_weight')
+            if max_weight is not None and (type(weight) is not int or weight > max_weight):
+                # Priorities further apart than the buckets would share one, so keep going with a heap
+                heap = HeapQueue()
+                for node, priority in pq.priority.items():
+                    heap.push(node, priority)
+                state['pq'] = pq = heap
+                state['max_weight'] = None
+
+            if neighbor not in dist or new_dist < dist[neighbor]:
+                dist[neighbor] = new_dist
+                prev[neighbor] = current_node
+                pq.push(neighbor, new_dist)
+                pushes += 1
+
+        if self.graph_manager.protocol_costs is not None:
+            self.graph_manager.count_protocol_costs(
+                self.name,
+                state_entries=len(dist),
+                relaxations=len(graph.adj[current_node]),
+                queue_pushes=pushes,
+                queue_pops=1,
+            )
 
-            # Process one valid item per iteration
-            for neighbor, attrs in graph.adj[current_node].items():
-                weight = attrs["weight"]
-                new_dist = current_dist + weight
+        vias = find_vias(graph, dist, prev, source)
+        print_vias(vias, source)
 
-                if new_dist < dist[neighbor]:
-                    dist[neighbor] = new_dist
-                    prev[neighbor] = current_node
-                    heapq.heappush(pq, (new_dist, neighbor))
+        return False
 
-            # Update stored state
-            state['pq'] = pq
-            state['dist'] = dist
-            state['prev'] = prev
 
-            vias = find_vias(graph, dist, prev, source)
-            print_vias(vias, source)
 
-            return False
+class HeapQueue:
+    """Binary heap priority queue. Decreasing a priority leaves a stale entry behind, which is skipped when popped."""
 
-        # If all popped entries were stale, finalize:
-        vias = find_vias(graph, dist, prev, source)
-        print_vias(vias, source)
-        state.clear()
-        return True
+    def __init__(self):
+        self.heap: list[tuple[Any, str]] = []
+        self.priority: dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.priority)
+
+    def push(self, node: str, priority) -> None:
+        """Inserts node, or lowers its priority if it is already queued."""
+        self.priority[node] = priority
+        heapq.heappush(self.heap, (priority, node))
 
+    def pop(self) -> tuple[Any, str]:
+        while True:
+            priority, node = heapq.heappop(self.heap)
+            if self.priority.get(node) == priority:
+                del self.priority[node]
+                return priority, node
 
 
-def dijkstra(source: str, graph: nx.Graph) -> list[tuple[float, str, str]]:
-    """Runs Dijkstra and returns a list of tuples (distance, node, via). If iterative is True, will run it iteratively
+class BucketQueue:
+    """Dial's bucket queue for non-negative integer priorities.
+
+    While running Dijkstra every queued priority lies within max_weight of the
+    last popped one, so max_weight + 1 circular buckets are enough. A node is
+    moved between buckets when its priority drops, so there are no stale entries.
+    Nodes are popped in the same order as HeapQueue, so both give the same results.
+    """
+
+    def __init__(self, max_weight: int):
+        self.size = max_weight + 1
+        self.buckets: list[dict[str, None]] = [{} for _ in range(self.size)]
+        self.priority: dict[str, int] = {}
+        self.cursor = 0
+
+    def __len__(self) -> int:
+        return len(self.priority)
+
+    def push(self, node: str, priority: int) -> None:
+        """Inserts node, or lowers its priority if it is already queued."""
+        old = self.priority.get(node)
+        if old is not None:
+            del self.buckets[old % self.size][node]
+        self.buckets[priority % self.size][node] = None
+        self.priority[node] = priority
+
+    def pop(self) -> tuple[int, str]:
+        buckets = self.buckets
+        cursor = self.cursor
+        while not buckets[cursor % self.size]:
+            cursor += 1
+        self.cursor = cursor
+        # Ties go to the smallest node name, like the (priority, node) order of HeapQueue
+        bucket = buckets[cursor % self.size]
+        node = min(bucket)
+        del bucket[node]
+        return self.priority.pop(node), node
+
+
+# Largest edge cost for which the bucket queue is used. Above this, scanning
+# empty buckets starts to cost more than the heap operations it saves.
+BUCKET_QUEUE_MAX_WEIGHT = 256
+
+
+def make_queue(graph: nx.Graph, kind: str = "auto") -> HeapQueue | BucketQueue:
+    """Creates the priority queue for running Dijkstra on graph.
+
+    Args:
+        kind (str, optional): "heap", "bucket", or "auto" to use a bucket queue when every cost is a small non-negative integer. Defaults to "auto".
+    """
+    if kind == "heap":
+        return HeapQueue()
+
+    # Reads the adjacency dicts directly, this scan runs before every Dijkstra
+    max_weight = 0
+    for neighbors in graph._adj.values():
+        for attrs in neighbors.values():
+            weight = attrs["weight"]
+            if type(weight) is not int or weight < 0:
+                if kind == "bucket":
+                    raise ValueError("Bucket queues need non-negative integer costs.")
+                return HeapQueue()
+            if weight > max_weight:
+                max_weight = weight
+
+    if kind == "auto" and max_weight > BUCKET_QUEUE_MAX_WEIGHT:
+        return HeapQueue()
+    return BucketQueue(max_weight)
+
+
+def dijkstra(
+    source: str, graph: nx.Graph, queue: str = "auto"
+) -> list[tuple[float, str, str]]:
+    """Runs Dijkstra and returns a list of tuples (distance, node, via).
+
+    Args:
+        queue (str, optional): The priority queue to use. See make_queue. Defaults to "auto".
 
     Returns:
         list: [(distance: float, node: str, via: str)]
     """
     assert source in graph.nodes
-    dist = {node: float("inf") for node in graph.nodes}
-    prev: dict[Any, None | str] = {node: None for node in graph.nodes}
-    dist[source] = 0
+    dist = {source: 0}
+    prev: dict[Any, None | str] = {source: None}
 
-    pq = [(0, source)]
+    pq = make_queue(graph, queue)
+    pq.push(source, 0)
+    adj = graph._adj  # Skips the read-only view wrappers of graph.adj
     while pq:
-        current_dist, current_node = heapq.heappop(pq)
-        if current_dist > dist[current_node]:
-            continue
+        current_dist, current_node = pq.pop()
 
-        for neighbor, attrs in graph.adj[current_node].items():
+        for neighbor, attrs in adj[current_node].items():
             weight = attrs["weight"]
             new_dist = current_dist + weight
 
-            if new_dist < dist[neighbor]:
+            if neighbor not in dist or new_dist < dist[neighbor]:
                 dist[neighbor] = new_dist
                 prev[neighbor] = current_node
-                heapq.heappush(pq, (new_dist, neighbor))
+                pq.push(neighbor, new_dist)
 
     results = find_vias(graph, dist, prev, source)
     return results
 
 
+def shortest_route(
+    source: str,
+    target: str,
+    graph: nx.Graph,
+    potentials: dict[str, float] | None = None,
+) -> tuple[float, list[str], int]:
+    """Finds a single source -> target path without settling the whole graph.
+
+    Runs bidirectional Dijkstra, or A* towards the target when potentials
+    (lower bounds on the remaining distance to the target) are given.
+
+    Returns:
+        tuple: (cost: float, path: list[str], settled: int). The path is empty and the cost is inf if target is unreachable.
+    """
+    assert source in graph.nodes and target in graph.nodes
+    if source == target:
+        return 0, [source], 1
+    if potentials is not None:
+        return _astar(source, target, graph, potentials)
+
+    # Index 0 searches forward from the source, index 1 backward from the target
+    dist: list[dict[str, float]] = [{source: 0}, {target: 0}]
+    prev: list[dict[str, str | None]] = [{source: None}, {target: None}]
+    settled: list[set[str]] = [set(), set()]
+    pqs: list[list[tuple[float, str]]] = [[(0, source)], [(0, target)]]
+    best = float("inf")
+    meet = None
+
+    while pqs[0] and pqs[1]:
+        # Both frontiers have passed the best meeting point, so it is optimal
+        if pqs[0][0][0] + pqs[1][0][0] >= best:
+            break
+
+        # Expand the smaller frontier
+        side = 0 if len(pqs[0]) <= len(pqs[1]) else 1
+        current_dist, current_node = heapq.heappop(pqs[side])
+        if current_node in settled[side]:
+            continue  # stale entry
+        settled[side].add(current_node)
+
+        for neighbor, attrs in graph.adj[current_node].items():
+            new_dist = current_dist + attrs["weight"]
+            if new_dist < dist[side].get(neighbor, float("inf")):
+                dist[side][neighbor] = new_dist
+                prev[side][neighbor] = current_node
+                heapq.heappush(pqs[side], (new_dist, neighbor))
+
+            # Check whether this edge joins the two searches with a shorter path
+            if neighbor in dist[1 - side]:
+                total = new_dist + dist[1 - side][neighbor]
+                if total < best:
+                    best = total
+                    meet = neighbor
+
+    settled_count = len(settled[0] | settled[1])
+    if meet is None:
+        return float("inf"), [], settled_count
+
+    path = _walk_prev(prev[0], meet)[::-1] + _walk_prev(prev[1], meet)[1:]
+    return best, path, settled_count
+
+
+def _astar(
+    source: str, target: str, graph: nx.Graph, potentials: dict[str, float]
+) -> tuple[float, list[str], int]:
+    # Potentials must never overestimate the distance to target, otherwise the
+    # first time target is settled may not be the shortest path.
+    dist: dict[str, float] = {source: 0}
+    prev: dict[str, str | None] = {source: None}
+    settled: set[str] = set()
+    pq = [(potentials.get(source, 0), source)]
+
+    while pq:
+        _, current_node = heapq.heappop(pq)
+        if current_node in settled:
+            continue  # stale entry
+        settled.add(current_node)
+        if current_node == target:
+            return dist[target], _walk_prev(prev, target)[::-1], len(settled)
+
+        current_dist = dist[current_node]
+        for neighbor, attrs in graph.adj[current_node].items():
+            new_dist = current_dist + attrs["weight"]
+            if new_dist < dist.get(neighbor, float("inf")):
+                dist[neighbor] = new_dist
+                prev[neighbor] = current_node
+                # Nodes missing from the potentials cannot reach the target
+                estimate = potentials.get(neighbor, float("inf"))
+                if estimate != float("inf"):
+                    heapq.heappush(pq, (new_dist + estimate, neighbor))
+
+    return float("inf"), [], len(settled)
+
+
+def _walk_prev(prev: dict[str, str | None], node: str) -> list[str]:
+    # Follows the predecessor chain back to the root. Returns [node, ..., root]
+    path = [node]
+    while prev[path[-1]] is not None:
+        path.append(prev[path[-1]])  # type: ignore
+    return path
+
+
+def target_potentials(graph_manager: GraphManager, target: str) -> dict[str, float]:
+    """Gets (and caches) A* potentials towards target for the current topology.
+
+    The potentials are the exact distances to target, so they are only worth it
+    when many routes are queried towards the same destination.
+    """
+    cache = graph_manager.route_potentials
+    if cache.get("version") != graph_manager.version:
+        cache.clear()
+        cache["version"] = graph_manager.version
+    if target not in cache:
+        cache[target] = {
+            node: distance for distance, node, _ in dijkstra(target, graph_manager.graph)
+        }
+    return cache[target]
+
+
 def find_vias(graph: nx.Graph, dvs: dict, prev: dict, source: str) -> list[tuple]:
     results = []
     for node in graph.nodes:
@@ -192,10 +444,10 @@ def print_vias(vias: list[tuple[float, str, str]], source: str) -> None:
 
 
 def average_shortest_path(graph: nx.Graph) -> tuple[str, str, float, dict[str, float]]:
-    dijkstra_len: dict[str, float] = dict.fromkeys(list(graph.nodes), 0.0)
-    for node in graph:
-        results = dijkstra(node, graph)
-        dijkstra_len[node] = sum([result[0] for result in results]) / len(results)
+    from metrics import graph_metrics  # metrics imports dijkstra from here
+
+    nodes, results = graph_metrics(graph, ["mean_path"])
+    dijkstra_len: dict[str, float] = dict(zip(nodes, results["mean_path"].tolist()))  # type: ignore
     max_node: str = max(dijkstra_len, key=dijkstra_len.get)  # type: ignore
     min_node: str = min(dijkstra_len, key=dijkstra_len.get)  # type: ignore
     avg_len: float = sum(dijkstra_len.values()) / len(dijkstra_len)
@@ -234,7 +486,7 @@ class DistributredLinkStateRouting(RoutingAlgorithm):
             return run_count + 1
 
     def run_iterative(self, source: str) -> bool:
-        graphs = self.graph_manager.graphs  # Distributed graphs
+        lsdb = self.graph_manager.lsdb  # Link-state database shared by every router
         graph = self.graph_manager.graph  # Overall graph
 
         # Check if source node exists
@@ -242,50 +494,74 @@ class DistributredLinkStateRouting(RoutingAlgorithm):
             print(f"Node {source} not found in graph.")
             return False
 
-        # Loop through ALL the nodes
-        for node in graph.nodes:
-            graphs[node] = graphs.get(node, None) or nx.Graph()
-            # Populate the direct neighbors
-            for neighbor in graph.neighbors(node):
-                w = graph.get_edge_data(node, neighbor)["weight"]
-                graphs[node].add_edge(node, neighbor, weight=w)
-
-            # Remove non-existent edges
-            for u, v in list(graphs[node].edges()):
-                if not graph.has_edge(u, v):
-                    graphs[node].remove_edge(u, v)
-
-        # Freeze graph state for convergence check
-        pre_graph = deepcopy(graphs[source])
-        
-        # Combine the graphs
-        for node in graph.nodes:
-            for neighbor in graphs[node].nodes:
-                graphs[node] = nx.compose(graphs[node], graphs[neighbor])
+        # Every router advertises its direct links, and non-existent links are removed
+        sequence = lsdb.sequence
+        lsdb.sync(graph)
+
+        # Freeze the source's knowledge for convergence check
+        pre_knowledge = lsdb.known[source]
+
+        # Share what each router has heard
+        flooded = lsdb.flood(graph.nodes)
 
         # Find shortest path (reusing code :D)
-        LinkStateRouting(graph_manager=self.graph_manager, graph=graphs[source]).run(
-            source, iterative=False
-        )
+        LinkStateRouting(
+            graph_manager=self.graph_manager, graph=lsdb.view(source), name="dls"
+        ).run(source, iterative=False)
+
+        if self.graph_manager.protocol_costs is not None:
+            known = sum(knowledge.bit_count() for knowledge in lsdb.known.values())
+            self.graph_manager.count_protocol_costs(
+                "dls",
+                state_entries=known // max(len(lsdb.known), 1),
+                lsas_originated=lsdb.sequence - sequence,
+                lsas_flooded=flooded,
+                bytes=flooded * LSA_BYTES,
+            )
 
-        # Check if the graph has converged
-        converged = nx.is_isomorphic(graphs[source], pre_graph)
+        # Check if the source has heard anything new
+        converged = lsdb.known[source] == pre_knowledge
         if converged:
             print(
                 "The Distance Vector Routing Algorithm has converged! Any future use of the dv command with the same graph will not change the output."
             )
             return True
         return False
-     
+
+
+# Orders in which routers update their distance vectors in each round
+DV_SCHEDULES = ("sequential", "jacobi", "bfs", "degree", "random")
 
 
 class DistanceVectorRouting(RoutingAlgorithm):
-    """Implements the Distance Vector Routing Algorithm."""
+    """Implements the Distance Vector Routing Algorithm.
+
+    The schedule decides which vectors each router reads in a round:
+
+    - `sequential`: Routers update in place, in the order they were added, so later
+      routers in a round see the updates of earlier ones (Gauss-Seidel).
+    - `jacobi`: Every router reads the vectors from the end of the last round, like
+      routers that all exchange vectors at once.
+    - `bfs`: In place, in breadth-first order from the source, reversed every other
+      round, so routes spread out from the source and then back in.
+    - `degree`: In place, the routers with the most links first.
+    - `random`: In place, in a new random order every round, like routers that
+      update asynchronously.
+    """
 
-    def __init__(self, graph_manager: GraphManager):
+    def __init__(self, graph_manager: GraphManager, schedule: str = "sequential", seed: int = 0):
         super().__init__(graph_manager)
-
-    def run(self, source: str, iterative: bool = False) -> int:
+        if schedule not in DV_SCHEDULES:
+            raise ValueError(f"Unknown schedule '{schedule}'. Choose from {', '.join(DV_SCHEDULES)}.")
+        self.schedule = schedule
+        self.seed = seed
+        self.rounds = 0
+        # Neighbor entries considered, and router entries that changed, over every round run
+        self.relaxations = 0
+        self.updates = 0
+        self.converged = False
+
+    def run(self, source: str, iterative: bool = False, max_rounds: int = 10) -> int:
         # Check if source node exists
         if source not in self.graph_manager.graph.nodes:
             print(f"Node {source} not found in graph.")
@@ -299,9 +575,9 @@ class DistanceVectorRouting(RoutingAlgorithm):
             run_count = 0
             while not self.run_iterative(source):
                 run_count += 1
-                if run_count == 10:
+                if run_count == max_rounds:
                     print(
-                        "Distance Vector Routing Algorithm ran 10 times and did not converge. Stopping."
+                        f"Distance Vector Routing Algorithm ran {max_rounds} times and did not converge. Stopping."
                     )
                     return run_count + 1
             print(
@@ -309,51 +585,129 @@ class DistanceVectorRouting(RoutingAlgorithm):
             )
             return run_count + 1
 
+    def _order(self, source: str) -> list[str]:
+        graph = self.graph_manager.graph
+        # Rounds run by earlier dv commands count, so `dv -i` carries on the pattern
+        round_number = self.graph_manager.runs["dv"] + self.rounds
+        if self.schedule == "bfs":
+            order = [source, *(node for _, node in nx.bfs_edges(graph, source))]
+            if len(order) < len(graph):
+                reached = set(order)
+                order += [node for node in graph.nodes if node not in reached]
+            return order if round_number % 2 == 0 else order[::-1]
+        if self.schedule == "degree":
+            return sorted(graph.nodes, key=graph.degree, reverse=True)
+        if self.schedule == "random":
+            order = list(graph.nodes)
+            random.Random(f"{self.seed}:{round_number}").shuffle(order)
+            return order
+        return list(graph.nodes)
+
     def run_iterative(self, source: str) -> bool:
         graph = self.graph_manager.graph
         dvs = self.graph_manager.dvs
         prev: dict[Any, None | str] = {node: None for node in graph.nodes}
 
+        # Every router knows it can reach itself for free
         for node in graph.nodes:
-            if node not in dvs:
-                dvs[node] = {}
-
-            # distance to self is 0
-            dvs[node][node] = 0
-
-            # set direct neighors costs
-            # for neighbor, attrs in graph[node].items():
-            #     dvs[node][neighbor] = attrs["weight"]
-
-        dvs_snapshot = deepcopy(dvs)
-        for node1 in graph.nodes:
-            for node2 in graph.nodes:
-                if node1 == node2:
-                    continue
-
-                min_cost = float("inf")
-                min_node = None
-                for v, attrs in graph[node1].items():  # for each neighbor v of x
-                    # A vertex v lies on a shortest path between vertices s, t iff
-                    # d_G(x, y) = d_G(x,v) + d_G(v, y)
-                    cost_xv = attrs["weight"]
-                    cost_vy = dvs[v].get(node2, float("inf"))
-                    min_cost = min(min_cost, cost_xv + cost_vy)
-                    if min_cost == cost_xv + cost_vy:
-                        min_node = v
-
-                if min_node is not None:
-                    prev[min_node] = node1
-                dvs[node1][node2] = min_cost # type: ignore
-                if dvs[node1][node2] == float("inf"):
-                    dvs[node1].pop(node2)
+            dvs.add_node(node)
+
+        index = dvs.index
+        dist = dvs.dist
+        n = len(dvs.nodes)
+        # Destinations to update. Routers removed from the graph keep their old entries.
+        cols = np.array([index[node] for node in graph.nodes], dtype=np.intp)
+
+        # Each router's vector is computed from its neighbors' current vectors, and
+        # written back straight away, so routers later in the sweep see the update.
+        # Under the jacobi schedule they read a copy from before the sweep instead.
+        advertised_dist = dist[:, :n].copy() if self.schedule == "jacobi" else dist
+        changed = False
+        counting = self.graph_manager.protocol_costs is not None
+        messages = advertised = relaxations = 0
+        for node1 in self._order(source):
+            i = index[node1]
+            neighbors = graph[node1]
+            new_dist = dist[i, :n].copy()
+            new_hop = dvs.next_hop[i, :n].copy()
+            if not neighbors:
+                new_dist[cols] = UNREACHABLE
+                new_hop[cols] = NO_HOP
+            else:
+                hops = np.array([index[v] for v in neighbors], dtype=np.intp)
+                costs = np.array([attrs["weight"] for attrs in neighbors.values()], dtype=np.int64)
+                relaxations += len(hops) * len(cols)
+                if counting:
+                    # Every neighbor advertises its reachable entries to this router
+                    messages += len(hops)
+                    advertised += int(np.count_nonzero(advertised_dist[np.ix_(hops, cols)] != UNREACHABLE))
+                # A vertex v lies on a shortest path between vertices x, y iff
+                # d_G(x, y) = d_G(x,v) + d_G(v, y)
+                via = np.minimum(advertised_dist[hops, :n] + costs[:, None], UNREACHABLE)
+                # Ties go to the last neighbor with the minimum cost
+                best = len(hops) - 1 - np.argmin(via[::-1], axis=0)
+                chosen = hops[best]
+                new_dist[cols] = via[best, np.arange(n)][cols]
+                new_hop[cols] = np.where(new_dist[cols] != UNREACHABLE, chosen[cols], NO_HOP)
+                for hop in np.unique(chosen[cols[cols != i]]):
+                    prev[dvs.nodes[hop]] = node1
+            new_dist[i] = 0
+            new_hop[i] = NO_HOP
+
+            updated = int(np.count_nonzero(new_dist != dist[i, :n]))
+            if updated:
+                changed = True
+                self.updates += updated
+            dist[i, :n] = new_dist
+            dvs.next_hop[i, :n] = new_hop
+
+        self.rounds += 1
+        self.relaxations += relaxations
+        if counting:
+            entries = int(np.count_nonzero(dist[np.ix_(cols, cols)] != UNREACHABLE))
+            self.graph_manager.count_protocol_costs(
+                "dv",
+                state_entries=entries // max(len(cols), 1),
+                messages=messages,
+                entries_advertised=advertised,
+                bytes=advertised * DV_ENTRY_BYTES,
+                relaxations=relaxations,
+            )
 
         vias = find_vias(graph, dvs[source], prev, source)
         print_vias(vias, source)
-        if DistanceVectorRouting.dvs_equal(dvs1=dvs, dvs2=dvs_snapshot):
+        if not changed:
+            self.converged = True
             print(
                 "The Distance Vector Routing Algorithm has converged! Any future use of the dv command with the same graph will not change the output."
             )
             return True
 
         return False
+
+
+def compare_dv_schedules(
+    graph: nx.Graph, source: str, schedules: tuple[str, ...] = DV_SCHEDULES, seed: int = 0
+) -> dict[str, dict[str, int | bool]]:
+    """Runs distance vector routing from scratch to convergence under each schedule.
+
+    Returns:
+        dict: The rounds (including the last one that changes nothing), relaxations,
+            entry updates and whether it converged, of each schedule.
+    """
+    report = {}
+    for schedule in schedules:
+        manager = GraphManager()
+        manager.graph = graph
+        algorithm = DistanceVectorRouting(manager, schedule, seed)
+        # Every round prints the source's table
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            # Without stale routes there is no count to infinity, so it always converges
+            algorithm.run(source, max_rounds=len(graph) + 1)
+        report[schedule] = {
+            "rounds": algorithm.rounds,
+            "relaxations": algorithm.relaxations,
+            "updates": algorithm.updates,
+            "converged": algorithm.converged,
+        }
+    return report
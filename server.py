@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import time
+from collections.abc import AsyncIterator
+
+from console import match_edge
+from graph_manager import GraphManager
+from metrics import percentile
+from routing import dijkstra
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def _encode(response: dict) -> bytes:
+    return json.dumps(response).encode() + b"\n"
+
+
+class ReadWriteLock:
+    """Lets any number of readers hold the lock at once, or a single writer.
+
+    A waiting writer stops new readers from getting in, so a steady stream of
+    reads cannot starve edits.
+    """
+
+    def __init__(self):
+        self.readers = 0
+        self.writing = False
+        self.writers_waiting = 0
+        self._condition = asyncio.Condition()
+
+    @contextlib.asynccontextmanager
+    async def read(self) -> AsyncIterator[None]:
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: not self.writing and not self.writers_waiting
+            )
+            self.readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.readers -= 1
+                if not self.readers:
+                    self._condition.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def write(self) -> AsyncIterator[None]:
+        async with self._condition:
+            self.writers_waiting += 1
+            await self._condition.wait_for(lambda: not self.writing and not self.readers)
+            self.writers_waiting -= 1
+            self.writing = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.writing = False
+                self._condition.notify_all()
+
+
+class RoutingServer:
+    """Answers routing queries about the graph of a GraphManager.
+
+    Clients send one request per line and get one JSON object back per line:
+
+    - `nodes`: every node in the graph.
+    - `table X`: the shortest path cost and previous hop from X to every node it can reach.
+    - `path X Y`: the cost and nodes of the shortest path from X to Y.
+    - `edit X Y cost` or `edit X Y -`: adds, updates or removes an edge.
+
+    Shortest path trees are cached per source and reused until the graph changes.
+    """
+
+    def __init__(self, graph_manager: GraphManager):
+        self.graph_manager = graph_manager
+        self.lock = ReadWriteLock()
+        # source -> (version, {node: (distance, via)}, encoded table response)
+        self.trees: dict[str, tuple[int, dict, bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def _tree(self, source: str) -> tuple[dict, bytes]:
+        # Must be called while holding the read lock, so the graph cannot change
+        version = self.graph_manager.version
+        cached = self.trees.get(source)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1], cached[2]
+
+        self.misses += 1
+        # Run in a thread so other readers are not blocked while it computes
+        results = await asyncio.to_thread(dijkstra, source, self.graph_manager.graph)
+        lookup = {node: (distance, via) for distance, node, via in results}
+        # Tables are large, so the response is only encoded once per source
+        table = _encode(
+            {
+                "ok": True,
+                "version": version,
+                "table": [[node, distance, via] for distance, node, via in results],
+            }
+        )
+        self.trees[source] = (version, lookup, table)
+        return lookup, table
+
+    async def handle(self, request: str) -> bytes:
+        """Answers a single request line. Returns the encoded response line."""
+        parts = request.split()
+        if not parts:
+            return _encode({"ok": False, "error": "Empty request."})
+        name, args = parts[0].lower(), parts[1:]
+        graph = self.graph_manager.graph
+
+        if name == "edit":
+            # Same rules as edges typed into the console
+            node1, node2, cost = match_edge(" ".join(args))
+            if node1 is None or node2 is None:
+                return _encode({"ok": False, "error": "Edits must be of the form `edit X Y {cost}` or `edit X Y -`."})
+            async with self.lock.write():
+                if cost == "-":
+                    self.graph_manager.remove_edge(node1, node2)
+                else:
+                    self.graph_manager.add_edge(node1, node2, cost)  # type: ignore
+                self.trees.clear()  # Every cached tree is now out of date
+                return _encode({"ok": True, "version": self.graph_manager.version})
+
+        async with self.lock.read():
+            if name == "nodes" and not args:
+                return _encode({"ok": True, "nodes": list(graph.nodes)})
+
+            if name == "table" and len(args) == 1:
+                source = args[0]
+                if source not in graph:
+                    return _encode({"ok": False, "error": f"Node {source} not found in graph."})
+                _, table = await self._tree(source)
+                return table
+
+            if name == "path" and len(args) == 2:
+                source, target = args
+                for node in (source, target):
+                    if node not in graph:
+                        return _encode({"ok": False, "error": f"Node {node} not found in graph."})
+                lookup, _ = await self._tree(source)
+                if target not in lookup:
+                    return _encode({"ok": True, "cost": None, "path": []})
+                path = [target]
+                while path[-1] != source:
+                    path.append(lookup[path[-1]][1])
+                return _encode({"ok": True, "cost": lookup[target][0], "path": path[::-1]})
+
+        return _encode({"ok": False, "error": f"Unknown request: '{request}'"})
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while line := await reader.readline():
+                writer.write(await self.handle(line.decode().strip()))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def start_server(
+    graph_manager: GraphManager,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    unix_path: str | None = None,
+) -> asyncio.Server:
+    """Starts listening on a Unix socket if unix_path is given, otherwise on host:port."""
+    graph_manager.temp_mute()  # Edits would otherwise print on the server
+    graph_manager.journal = False  # Nothing can undo edits, so keep only one change per link
+    routing_server = RoutingServer(graph_manager)
+    if unix_path is not None:
+        return await asyncio.start_unix_server(routing_server.handle_client, path=unix_path)
+    return await asyncio.start_server(routing_server.handle_client, host, port)
+
+
+def serve(
+    graph_manager: GraphManager,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    unix_path: str | None = None,
+) -> None:
+    """Serves routing queries until interrupted."""
+
+    async def run() -> None:
+        server = await start_server(graph_manager, host, port, unix_path)
+        print(f"Serving routing queries on {unix_path or f'{host}:{port}'}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("Server stopped.")
+
+
+async def _connect(
+    host: str, port: int, unix_path: str | None
+) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    if unix_path is not None:
+        return await asyncio.open_unix_connection(unix_path)
+    return await asyncio.open_connection(host, port)
+
+
+async def load_test(
+    num_requests: int = 10000,
+    connections: int = 8,
+    write_ratio: float = 0.0,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    unix_path: str | None = None,
+    seed: int = 0,
+) -> dict[str, float]:
+    """Sends a random mix of table, path and edit requests over several connections at once.
+
+    Args:
+        write_ratio (float, optional): Fraction of requests that change an edge cost. Defaults to 0.0.
+
+    Returns:
+        dict: The requests per second and the p50, p95 and p99 latencies in milliseconds.
+    """
+    rng = random.Random(seed)
+    reader, writer = await _connect(host, port, unix_path)
+    writer.write(b"nodes\n")
+    nodes = json.loads(await reader.readline())["nodes"]
+    writer.close()
+    await writer.wait_closed()
+
+    requests = []
+    for _ in range(num_requests):
+        roll = rng.random()
+        if roll < write_ratio:
+            node1, node2 = rng.sample(nodes, 2)
+            requests.append(f"edit {node1} {node2} {rng.randint(1, 20)}")
+        elif roll < (1 + write_ratio) / 2:
+            requests.append(f"table {rng.choice(nodes)}")
+        else:
+            requests.append(f"path {rng.choice(nodes)} {rng.choice(nodes)}")
+
+    latencies: list[float] = []
+
+    async def client(batch: list[str]) -> None:
+        reader, writer = await _connect(host, port, unix_path)
+        for request in batch:
+            start = time.perf_counter()
+            writer.write(request.encode() + b"\n")
+            await writer.drain()
+            await reader.readline()
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+        await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(requests[i::connections]) for i in range(connections)))
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "qps": num_requests / seconds,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+    }
+
+
+def print_load_test(results: dict[str, float]) -> None:
+    print(
+        f"{results['qps']:.0f} requests/s, latency p50 {results['p50']:.2f} ms, "
+        f"p95 {results['p95']:.2f} ms, p99 {results['p99']:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load tests a running routing server.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="Unix socket path of the server.")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--writes", type=float, default=0.0, help="Fraction of requests that edit an edge.")
+    args = parser.parse_args()
+    print_load_test(
+        asyncio.run(
+            load_test(args.requests, args.connections, args.writes, args.host, args.port, args.unix)
+        )
+    )
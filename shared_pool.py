@@ -0,0 +1,223 @@
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import networkx as nx
+
+from centrality import source_dependencies
+from graph_manager import GraphManager
+from metrics import METRICS, MetricsAccumulator, distance_blocks
+
+# name -> (shared memory name, dtype, shape). Small enough to send with every task.
+ArraySpec = dict[str, tuple[str, str, tuple[int, ...]]]
+
+
+class SharedArrays:
+    """numpy arrays in shared memory. Other processes attach to them by their spec."""
+
+    def __init__(self, arrays: dict[str, np.ndarray]):
+        self.segments: list[shared_memory.SharedMemory] = []
+        self.arrays: dict[str, np.ndarray] = {}
+        self.spec: ArraySpec = {}
+        for name, array in arrays.items():
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            shared = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)
+            shared[...] = array
+            self.segments.append(segment)
+            self.arrays[name] = shared
+            self.spec[name] = (segment.name, array.dtype.str, array.shape)
+
+    def close(self) -> None:
+        """Frees the shared memory. Must only be called by the process that created it."""
+        self.arrays.clear()
+        for segment in self.segments:
+            segment.close()
+            segment.unlink()
+        self.segments.clear()
+
+
+def _attach(spec: ArraySpec) -> tuple[list[shared_memory.SharedMemory], dict[str, np.ndarray]]:
+    segments = []
+    arrays = {}
+    for name, (segment_name, dtype, shape) in spec.items():
+        # Workers share their parent's resource tracker, so attaching does not
+        # register the segment a second time and only the creator unlinks it
+        segment = shared_memory.SharedMemory(name=segment_name)
+        segments.append(segment)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+    return segments, arrays
+
+
+def share_graph(graph: nx.Graph) -> SharedArrays:
+    """Stores graph in shared memory as CSR arrays, keeping the order of its adjacency dicts."""
+    nodes = list(graph.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    indices = []
+    weights = []
+    for i, node in enumerate(nodes):
+        for neighbor, attrs in graph._adj[node].items():
+            indices.append(index[neighbor])
+            weights.append(attrs["weight"])
+        indptr[i + 1] = len(indices)
+    return SharedArrays(
+        {
+            "names": np.frombuffer("\0".join(nodes).encode(), dtype=np.uint8),
+            "indptr": indptr,
+            "indices": np.array(indices, dtype=np.int32),
+            "weights": np.array(weights, dtype=np.int64),
+        }
+    )
+
+
+# Set in each worker process, so it rebuilds the graph once per topology version rather than once per task
+_worker_graph: tuple[int, nx.Graph, list[str]] | None = None
+
+
+def _load_graph(version: int, spec: ArraySpec) -> tuple[nx.Graph, list[str]]:
+    global _worker_graph
+    if _worker_graph is not None and _worker_graph[0] == version:
+        return _worker_graph[1], _worker_graph[2]
+
+    segments, arrays = _attach(spec)
+    nodes = bytes(arrays["names"]).decode().split("\0") if len(arrays["indptr"]) > 1 else []
+    indptr = arrays["indptr"].tolist()
+    indices = arrays["indices"].tolist()
+    weights = arrays["weights"].tolist()
+    for segment in segments:
+        segment.close()
+
+    # Fill the adjacency dicts directly, so neighbors are in the same order as the
+    # original graph and ties are broken the same way. Both directions of an edge
+    # share one attribute dict, like networkx does.
+    graph = nx.Graph()
+    graph.add_nodes_from(nodes)
+    adj = graph._adj
+    for u, node in enumerate(nodes):
+        for k in range(indptr[u], indptr[u + 1]):
+            neighbor = nodes[indices[k]]
+            attrs = adj[neighbor].get(node)
+            adj[node][neighbor] = attrs if attrs is not None else {"weight": weights[k]}
+    _worker_graph = (version, graph, nodes)
+    return graph, nodes
+
+
+def _metrics_task(
+    version: int, graph_spec: ArraySpec, out_spec: ArraySpec, metrics: list[str], start: int, stop: int
+) -> None:
+    graph, nodes = _load_graph(version, graph_spec)
+    segments, buffers = _attach(out_spec)
+    accumulator = MetricsAccumulator(len(nodes), metrics, buffers)
+    for sources, block in distance_blocks(graph, nodes, start=start, stop=stop):
+        accumulator.update(sources, block)
+    del accumulator, buffers
+    for segment in segments:
+        segment.close()
+
+
+def _betweenness_task(
+    version: int, graph_spec: ArraySpec, out_spec: ArraySpec, row: int, start: int, stop: int
+) -> None:
+    graph, nodes = _load_graph(version, graph_spec)
+    index = {node: i for i, node in enumerate(nodes)}
+    segments, buffers = _attach(out_spec)
+    partial = buffers["partial"][row]
+    for s in nodes[start:stop]:
+        for w, dependency in source_dependencies(graph, nodes, s)[1].items():
+            partial[index[w]] += dependency
+    del partial, buffers
+    for segment in segments:
+        segment.close()
+
+
+class SharedPool:
+    """Persistent worker processes for computations that run from every source.
+
+    The graph is published to shared memory once per topology version, and the
+    workers keep running across versions. Tasks only carry a range of source
+    indices, and workers write their results into shared output arrays.
+    """
+
+    def __init__(self, processes: int | None = None):
+        self.processes = processes or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.processes)
+        self.version: int | None = None
+        self.graph: SharedArrays | None = None
+        self.nodes: list[str] = []
+        atexit.register(self.close)
+
+    def publish(self, graph_manager: GraphManager) -> None:
+        """Shares the current graph with the workers, if it changed since it was last shared."""
+        if self.graph is not None and self.version == graph_manager.version:
+            return
+        if self.graph is not None:
+            self.graph.close()
+        self.graph = share_graph(graph_manager.graph)
+        self.version = graph_manager.version
+        self.nodes = list(graph_manager.graph.nodes)
+
+    def _ranges(self) -> list[tuple[int, int]]:
+        # A few ranges per worker, so a slow range does not leave the others idle
+        V = len(self.nodes)
+        size = max(1, -(-V // (self.processes * 4)))
+        return [(start, min(start + size, V)) for start in range(0, V, size)]
+
+    def metrics(
+        self, graph_manager: GraphManager, metrics: list[str] = list(METRICS)
+    ) -> tuple[list[str], dict[str, np.ndarray | float]]:
+        """Same as metrics.graph_metrics, with the sources split between the workers."""
+        self.publish(graph_manager)
+        assert self.graph is not None
+        V = len(self.nodes)
+        out = SharedArrays(
+            {name: np.zeros(V, dtype=dtype) for name, dtype in MetricsAccumulator.BUFFERS.items()}
+        )
+        try:
+            futures = [
+                self.executor.submit(
+                    _metrics_task, self.version, self.graph.spec, out.spec, metrics, start, stop
+                )
+                for start, stop in self._ranges()
+            ]
+            for future in futures:
+                future.result()
+            buffers = {name: array.copy() for name, array in out.arrays.items()}
+        finally:
+            out.close()
+        return list(self.nodes), MetricsAccumulator(V, metrics, buffers).result()
+
+    def betweenness(self, graph_manager: GraphManager) -> dict[str, float]:
+        """Same as centrality.brandes_centrality, with the sources split between the workers."""
+        self.publish(graph_manager)
+        assert self.graph is not None
+        ranges = self._ranges()
+        out = SharedArrays({"partial": np.zeros((len(ranges), len(self.nodes)))})
+        try:
+            futures = [
+                self.executor.submit(
+                    _betweenness_task, self.version, self.graph.spec, out.spec, row, start, stop
+                )
+                for row, (start, stop) in enumerate(ranges)
+            ]
+            for future in futures:
+                future.result()
+            totals = out.arrays["partial"].sum(axis=0)
+        finally:
+            out.close()
+        # Every shortest path was counted from both ends
+        return {node: float(totals[i]) / 2 for i, node in enumerate(self.nodes)}
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+        if self.graph is not None:
+            self.graph.close()
+            self.graph = None
+
+
+def shared_pool(graph_manager: GraphManager) -> SharedPool:
+    """Gets the worker pool of graph_manager, starting it the first time."""
+    if graph_manager.pool is None:
+        graph_manager.pool = SharedPool()
+    return graph_manager.pool
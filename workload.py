@@ -0,0 +1,221 @@
+import argparse
+import contextlib
+import os
+import random
+import time
+
+import networkx as nx
+
+from graph_manager import GraphManager
+from metrics import graph_metrics, percentile
+from routing import LinkStateRouting, shortest_route
+
+OPERATIONS = ("cost", "fail", "recover", "ls", "route", "stats")
+
+# Fraction of operations of each type. Routing queries far outnumber link flaps.
+DEFAULT_RATIOS = {
+    "cost": 0.15,
+    "fail": 0.05,
+    "recover": 0.05,
+    "ls": 0.2,
+    "route": 0.53,
+    "stats": 0.02,
+}
+
+
+def parse_ratios(text: str) -> dict[str, float]:
+    """Gets the ratios in text of the form `cost=0.2,route=0.8`. Operations left out are never run."""
+    ratios = {}
+    for part in text.split(","):
+        name, _, value = part.partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}'. Choose from {', '.join(OPERATIONS)}.")
+        ratios[name] = float(value)
+    return ratios
+
+
+def generate_trace(
+    graph: nx.Graph,
+    num_ops: int,
+    ratios: dict[str, float] = DEFAULT_RATIOS,
+    max_cost: int = 20,
+    seed: int = 0,
+) -> list[str]:
+    """Generates a trace of operations on graph. The same arguments always give the same trace.
+
+    Each operation is one line:
+
+    - `cost X Y {cost}`: changes the cost of a link.
+    - `fail X Y`: removes a link.
+    - `recover X Y {cost}`: adds back a failed link.
+    - `ls X`: runs link-state routing from X.
+    - `route X Y`: finds the shortest path from X to Y.
+    - `stats`: computes the all-pairs metrics of the `stats` command.
+
+    A failure is drawn from the links that are up, and a recovery from the links
+    that have failed, restoring their cost before the failure. A recovery drawn
+    while no link is down becomes a failure instead.
+
+    Raises:
+        ValueError: If graph has fewer than 2 nodes, so there is nothing to route between.
+    """
+    if graph.number_of_nodes() < 2:
+        raise ValueError("A workload needs a graph with at least 2 nodes.")
+    rng = random.Random(seed)
+    nodes = list(graph.nodes)
+    up = {(u, v): cost for u, v, cost in graph.edges(data="weight")}
+    down: dict[tuple[str, str], int] = {}
+    names = list(ratios)
+    weights = [ratios[name] for name in names]
+
+    trace = []
+    for name in rng.choices(names, weights, k=num_ops):
+        if name == "recover" and not down:
+            name = "fail"
+        if name in ("cost", "fail") and not up:
+            name = "recover" if down else "route"
+
+        if name == "cost":
+            link = rng.choice(list(up))
+            up[link] = rng.randint(1, max_cost)
+            trace.append(f"cost {link[0]} {link[1]} {up[link]}")
+        elif name == "fail":
+            link = rng.choice(list(up))
+            down[link] = up.pop(link)
+            trace.append(f"fail {link[0]} {link[1]}")
+        elif name == "recover":
+            link = rng.choice(list(down))
+            up[link] = down.pop(link)
+            trace.append(f"recover {link[0]} {link[1]} {up[link]}")
+        elif name == "ls":
+            trace.append(f"ls {rng.choice(nodes)}")
+        elif name == "route":
+            source, target = rng.sample(nodes, 2)
+            trace.append(f"route {source} {target}")
+        else:
+            trace.append("stats")
+    return trace
+
+
+def save_trace(file_path: str, graph: nx.Graph, trace: list[str]) -> None:
+    with open(file_path, "w") as file:
+        for u, v, cost in graph.edges(data="weight"):
+            file.write(f"{u} {v} {cost}\n")
+        for operation in trace:
+            file.write(operation + "\n")
+
+
+def load_trace(file_path: str) -> tuple[nx.Graph, list[str]]:
+    """Reads a trace written by save_trace. Returns (the initial graph, the operations)."""
+    graph = nx.Graph()
+    trace = []
+    with open(file_path, "r") as file:
+        for line in file:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] in OPERATIONS:
+                trace.append(line.strip())
+                if parts[0] in ("ls", "route"):
+                    graph.add_nodes_from(parts[1:])  # Nodes without links are not in the edge lines
+            elif len(parts) == 3:
+                graph.add_edge(parts[0], parts[1], weight=int(parts[2]))
+    return graph, trace
+
+
+def replay(graph_manager: GraphManager, trace: list[str]) -> tuple[dict[str, list[float]], float]:
+    """Runs every operation of trace against graph_manager, in order.
+
+    Returns:
+        tuple: (the latency in seconds of each operation, by type, the total seconds)
+    """
+    latencies: dict[str, list[float]] = {}
+    graph_manager.temp_mute()
+    journal = graph_manager.journal
+    graph_manager.journal = False  # Long traces would otherwise keep every link flap for undo
+    # The routing classes print their tables, which would dominate the timings on a terminal
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            for operation in trace:
+                name, *args = operation.split()
+                op_start = time.perf_counter()
+                if name in ("cost", "recover"):
+                    graph_manager.add_edge(args[0], args[1], int(args[2]))
+                elif name == "fail":
+                    graph_manager.remove_edge(args[0], args[1])
+                elif name == "ls":
+                    graph_manager.ls_state = {}  # Each query starts from scratch, like `ls -r`
+                    graph_manager.runs["ls"] += LinkStateRouting(graph_manager).run(args[0])
+                elif name == "route":
+                    shortest_route(args[0], args[1], graph_manager.graph)
+                elif name == "stats":
+                    graph_metrics(graph_manager.graph)
+                else:
+                    raise ValueError(f"Unknown operation: '{operation}'")
+                latencies.setdefault(name, []).append(time.perf_counter() - op_start)
+            seconds = time.perf_counter() - start
+    finally:
+        graph_manager.journal = journal
+        graph_manager.temp_unmute()
+    return latencies, seconds
+
+
+def summarize(latencies: dict[str, list[float]], seconds: float) -> dict[str, dict[str, float]]:
+    """Gets the count, rate and p50, p95, p99 and max latency in milliseconds of each operation type,
+    and of all operations under `all`."""
+    everything = [latency for values in latencies.values() for latency in values]
+    report = {}
+    for name, values in [*latencies.items(), ("all", everything)]:
+        if not values:
+            continue
+        values = sorted(values)
+        report[name] = {
+            "count": len(values),
+            "per_second": len(values) / seconds if seconds > 0 else 0.0,
+            "p50": percentile(values, 50) * 1000,
+            "p95": percentile(values, 95) * 1000,
+            "p99": percentile(values, 99) * 1000,
+            "max": values[-1] * 1000,
+        }
+    return report
+
+
+def print_report(report: dict[str, dict[str, float]]) -> None:
+    print(f"{'operation':<10}{'count':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name in [*OPERATIONS, "all"]:
+        if name in report:
+            row = report[name]
+            print(
+                f"{name:<10}{row['count']:>8}{row['per_second']:>10.1f}{row['p50']:>10.3f}"
+                f"{row['p95']:>10.3f}{row['p99']:>10.3f}{row['max']:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    from benchmarks import random_weighted_graph
+
+    parser = argparse.ArgumentParser(description="Generates a workload trace and replays it.")
+    parser.add_argument("--trace", help="Replays this trace file instead of generating one.")
+    parser.add_argument("--save", help="Saves the generated trace to this file.")
+    parser.add_argument("--nodes", type=int, default=100)
+    parser.add_argument("--edges", type=int, default=300)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--ratios", type=parse_ratios, default=DEFAULT_RATIOS, help="Ratios of operations, e.g. cost=0.2,route=0.8"
+    )
+    args = parser.parse_args()
+
+    if args.trace:
+        graph, trace = load_trace(args.trace)
+    else:
+        graph = random_weighted_graph(args.nodes, args.edges, 20, args.seed)
+        trace = generate_trace(graph, args.ops, args.ratios, seed=args.seed)
+        if args.save:
+            save_trace(args.save, graph, trace)
+
+    manager = GraphManager()
+    manager.graph = graph
+    print(f"Replaying {len(trace)} operations on V={graph.number_of_nodes()} E={graph.number_of_edges()}")
+    print_report(summarize(*replay(manager, trace)))